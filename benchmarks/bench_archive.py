@@ -0,0 +1,116 @@
+import argparse
+import copy
+import gzip
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+from tvgu_structs_parser.archive import StructsArchive, StructVersion
+from tvgu_structs_parser.diff import load_structs_dump
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.serialization import struct_from_dict
+
+# Сколько записей в среднем меняется за день: выгрузки от дня ко дню почти одинаковые
+CHANGES_PER_DAY: int = 2
+
+
+def directory_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+# Следующий день: пара кафедр поменяла телефон или почту, изредка у структуры меняется описание
+def mutate(records: list[dict[str, Any]], day: int, rng: random.Random) -> list[dict[str, Any]]:
+    records = copy.deepcopy(records)
+
+    for _ in range(CHANGES_PER_DAY):
+        struct: dict[str, Any] = rng.choice(records)
+
+        if struct["departments"] and rng.random() < 0.8:
+            department: dict[str, Any] = rng.choice(struct["departments"])
+            department["email"] = f"day{day}@tversu.ru"
+        else:
+            struct["description"] = f"{struct['description']} ({day})"
+
+    return records
+
+
+def run(dump_path: Path, days: int) -> bool:
+    rng: random.Random = random.Random(0)
+    first_day: date = date(2026, 1, 10)
+    records: list[dict[str, Any]] = load_structs_dump(dump_path)
+
+    with tempfile.TemporaryDirectory() as directory:
+        dumps_directory: Path = Path(directory) / "parsed_structs"
+        dumps_directory.mkdir()
+
+        for day in range(days):
+            if day:
+                records = mutate(records, day, rng)
+            day_path: Path = dumps_directory / f"structs-{first_day + timedelta(days=day)}.json"
+            day_path.write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding="UTF-8")
+
+        raw_size: int = directory_size(dumps_directory)
+        gzip_size: int = sum(len(gzip.compress(path.read_bytes())) for path in dumps_directory.iterdir())
+
+        archive: StructsArchive = StructsArchive(Path(directory) / "archive")
+        started: float = time.perf_counter()
+        archive.import_dumps(dumps_directory)
+        import_time: float = time.perf_counter() - started
+        archive_size: int = directory_size(archive.directory)
+
+        middle_date: str = str(first_day + timedelta(days=days // 2))
+        middle_dump: Path = dumps_directory / f"structs-{middle_date}.json"
+
+        started = time.perf_counter()
+        from_archive: list[TvGUStruct] = archive.get(middle_date)
+        archive_get_time: float = time.perf_counter() - started
+
+        started = time.perf_counter()
+        from_dump: list[TvGUStruct] = [struct_from_dict(record) for record in load_structs_dump(middle_dump)]
+        dump_get_time: float = time.perf_counter() - started
+
+        name: str = records[0]["name"]
+        started = time.perf_counter()
+        history: list[StructVersion] = archive.history(name)
+        history_time: float = time.perf_counter() - started
+
+        # Без архива: прочитать все выгрузки подряд
+        started = time.perf_counter()
+        for path in sorted(dumps_directory.iterdir()):
+            next(record for record in load_structs_dump(path) if record["name"] == name)
+        scan_time: float = time.perf_counter() - started
+
+    same: bool = [struct.name for struct in from_archive] == [struct.name for struct in from_dump] and all(
+        archived.description == dumped.description and archived.departments == dumped.departments
+        and [department.email for department in archived.departments]
+        == [department.email for department in dumped.departments]
+        for archived, dumped in zip(from_archive, from_dump)
+    )
+
+    print(f"{days} дней выгрузок {dump_path.name}:")
+    print(f"  JSON как есть:       {raw_size / 1024:>9.0f} КиБ")
+    print(f"  каждый день в gzip:  {gzip_size / 1024:>9.0f} КиБ")
+    print(f"  архив:               {archive_size / 1024:>9.0f} КиБ (импорт {import_time * 1000:.0f} мс)")
+    print(f"  выгрузка за день:    архив {archive_get_time * 1000:.2f} мс, JSON {dump_get_time * 1000:.2f} мс, "
+          f"совпадает: {same}")
+    print(f"  история структуры:   архив {history_time * 1000:.2f} мс ({len(history)} версий), "
+          f"перебор всех выгрузок {scan_time * 1000:.2f} мс")
+
+    return same and archive_size < gzip_size
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Архив выгрузок против хранения JSON за каждый день")
+    arg_parser.add_argument("dump", nargs="?", default="parsed_structs/structs-2026-01-10.json",
+                            help="Выгрузка, с которой начинается история")
+    arg_parser.add_argument("--days", type=int, default=120, help="Сколько дней сымитировать")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+
+    if not run(Path(parsed_args.dump), parsed_args.days):
+        sys.exit(1)
@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import dataclasses
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Optional
+
+from aiohttp import web
+
+from tvgu_structs_parser.enrichment import LinkCrawler, LinkCheckCache, DepartmentLinks, enrich_departments
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.parser import parse_all_sources, join_parsed_sources
+from tvgu_structs_parser.parsers.parser_structs import Department
+
+from .standin_server import StandInServer, local_session
+from .synthetic import generate_payloads
+
+DOCUMENT_BODY: bytes = b"%PDF-1.4 " + b"0" * 64 * 1024
+LATENCY_SECONDS: float = 0.02
+# Каждый такой сайт не отвечает дольше таймаута проверки, каждый такой – отвечает 404
+HUNG_SITE_EVERY: int = 11
+MISSING_SITE_EVERY: int = 7
+CHECK_TIMEOUT_SECONDS: float = 0.5
+
+
+# Все хосты кафедр на одном сервере: ссылки ведут на его порт, хост остаётся (см. `local_session`)
+def point_links_to(structs: list[TvGUStruct], server: StandInServer) -> list[TvGUStruct]:
+    def local(url: Optional[str]) -> Optional[str]:
+        return None if url is None else server.host_url(url)
+
+    def point_department(department: Department) -> Department:
+        return dataclasses.replace(
+            department, website=local(department.website), division_clause_url=local(department.division_clause_url)
+        )
+
+    return [
+        dataclasses.replace(struct, departments=[point_department(department) for department in struct.departments])
+        for struct in structs
+    ]
+
+
+class LinkHosts:
+    def __init__(self) -> None:
+        self.in_flight: Counter[str] = Counter()
+        self.max_in_flight: Counter[str] = Counter()
+        self.methods: Counter[str] = Counter()
+
+    async def __call__(self, request: web.Request) -> web.StreamResponse:
+        host: str = request.url.host
+        self.methods[request.method] += 1
+        self.in_flight[host] += 1
+        self.max_in_flight[host] = max(self.max_in_flight[host], self.in_flight[host])
+
+        try:
+            return await self.respond(host, request.match_info["tail"])
+        finally:
+            self.in_flight[host] -= 1
+
+    async def respond(self, host: str, path: str) -> web.Response:
+        await asyncio.sleep(LATENCY_SECONDS)
+
+        if path.startswith("docs/"):
+            return web.Response(body=DOCUMENT_BODY, content_type="application/pdf",
+                                headers={"ETag": f'"{path}"', "Last-Modified": "Mon, 12 Jan 2026 10:00:00 GMT"})
+
+        number: int = int(host.split(".")[0].lstrip("k") or 0)
+
+        if number % HUNG_SITE_EVERY == 0:
+            await asyncio.sleep(CHECK_TIMEOUT_SECONDS * 4)
+        if number % MISSING_SITE_EVERY == 0:
+            return web.Response(status=404)
+        return web.Response(text="<html></html>", content_type="text/html")
+
+
+async def crawl(structs: list[TvGUStruct], **crawler_kwargs: Any) -> tuple[list[DepartmentLinks], LinkCrawler, float]:
+    async with local_session() as session:
+        crawler: LinkCrawler = LinkCrawler(timeout=CHECK_TIMEOUT_SECONDS, session=session, **crawler_kwargs)
+        started: float = time.perf_counter()
+        enriched: list[DepartmentLinks] = await enrich_departments(structs, crawler)
+
+    return enriched, crawler, time.perf_counter() - started
+
+
+async def run(scale: int) -> bool:
+    hosts: LinkHosts = LinkHosts()
+    server: StandInServer = StandInServer({"/{tail:.*}": hosts})
+    per_host: int = 4
+    passed: bool = True
+
+    async with server.running():
+        structs: list[TvGUStruct] = point_links_to(
+            join_parsed_sources(parse_all_sources(generate_payloads(scale))), server
+        )
+        _, sequential, sequential_elapsed = await crawl(
+            structs, concurrency=1, per_host_concurrency=1, host_rate=None
+        )
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            hosts.max_in_flight.clear()
+            enriched, crawler, elapsed = await crawl(
+                structs, cache=LinkCheckCache(cache_dir), per_host_concurrency=per_host, host_rate=None
+            )
+            busiest: int = max(hosts.max_in_flight.values())
+
+            # Проверки устарели: положения перепроверяются только по HEAD
+            hosts.methods.clear()
+            _, revalidating, revalidate_elapsed = await crawl(
+                structs, cache=LinkCheckCache(cache_dir, max_age_seconds=0), host_rate=None
+            )
+            documents_downloaded: int = hosts.methods["GET"]
+
+            _, cached, cached_elapsed = await crawl(structs, cache=LinkCheckCache(cache_dir))
+
+        # Ограничение частоты: 20 запросов на один хост при 50 в секунду – не быстрее ~0.38 с
+        rate_started: float = time.perf_counter()
+        async with local_session() as session:
+            rate_crawler: LinkCrawler = LinkCrawler(host_rate=50, session=session)
+            await asyncio.gather(*(
+                rate_crawler.check(server.host_url(f"https://tversu.ru/docs/rate-{number}.pdf"), "division_clause")
+                for number in range(20)
+            ))
+        rate_elapsed: float = time.perf_counter() - rate_started
+
+    clauses: int = sum(links.division_clause is not None for links in enriched)
+    unreachable: int = sum(links.website is not None and not links.website.reachable for links in enriched)
+    hashed: int = sum(links.division_clause is not None and links.division_clause.digest is not None
+                      for links in enriched)
+
+    print(f"Кафедр: {len(enriched)}, положений: {clauses} (с хэшем {hashed}), недоступных сайтов: {unreachable}")
+    print(f"  по одному запросу:      {sequential_elapsed * 1000:>8.1f} мс, {sequential.stats}")
+    print(f"  параллельно:            {elapsed * 1000:>8.1f} мс, {crawler.stats}, "
+          f"больше всего одновременно на хост: {busiest}")
+    print(f"  перепроверка по HEAD:   {revalidate_elapsed * 1000:>8.1f} мс, {revalidating.stats}, "
+          f"скачано положений: {documents_downloaded}")
+    print(f"  из кэша:                {cached_elapsed * 1000:>8.1f} мс, {cached.stats}")
+    print(f"  20 запросов при 50/с:   {rate_elapsed * 1000:>8.1f} мс")
+
+    passed &= elapsed < sequential_elapsed / 2
+    passed &= busiest <= per_host
+    passed &= hashed == clauses
+    passed &= documents_downloaded == 0 and revalidating.stats.not_modified == clauses
+    passed &= cached.stats.requests == 0
+    passed &= rate_elapsed >= 19 / 50
+
+    return passed
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Проверка положений и сайтов кафедр на сервере-заглушке")
+    arg_parser.add_argument("--scale", type=int, default=2, help="Во сколько раз больше реальных объёмов")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+
+    if not asyncio.run(run(parsed_args.scale)):
+        sys.exit(1)
@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Optional, Callable, Awaitable
+from urllib.parse import urlsplit
+
+from tvgu_structs_parser.config import STRUCTS_PAGE_URL, STRUCTS_TVERSU_PAGE_URL, STRUCTS_API_URL, \
+    ALL_GROUPS_API_URL
+from tvgu_structs_parser.structs_requests import FetchPolicy, fetch_all_sources
+
+from .standin_server import StandInServer, StandInClient, Handler, static_response, failing_response, \
+    slow_response
+
+HTML_BODY: bytes = ("<html><body>" + "<p>Факультет</p>" * 200 + "</body></html>").encode()
+JSON_BODY: bytes = json.dumps({"data": [{"facultyName": "Факультет", "facultyShort": "Ф"}] * 20}).encode()
+
+SOURCES: dict[str, tuple[bytes, str]] = {
+    STRUCTS_PAGE_URL: (HTML_BODY, "text/html"),
+    STRUCTS_TVERSU_PAGE_URL: (HTML_BODY, "text/html"),
+    STRUCTS_API_URL: (JSON_BODY, "application/json"),
+    ALL_GROUPS_API_URL: (JSON_BODY, "application/json"),
+}
+# Паузы между повторами в сценариях короткие, чтобы не ждать
+FAST_BACKOFF: dict[str, float] = {"backoff_base": 0.01, "backoff_max": 0.05}
+
+Scenario = Callable[[], Awaitable[tuple[bool, str]]]
+
+
+def describe(error: Optional[BaseException]) -> str:
+    return "нет" if error is None else type(error).__name__
+
+
+def create_server(faults: dict[str, Callable[[Handler], Handler]]) -> StandInServer:
+    routes: dict[str, Handler] = {}
+
+    for url, (body, content_type) in SOURCES.items():
+        handler: Handler = static_response(body, content_type)
+        routes[urlsplit(url).path] = faults[url](handler) if url in faults else handler
+
+    return StandInServer(routes)
+
+
+async def fetch_all(server: StandInServer, policy: FetchPolicy) -> Optional[BaseException]:
+    async with StandInClient(server, fetch_policy=policy) as client:
+        try:
+            await fetch_all_sources(client)
+        except Exception as error:
+            return error
+
+    return None
+
+
+async def transient_errors_are_retried() -> tuple[bool, str]:
+    server: StandInServer = create_server({STRUCTS_API_URL: lambda handler: failing_response(handler, failures=2)})
+
+    async with server.running():
+        error: Optional[BaseException] = await fetch_all(server, FetchPolicy(retries=3, **FAST_BACKOFF))
+
+    # Четыре источника плюс два повтора
+    details: str = f"ошибка: {describe(error)}, запросов: {server.requests_count}"
+    return error is None and server.requests_count == 6, details
+
+
+async def client_errors_are_not_retried() -> tuple[bool, str]:
+    server: StandInServer = create_server({
+        STRUCTS_API_URL: lambda handler: failing_response(handler, failures=1, status=404)
+    })
+
+    async with server.running():
+        error: Optional[BaseException] = await fetch_all(server, FetchPolicy(retries=3, **FAST_BACKOFF))
+
+    # Остальные загрузки могли отмениться раньше, чем дошли до сервера
+    details: str = f"ошибка: {describe(error)}, запросов: {server.requests_count}"
+    return error is not None and server.requests_count <= 4, details
+
+
+async def hung_source_times_out_and_cancels_siblings() -> tuple[bool, str]:
+    server: StandInServer = create_server({
+        ALL_GROUPS_API_URL: lambda handler: slow_response(handler, delay_ms=60_000),
+        STRUCTS_PAGE_URL: lambda handler: slow_response(handler, delay_ms=5_000),
+    })
+
+    async with server.running():
+        policy: FetchPolicy = FetchPolicy(
+            read_timeout=0.3, read_timeouts={server.url(urlsplit(ALL_GROUPS_API_URL).path): 0.3},
+            retries=1, **FAST_BACKOFF
+        )
+        started: float = time.perf_counter()
+        error: Optional[BaseException] = await fetch_all(server, policy)
+        elapsed: float = time.perf_counter() - started
+
+    # Без отмены прогон ждал бы медленную страницу все 5 с
+    return error is not None and elapsed < 2, f"ошибка: {describe(error)} через {elapsed * 1000:.0f} мс"
+
+
+async def hedged_request_cuts_tail_latency() -> tuple[bool, str]:
+    server: StandInServer = create_server({
+        STRUCTS_API_URL: lambda handler: slow_response(handler, delay_ms=1_000, every=5),
+    })
+
+    async def worst_latency(policy: FetchPolicy) -> float:
+        worst: float = 0.0
+
+        async with StandInClient(server, fetch_policy=policy) as client:
+            for _ in range(20):
+                started: float = time.perf_counter()
+                await client.fetch(STRUCTS_API_URL)
+                worst = max(worst, time.perf_counter() - started)
+
+        return worst
+
+    async with server.running():
+        plain: float = await worst_latency(FetchPolicy())
+        hedged: float = await worst_latency(FetchPolicy(hedge_percentile=0.5, hedge_min_samples=3))
+
+    details: str = f"худшая загрузка без дублирования {plain * 1000:.0f} мс, с ним {hedged * 1000:.0f} мс"
+    return hedged < plain / 2, details
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "Повтор после 503": transient_errors_are_retried,
+    "Без повторов после 404": client_errors_are_not_retried,
+    "Таймаут и отмена остальных загрузок": hung_source_times_out_and_cancels_siblings,
+    "Дублирующий запрос": hedged_request_cuts_tail_latency,
+}
+
+
+async def run() -> bool:
+    all_passed: bool = True
+
+    for name, scenario in SCENARIOS.items():
+        passed, details = await scenario()
+        all_passed &= passed
+        print(f"{'OK ' if passed else 'НЕТ'} {name}: {details}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Таймауты, повторы, отмена и дублирующие запросы на заглушке")
+    arg_parser.parse_args()
+
+    if not asyncio.run(run()):
+        sys.exit(1)
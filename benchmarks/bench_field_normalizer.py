@@ -0,0 +1,94 @@
+import argparse
+import re
+import sys
+import timeit
+from typing import Callable, Any, Optional
+
+from tvgu_structs_parser.config import STRUCTS_TO_SKIP, NON_DIGITS_PATTERN
+from tvgu_structs_parser.field_normalizer import FieldNormalizer, truly_capitalize
+
+NAMES: list[str] = [
+    "Биологический факультет",
+    "Институт экономики и управления",
+    "Аспирантура",
+    "Факультет прикладной математики и кибернетики",
+]
+PHONES: list[str] = ["+7 (4822) 58-11-22 доб. 123, +7 (4822) 34-24-36", "8 (4822) 77-89-09; 8 (4822) 52-09-79"]
+PHONE: str = "Телефон: +7 (4822) 58-11-22 доб. 123"
+ADDRESS: str = "Центральный федеральный округ, Тверская область, г. Тверь, ул. Жигарева, д. 5"
+JOBS: str = "Декан, Зав. кафедрой; И. о. заведующего (по совместительству, с 2024 г.)"
+
+
+# Прежние версии хелперов из misc.py: всё собирается на каждый вызов
+def legacy_split_n_clean(text: str, *splitters: str) -> list[str]:
+    if splitters:
+        splitted = re.split(r"(?:%s)(?![^()]*\))" % "|".join(map(re.escape, splitters)), text)
+    else:
+        splitted = [text]
+
+    return list(filter(lambda x: x, (truly_capitalize(job.strip().strip("/")) for job in splitted)))
+
+
+def legacy_parse_phone(phone_l: str) -> str:
+    phone_l = phone_l.replace("Телефон:", "").split("доб")[0]
+    phone_l = phone_l.translate(str.maketrans({"\xa0": "", " ": "", "+": "", "-": "", "(": "", ")": ""}))
+    return phone_l.strip()
+
+
+def legacy_is_struct_skipping(struct_name: str) -> bool:
+    for skip_struct in STRUCTS_TO_SKIP:
+        if skip_struct.lower() in struct_name.lower():
+            return True
+    return False
+
+
+def legacy_shorten_address(address: str) -> str:
+    address = re.sub("Центральный федеральный округ, Тверская область,", "", address, flags=re.IGNORECASE).strip()
+    return re.sub("Тверская область,", "", address, flags=re.IGNORECASE).strip()
+
+
+def legacy_parse_phones(phones_text: Optional[str]) -> tuple[list[str], list[Optional[str]]]:
+    phones: list[str] = []
+    additional_codes: list[Optional[str]] = []
+
+    for phone_text in legacy_split_n_clean(phones_text.lower(), ",", ";"):
+        phone_with_add_code = [re.sub(NON_DIGITS_PATTERN, "", part) for part in phone_text.split("доб")]
+        phone: str = phone_with_add_code[0]
+        phones.append(phone)
+        additional_codes.append(phone_with_add_code[1] if phone and len(phone_with_add_code) > 1 else None)
+
+    return phones, additional_codes
+
+
+def run(number: int) -> bool:
+    normalizer: FieldNormalizer = FieldNormalizer()
+    cases: list[tuple[str, Callable[[], Any], Callable[[], Any]]] = [
+        ("split_n_clean", lambda: legacy_split_n_clean(JOBS, ",", ";"),
+         lambda: normalizer.split_n_clean(JOBS, ",", ";")),
+        ("parse_phone", lambda: legacy_parse_phone(PHONE), lambda: normalizer.parse_phone(PHONE)),
+        ("is_struct_skipping", lambda: [legacy_is_struct_skipping(name) for name in NAMES],
+         lambda: [normalizer.is_struct_skipping(name) for name in NAMES]),
+        ("shorten_address", lambda: legacy_shorten_address(ADDRESS), lambda: normalizer.shorten_address(ADDRESS)),
+        ("parse_phones_n_codes", lambda: [legacy_parse_phones(phones) for phones in PHONES],
+         lambda: [tuple(map(list, normalizer.parse_phones_n_additional_codes(phones))) for phones in PHONES]),
+    ]
+    all_equal: bool = True
+
+    for name, legacy, compiled in cases:
+        same: bool = legacy() == compiled()
+        all_equal &= same
+        legacy_time: float = min(timeit.repeat(legacy, number=number, repeat=5)) / number
+        compiled_time: float = min(timeit.repeat(compiled, number=number, repeat=5)) / number
+
+        print(f"{name:<24}было {legacy_time * 1e6:>7.2f} мкс, стало {compiled_time * 1e6:>7.2f} мкс "
+              f"(x{legacy_time / compiled_time:.1f}){'' if same else ' – РЕЗУЛЬТАТ РАЗЛИЧАЕТСЯ'}")
+
+    return all_equal
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Микробенчмарки хелперов нормализации полей")
+    arg_parser.add_argument("-n", "--number", type=int, default=20_000, help="Вызовов на замер")
+
+    if not run(arg_parser.parse_args().number):
+        sys.exit(1)
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import AsyncIterator
+
+from tvgu_structs_parser.config import STREAM_CHUNK_SIZE
+from tvgu_structs_parser.parsers.parser_all_groups import parse_all_groups, parse_all_groups_stream
+from tvgu_structs_parser.snapshots import load_snapshot
+
+
+def scale_groups_body(body: bytes, scale: int) -> bytes:
+    groups: list[dict] = json.loads(body)["groups"]
+    return json.dumps({"groups": groups * scale}, ensure_ascii=False).encode()
+
+
+async def iter_chunks(body: bytes) -> AsyncIterator[bytes]:
+    for start in range(0, len(body), STREAM_CHUNK_SIZE):
+        yield body[start:start + STREAM_CHUNK_SIZE]
+
+
+# Тело ответа считается уже полученным: меряется только память и время на декодирование и раскладку групп
+def measure_full(body: bytes) -> tuple[float, int]:
+    tracemalloc.start()
+    started: float = time.perf_counter()
+    parse_all_groups(json.loads(body))
+    elapsed: float = time.perf_counter() - started
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def measure_stream(body: bytes) -> tuple[float, int]:
+    tracemalloc.start()
+    started: float = time.perf_counter()
+    asyncio.run(parse_all_groups_stream(iter_chunks(body)))
+    elapsed: float = time.perf_counter() - started
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def run(snapshot_path: str, scales: list[int]) -> None:
+    body: bytes = load_snapshot(snapshot_path).all_groups.body
+
+    for scale in scales:
+        scaled_body: bytes = scale_groups_body(body, scale)
+        full_time, full_peak = measure_full(scaled_body)
+        stream_time, stream_peak = measure_stream(scaled_body)
+
+        print(f"x{scale:<5} {len(scaled_body) / 1024 / 1024:>8.2f} МиБ ответа | "
+              f"целиком: {full_time * 1000:>8.1f} мс, пик {full_peak / 1024 / 1024:>7.2f} МиБ | "
+              f"потоково: {stream_time * 1000:>8.1f} мс, пик {stream_peak / 1024 / 1024:>7.2f} МиБ")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк потокового разбора групп расписаний")
+    arg_parser.add_argument("snapshot", help="Путь к снимку")
+    arg_parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="Во сколько раз размножить группы")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+    run(parsed_args.snapshot, parsed_args.scales)
@@ -0,0 +1,64 @@
+import argparse
+import sys
+from dataclasses import asdict
+from typing import Any
+
+from tvgu_structs_parser.html_backend import available_backends
+from tvgu_structs_parser.parsers.parser_structs import parse_structs_page
+from tvgu_structs_parser.parsers.parser_structs_tversu_page import parse_structs_tversu_page
+from tvgu_structs_parser.snapshots import load_snapshot
+from tvgu_structs_parser.structs_requests import SourcesPayloads
+
+from .bench_parsers import measure
+
+REFERENCE_BACKEND: str = "html.parser"
+
+
+def as_plain(parsed: Any) -> Any:
+    if isinstance(parsed, dict):
+        return {key: as_plain(value) for key, value in parsed.items()}
+    if isinstance(parsed, list):
+        return [as_plain(value) for value in parsed]
+    return asdict(parsed)
+
+
+# Сравнение построителей дерева: время и совпадение результата с "html.parser" (по всем полям, а не по `__eq__`)
+def run(snapshot_path: str, repeats: int) -> bool:
+    payloads: SourcesPayloads = load_snapshot(snapshot_path)
+    structs_page: str = payloads.structs_page.text()
+    tversu_page: str = payloads.structs_tversu_page.text()
+
+    reference: tuple[Any, Any] = (
+        as_plain(parse_structs_page(structs_page, html_backend=REFERENCE_BACKEND)),
+        as_plain(parse_structs_tversu_page(tversu_page, html_backend=REFERENCE_BACKEND)),
+    )
+
+    all_equal: bool = True
+
+    for backend in available_backends():
+        structs_page_time, structs_n_departments = measure(
+            lambda: parse_structs_page(structs_page, html_backend=backend), repeats
+        )
+        tversu_page_time, structs_tversu = measure(
+            lambda: parse_structs_tversu_page(tversu_page, html_backend=backend), repeats
+        )
+
+        equal: bool = (as_plain(structs_n_departments), as_plain(structs_tversu)) == reference
+        all_equal = all_equal and equal
+
+        print(f"{backend:<12} sveden/struct: {structs_page_time * 1000:>9.2f} мс   "
+              f"pages/2182: {tversu_page_time * 1000:>8.2f} мс   "
+              f"{'совпадает' if equal else 'РАСХОЖДЕНИЕ'}")
+
+    return all_equal
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Сравнение HTML-бэкендов на записанном снимке источников")
+    arg_parser.add_argument("snapshot", help="Путь к снимку")
+    arg_parser.add_argument("-n", "--repeats", type=int, default=5, help="Количество повторов (берётся лучшее время)")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+
+    if not run(parsed_args.snapshot, parsed_args.repeats):
+        sys.exit(1)
@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+
+from tvgu_structs_parser import StructsClient
+
+from .standin_server import StandInServer, static_response
+
+HTML_BODY: bytes = ("<html><body>" + "<p>Факультет</p>" * 2000 + "</body></html>").encode()
+JSON_BODY: bytes = json.dumps({"data": [{"facultyName": "Факультет", "facultyShort": "Ф"}] * 200}).encode()
+
+ROUTES: dict[str, tuple[bytes, str]] = {
+    "/sveden/struct": (HTML_BODY, "text/html"),
+    "/pages/2182": (HTML_BODY, "text/html"),
+    "/api/catalog/faculties": (JSON_BODY, "application/json"),
+    "/api/v3/groups": (JSON_BODY, "application/json"),
+}
+
+
+# Старое поведение: по отдельной сессии (и соединению) на каждый источник
+async def fetch_with_own_sessions(urls: list[str]) -> None:
+    async def fetch(url: str) -> bytes:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as response:
+                return await response.read()
+
+    await asyncio.gather(*(fetch(url) for url in urls))
+
+
+async def fetch_with_shared_client(client: StructsClient, urls: list[str]) -> None:
+    await asyncio.gather(*(client.get_text(url) for url in urls))
+
+
+async def run(runs: int) -> None:
+    server: StandInServer = StandInServer({
+        path: static_response(body, content_type) for path, (body, content_type) in ROUTES.items()
+    })
+
+    async with server.running():
+        urls: list[str] = [server.url(path) for path in ROUTES]
+
+        started: float = time.perf_counter()
+        for _ in range(runs):
+            await fetch_with_own_sessions(urls)
+        own_elapsed: float = time.perf_counter() - started
+        own_connections: int = len(server.connections)
+
+        server.reset_counters()
+
+        async with StructsClient() as client:
+            started = time.perf_counter()
+            for _ in range(runs):
+                await fetch_with_shared_client(client, urls)
+            shared_elapsed: float = time.perf_counter() - started
+        shared_connections: int = len(server.connections)
+
+    print(f"Запусков: {runs}, источников за запуск: {len(urls)}")
+    print(f"Отдельные сессии: {own_elapsed * 1000:.1f} мс, соединений: {own_connections}")
+    print(f"Общий клиент:     {shared_elapsed * 1000:.1f} мс, соединений: {shared_connections}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк общего пула соединений")
+    arg_parser.add_argument("-n", "--runs", type=int, default=50, help="Количество полных запусков")
+
+    asyncio.run(run(arg_parser.parse_args().runs))
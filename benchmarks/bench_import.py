@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional
+
+PACKAGE: str = "tvgu_structs_parser"
+ROOT: Path = Path(__file__).resolve().parents[1]
+# Импорт меряется в отдельном процессе, поэтому шум больше, чем у этапов в `suite`
+DEFAULT_THRESHOLD: float = 0.5
+
+
+@dataclass(frozen=True, kw_only=True)
+class ImportTarget:
+    args: tuple[str, ...]
+    # Чего не должно быть в процессе после импорта: иначе пакет снова тянет зависимости, которые этому пути не нужны
+    forbidden: tuple[str, ...] = ()
+
+
+# Короткие запуски из cron и воркеры, которые только читают выгрузки, не ходят в сеть и не парсят HTML
+IMPORT_TARGETS: dict[str, ImportTarget] = {
+    "package": ImportTarget(args=("-c", f"import {PACKAGE}"), forbidden=("aiohttp", "bs4")),
+    "load_structs": ImportTarget(args=("-c", f"from {PACKAGE} import load_structs"), forbidden=("aiohttp", "bs4")),
+    "archive": ImportTarget(args=("-c", f"from {PACKAGE} import StructsArchive"), forbidden=("aiohttp", "bs4")),
+    "cli_help": ImportTarget(args=("-m", PACKAGE, "--help"), forbidden=("aiohttp", "bs4", "sqlite3")),
+    # Для сравнения: полный конвейер загрузки
+    "get_all_tvgu_structs": ImportTarget(args=("-c", f"from {PACKAGE} import get_all_tvgu_structs")),
+}
+
+
+@dataclass(frozen=True, kw_only=True)
+class ImportResult:
+    seconds: float
+    modules: int
+
+
+# `-X importtime` пишет в stderr по строке на модуль: "import time: self [us] | cumulative | имя",
+# вложенность – отступом имени. Считаются модули пакета верхнего уровня: всё, что они импортировали, входит в них
+def run_importtime(target: ImportTarget) -> tuple[float, list[str]]:
+    completed: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, "-X", "importtime", *target.args],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    total_us: int = 0
+    modules: list[str] = []
+
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        modules.append(name.strip())
+
+        # После "|" всегда один пробел, дальше – отступ вложенности
+        if not name[1:].startswith(" ") and name.strip().split(".")[0] == PACKAGE:
+            total_us += int(cumulative)
+
+    return total_us / 1_000_000, modules
+
+
+def measure_target(target: ImportTarget, repeats: int) -> tuple[ImportResult, list[str]]:
+    best: float = float("inf")
+    modules: list[str] = []
+
+    for _ in range(repeats):
+        seconds, modules = run_importtime(target)
+        best = min(best, seconds)
+
+    return ImportResult(seconds=best, modules=len(modules)), modules
+
+
+def find_forbidden(target: ImportTarget, modules: list[str]) -> list[str]:
+    return sorted({
+        forbidden for forbidden in target.forbidden for module in modules
+        if module == forbidden or module.startswith(f"{forbidden}.")
+    })
+
+
+def run(repeats: int, baseline_path: Optional[str], save_baseline_path: Optional[str], threshold: float) -> bool:
+    results: dict[str, ImportResult] = {}
+    problems: list[str] = []
+
+    for name, target in IMPORT_TARGETS.items():
+        results[name], modules = measure_target(target, repeats)
+        print(f"  {name:<24}{results[name].seconds * 1000:>10.2f} мс {results[name].modules:>6} модулей")
+
+        for forbidden in find_forbidden(target, modules):
+            problems.append(f"{name}: импортирован {forbidden}")
+
+    if save_baseline_path is not None:
+        Path(save_baseline_path).write_text(json.dumps(
+            {name: asdict(result) for name, result in results.items()}, ensure_ascii=False, indent=2
+        ), encoding="UTF-8")
+        print(f"Базовые замеры сохранены в {save_baseline_path}")
+
+    if baseline_path is not None:
+        baseline: dict[str, dict] = json.loads(Path(baseline_path).read_text(encoding="UTF-8"))
+
+        for name, result in results.items():
+            base: Optional[dict] = baseline.get(name)
+
+            if base is not None and result.seconds > base["seconds"] * (1 + threshold):
+                problems.append(f"{name}: импорт {base['seconds'] * 1000:.2f} → {result.seconds * 1000:.2f} мс")
+
+    for problem in problems:
+        print(f"РЕГРЕССИЯ {problem}")
+
+    return not problems
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Время импорта пакета по `python -X importtime`")
+    arg_parser.add_argument("-n", "--repeats", type=int, default=5, help="Количество запусков (берётся лучшее время)")
+    arg_parser.add_argument("--baseline", help="Файл базовых замеров для сравнения")
+    arg_parser.add_argument("--save-baseline", help="Сохранить замеры как базовые в файл")
+    arg_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help="Допустимое ухудшение относительно базы (0.5 – на 50%%)")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+
+    if not run(parsed_args.repeats, parsed_args.baseline, parsed_args.save_baseline, parsed_args.threshold):
+        sys.exit(1)
@@ -0,0 +1,91 @@
+import argparse
+import dataclasses
+import sys
+import time
+from dataclasses import asdict
+from typing import Callable
+
+from tvgu_structs_parser.cache import get_payload_digest
+from tvgu_structs_parser.field_normalizer import FIELD_NORMALIZER
+from tvgu_structs_parser.incremental import IncrementalState, IncrementalStats
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.parser import ParsedSources, parse_all_sources, join_measured
+from tvgu_structs_parser.serialization import serialize_structs
+from tvgu_structs_parser.structs_requests import SourcesPayloads, SourcePayload
+from tvgu_structs_parser.timings import PipelineTimings
+
+from .synthetic import generate_payloads
+
+
+# Следующее обновление: у первого факультета сменилась почта на странице структуры, остальные источники те же
+def change_one_struct(payloads: SourcesPayloads) -> SourcesPayloads:
+    body: bytes = payloads.structs_page.body.replace(b"sd1@tversu.ru", b"sd1-new@tversu.ru")
+    structs_page: SourcePayload = dataclasses.replace(
+        payloads.structs_page, body=body, digest=get_payload_digest(body)
+    )
+    return dataclasses.replace(payloads, structs_page=structs_page)
+
+
+def run_full(payloads: SourcesPayloads, timings: PipelineTimings) -> list[TvGUStruct]:
+    return join_measured(parse_all_sources(payloads, timings=timings), timings)
+
+
+def run_incremental(payloads: SourcesPayloads, state: IncrementalState, timings: PipelineTimings) -> list[TvGUStruct]:
+    parsed: ParsedSources = parse_all_sources(payloads, parse_payload=state.parse_payload, timings=timings)
+    return join_measured(parsed, timings, state)
+
+
+# Всё время и отдельно сборка структур (этап normalize)
+def measure(function: Callable[[PipelineTimings], list[TvGUStruct]]) -> tuple[float, float, list[TvGUStruct]]:
+    # Мемоизация полей иначе ускорит повторы
+    FIELD_NORMALIZER.clear_memo()
+    timings: PipelineTimings = PipelineTimings()
+    started: float = time.perf_counter()
+    structs: list[TvGUStruct] = function(timings)
+    total: float = time.perf_counter() - started
+
+    return total, next(stage.duration for stage in timings.stages if stage.stage == "normalize"), structs
+
+
+def stats_delta(state: IncrementalState, before: IncrementalStats) -> str:
+    after: dict[str, int] = asdict(state.stats)
+    return ", ".join(f"{name} {after[name] - value}" for name, value in asdict(before).items())
+
+
+def run_scale(scale: int) -> bool:
+    first: SourcesPayloads = generate_payloads(scale)
+    second: SourcesPayloads = change_one_struct(first)
+    state: IncrementalState = IncrementalState()
+    same: bool = True
+
+    print(f"x{scale}:")
+
+    runs: tuple[tuple[str, SourcesPayloads], ...] = (
+        ("первый прогон", first), ("ничего не изменилось", first), ("изменилась 1 структура", second)
+    )
+
+    for name, payloads in runs:
+        full_time, full_join_time, full = measure(lambda timings: run_full(payloads, timings))
+        before: IncrementalStats = dataclasses.replace(state.stats)
+        incremental_time, incremental_join_time, incremental = measure(
+            lambda timings: run_incremental(payloads, state, timings)
+        )
+        same = same and serialize_structs(incremental) == serialize_structs(full)
+
+        print(f"  {name:<24} заново {full_time * 1000:>9.2f} мс (сборка {full_join_time * 1000:>7.2f}), "
+              f"инкрементально {incremental_time * 1000:>9.2f} мс (сборка {incremental_join_time * 1000:>7.2f})")
+        print(f"  {'':<24} {stats_delta(state, before)}")
+
+    print(f"  совпадает с полной сборкой: {same}")
+    return same
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Повторные прогоны: полная сборка против инкрементальной")
+    arg_parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50],
+                            help="Во сколько раз больше реальных объёмов")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+
+    if not all([run_scale(scale) for scale in parsed_args.scales]):
+        sys.exit(1)
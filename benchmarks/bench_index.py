@@ -0,0 +1,52 @@
+import argparse
+import random
+import time
+from typing import Optional, Callable, Any
+
+from tvgu_structs_parser.index import StructIndex
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.parser import replay_tvgu_structs
+
+
+# Текущий способ: перебор всех структур и их групп
+def find_by_group_scan(structs: list[TvGUStruct], group_name: str) -> Optional[TvGUStruct]:
+    for struct in structs:
+        if group_name in struct.groups:
+            return struct
+    return None
+
+
+def measure_lookups(lookup: Callable[[str], Any], keys: list[str]) -> float:
+    started: float = time.perf_counter()
+
+    for key in keys:
+        lookup(key)
+
+    return (time.perf_counter() - started) / len(keys)
+
+
+def run(snapshot_path: str, lookups: int) -> None:
+    structs: list[TvGUStruct] = replay_tvgu_structs(snapshot_path)
+    groups: list[str] = [group for struct in structs for group in struct.groups]
+    keys: list[str] = [random.choice(groups) for _ in range(lookups)]
+
+    started: float = time.perf_counter()
+    index: StructIndex = StructIndex(structs)
+    build_time: float = time.perf_counter() - started
+
+    scan_time: float = measure_lookups(lambda key: find_by_group_scan(structs, key), keys)
+    index_time: float = measure_lookups(index.by_group, keys)
+
+    print(f"Структур: {len(structs)}, групп: {len(groups)}, поисков: {lookups}")
+    print(f"Построение индекса: {build_time * 1000:.2f} мс")
+    print(f"Перебор: {scan_time * 1e6:>8.2f} мкс на поиск")
+    print(f"Индекс:  {index_time * 1e6:>8.2f} мкс на поиск")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк поиска структуры по названию группы")
+    arg_parser.add_argument("snapshot", help="Путь к снимку")
+    arg_parser.add_argument("-n", "--lookups", type=int, default=100_000, help="Количество поисков")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+    run(parsed_args.snapshot, parsed_args.lookups)
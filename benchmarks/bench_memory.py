@@ -0,0 +1,88 @@
+import argparse
+import gc
+import json
+import tracemalloc
+from dataclasses import make_dataclass, fields
+from typing import Any, Callable
+
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.parser import replay_tvgu_structs
+from tvgu_structs_parser.parsers.parser_structs import Department
+from tvgu_structs_parser.serialization import serialize_structs
+
+TUPLE_FIELDS: tuple[str, ...] = ("phones", "phones_additional_codes", "groups", "boss_jobs")
+
+# Прежнее представление: обычные датаклассы с `__dict__`, списки и неинтернированные строки
+LegacyDepartment: type = make_dataclass(
+    "LegacyDepartment", [field.name for field in fields(Department)], frozen=True, kw_only=True
+)
+LegacyTvGUStruct: type = make_dataclass(
+    "LegacyTvGUStruct", [field.name for field in fields(TvGUStruct)], frozen=True, kw_only=True
+)
+
+
+def build_legacy(records: list[dict[str, Any]]) -> list[Any]:
+    return [
+        LegacyTvGUStruct(**{
+            **record,
+            "departments": [LegacyDepartment(**department) for department in record["departments"]],
+        })
+        for record in records
+    ]
+
+
+def as_tuples(record: dict[str, Any]) -> dict[str, Any]:
+    return {
+        name: tuple(value) if name in TUPLE_FIELDS and value is not None else value
+        for name, value in record.items()
+    }
+
+
+def build_slotted(records: list[dict[str, Any]]) -> list[TvGUStruct]:
+    return [
+        TvGUStruct(**{
+            **as_tuples(record),
+            "departments": [Department(**as_tuples(department)) for department in record["departments"]],
+        })
+        for record in records
+    ]
+
+
+# Память, которую занимают `copies` независимых копий результата (как несколько снимков для сравнения).
+# Каждая копия строится из свежего `json.loads`, чтобы строки не были общими заранее
+def measure_retained(body: bytes, build: Callable[[list[dict[str, Any]]], list[Any]], copies: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        kept: list[list[Any]] = [build(json.loads(body)) for _ in range(copies)]
+        gc.collect()
+        retained: int = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    del kept
+    return retained
+
+
+def run(snapshot_path: str, copies: int) -> None:
+    structs: list[TvGUStruct] = replay_tvgu_structs(snapshot_path)
+    body: bytes = serialize_structs(structs)
+    records_count: int = len(structs) * copies
+
+    legacy: int = measure_retained(body, build_legacy, copies)
+    slotted: int = measure_retained(body, build_slotted, copies)
+
+    print(f"Структур: {len(structs)}, кафедр: {sum(len(struct.departments) for struct in structs)}, копий: {copies}")
+    print(f"{'До (dict, списки)':<32}{legacy / records_count:>10.0f} байт на структуру")
+    print(f"{'После (slots, кортежи, intern)':<32}{slotted / records_count:>10.0f} байт на структуру")
+    print(f"Экономия: {(1 - slotted / legacy) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк памяти на представление распарсенных структур")
+    arg_parser.add_argument("snapshot", help="Путь к снимку")
+    arg_parser.add_argument("-c", "--copies", type=int, default=10, help="Сколько копий результата держать в памяти")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+    run(parsed_args.snapshot, parsed_args.copies)
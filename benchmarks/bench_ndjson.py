@@ -0,0 +1,72 @@
+import argparse
+import time
+import tracemalloc
+from typing import Optional, Callable
+
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.parser import ParsedSources, parse_all_sources, join_parsed_sources, iter_joined_structs
+from tvgu_structs_parser.serialization import serialize_structs, write_structs_ndjson
+
+from .synthetic import generate_payloads
+
+
+# Вместо файла: запоминает, когда пришли первые байты, и сколько всего
+class TimingSink:
+    def __init__(self) -> None:
+        self.started: float = time.perf_counter()
+        self.first_write: Optional[float] = None
+        self.size: int = 0
+
+    def write(self, data: bytes) -> int:
+        if self.first_write is None:
+            self.first_write = time.perf_counter() - self.started
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def write_json_array(parsed: ParsedSources, sink: TimingSink) -> None:
+    structs: list[TvGUStruct] = join_parsed_sources(parsed)
+    sink.write(serialize_structs(structs))
+
+
+def write_ndjson(parsed: ParsedSources, sink: TimingSink) -> None:
+    write_structs_ndjson(iter_joined_structs(parsed), sink)
+
+
+# Сборка структур и запись: загрузка и парсинг источников одинаковы для обоих способов и не меряются
+def measure(parsed: ParsedSources, write: Callable[[ParsedSources, TimingSink], None]) -> tuple[TimingSink, float, int]:
+    tracemalloc.start()
+
+    try:
+        sink: TimingSink = TimingSink()
+        write(parsed, sink)
+        elapsed: float = time.perf_counter() - sink.started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return sink, elapsed, peak
+
+
+def run_scale(scale: int) -> None:
+    parsed: ParsedSources = parse_all_sources(generate_payloads(scale))
+    print(f"x{scale}:")
+
+    for name, write in (("JSON-массив", write_json_array), ("NDJSON", write_ndjson)):
+        sink, elapsed, peak = measure(parsed, write)
+        print(f"  {name:<12} первые байты через {sink.first_write * 1000:>8.2f} мс, всё – {elapsed * 1000:>8.2f} мс, "
+              f"пик памяти {peak / 1024:>8.0f} КиБ, записано {sink.size / 1024:.0f} КиБ")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Сборка и запись структур: JSON-массив против NDJSON")
+    arg_parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50],
+                            help="Во сколько раз больше реальных объёмов")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+
+    for parsed_scale in parsed_args.scales:
+        run_scale(parsed_scale)
@@ -0,0 +1,99 @@
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from tvgu_structs_parser.index import StructIndex
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.packed import PackedStructs, load_structs, write_packed_structs
+from tvgu_structs_parser.parser import parse_all_sources, join_parsed_sources
+from tvgu_structs_parser.serialization import write_structs, struct_from_dict
+
+from .synthetic import generate_payloads
+
+
+def measure(function: Callable[[], Any], repeats: int) -> tuple[float, Any]:
+    best: float = float("inf")
+    result: Any = None
+
+    for _ in range(repeats):
+        started: float = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+
+    return best, result
+
+
+# Как стартуют воркеры сейчас: читают всю выгрузку и строят индекс
+def load_json_index(json_path: Path) -> StructIndex:
+    records: list[dict[str, Any]] = json.loads(json_path.read_text(encoding="UTF-8"))
+    return StructIndex([struct_from_dict(record) for record in records])
+
+
+def measure_lookups(lookup: Callable[[str], Any], keys: list[str]) -> float:
+    started: float = time.perf_counter()
+
+    for key in keys:
+        lookup(key)
+
+    return (time.perf_counter() - started) / len(keys)
+
+
+def run_scale(scale: int, lookups: int, repeats: int) -> bool:
+    structs: list[TvGUStruct] = join_parsed_sources(parse_all_sources(generate_payloads(scale)))
+    groups: list[str] = [group for struct in structs for group in struct.groups]
+    keys: list[str] = [random.choice(groups) for _ in range(lookups)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path: Path = Path(directory) / "structs.json"
+        packed_path: Path = Path(directory) / "structs.packed"
+        write_structs(structs, json_path)
+        write_packed_structs(structs, packed_path)
+
+        json_time, index = measure(lambda: load_json_index(json_path), repeats)
+        packed_time, packed = measure(lambda: load_structs(packed_path), repeats)
+
+        # Первый поиск после старта: записи ещё не разобраны
+        started: float = time.perf_counter()
+        packed.by_group(keys[0])
+        first_lookup_time: float = time.perf_counter() - started
+
+        index_lookup_time: float = measure_lookups(index.by_group, keys)
+        packed_lookup_time: float = measure_lookups(packed.by_group, keys)
+
+        # Без мемоизации: каждый поиск разбирает запись заново
+        with PackedStructs(packed_path, memo_size=0) as unmemoized:
+            unmemoized_lookup_time: float = measure_lookups(unmemoized.by_group, keys)
+
+        same: bool = all(packed.by_group(key).name == index.by_group(key).name for key in keys[:1000]) \
+            and [struct.departments for struct in packed] == [struct.departments for struct in structs]
+        packed.close()
+
+        print(f"x{scale}: структур {len(structs)}, групп {len(groups)}, "
+              f"JSON {json_path.stat().st_size / 1024:.0f} КиБ, с индексом {packed_path.stat().st_size / 1024:.0f} КиБ")
+
+    print(f"  старт:  JSON + StructIndex {json_time * 1000:>8.2f} мс, load_structs {packed_time * 1000:>8.3f} мс "
+          f"(первый поиск {first_lookup_time * 1000:.3f} мс)")
+    print(f"  поиск:  StructIndex {index_lookup_time * 1e6:>6.2f} мкс, "
+          f"load_structs {packed_lookup_time * 1e6:>6.2f} мкс, "
+          f"без мемоизации {unmemoized_lookup_time * 1e6:>6.2f} мкс; совпадает: {same}")
+
+    return same
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Старт по выгрузке: разбор JSON против файла с индексом (mmap)")
+    arg_parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50],
+                            help="Во сколько раз больше реальных объёмов")
+    arg_parser.add_argument("-n", "--lookups", type=int, default=10_000, help="Количество поисков")
+    arg_parser.add_argument("-r", "--repeats", type=int, default=5, help="Повторов замера старта (берётся лучший)")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+    random.seed(0)
+
+    if not all([run_scale(scale, parsed_args.lookups, parsed_args.repeats) for scale in parsed_args.scales]):
+        sys.exit(1)
@@ -0,0 +1,65 @@
+import argparse
+import time
+from typing import Callable, Any
+
+from tvgu_structs_parser.normalizer import normalize_structs
+from tvgu_structs_parser.parsers.parser_all_groups import parse_all_groups
+from tvgu_structs_parser.parsers.parser_structs import parse_structs_page
+from tvgu_structs_parser.parsers.parser_structs_api import parser_structs_api
+from tvgu_structs_parser.parsers.parser_structs_tversu_page import parse_structs_tversu_page
+from tvgu_structs_parser.snapshots import load_snapshot
+from tvgu_structs_parser.structs_requests import SourcesPayloads
+
+
+def measure(stage: Callable[[], Any], repeats: int) -> tuple[float, Any]:
+    result: Any = None
+    best: float = float("inf")
+
+    for _ in range(repeats):
+        started: float = time.perf_counter()
+        result = stage()
+        best = min(best, time.perf_counter() - started)
+
+    return best, result
+
+
+# Время каждого парсера и нормализации на записанном снимке (см. `python -m tvgu_structs_parser record`)
+def run(snapshot_path: str, repeats: int) -> None:
+    payloads: SourcesPayloads = load_snapshot(snapshot_path)
+
+    structs_page_time, structs_n_departments = measure(
+        lambda: parse_structs_page(payloads.structs_page.text()), repeats
+    )
+    tversu_page_time, structs_tversu = measure(
+        lambda: parse_structs_tversu_page(payloads.structs_tversu_page.text()), repeats
+    )
+    api_time, structs_from_api = measure(lambda: parser_structs_api(payloads.structs_api.json()), repeats)
+    groups_time, structs_from_groups = measure(lambda: parse_all_groups(payloads.all_groups.json()), repeats)
+    normalize_time, _ = measure(
+        lambda: normalize_structs(
+            structs_n_departments["departments"],
+            structs_n_departments["structs"],
+            structs_tversu,
+            structs_from_api,
+            structs_from_groups
+        ),
+        repeats
+    )
+
+    for stage, elapsed in (
+            ("parse_structs_page", structs_page_time),
+            ("parse_structs_tversu_page", tversu_page_time),
+            ("parser_structs_api", api_time),
+            ("parse_all_groups", groups_time),
+            ("normalize_structs", normalize_time),
+    ):
+        print(f"{stage:<28}{elapsed * 1000:>10.2f} мс")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк парсеров на записанном снимке источников")
+    arg_parser.add_argument("snapshot", help="Путь к снимку")
+    arg_parser.add_argument("-n", "--repeats", type=int, default=5, help="Количество повторов (берётся лучшее время)")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+    run(parsed_args.snapshot, parsed_args.repeats)
@@ -0,0 +1,59 @@
+import argparse
+import sys
+import tracemalloc
+from typing import Callable, Any
+
+from tvgu_structs_parser.html_backend import available_backends
+from tvgu_structs_parser.parsers.parser_structs import parse_structs_page
+from tvgu_structs_parser.snapshots import load_snapshot
+
+from .bench_html_backends import as_plain
+from .bench_parsers import measure
+
+
+def measure_peak_memory(stage: Callable[[], Any]) -> int:
+    tracemalloc.start()
+
+    try:
+        stage()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# Полный разбор sveden/struct против разбора только нужных таблиц: время, пиковая память и совпадение результата
+def run(snapshot_path: str, repeats: int) -> bool:
+    structs_page: str = load_snapshot(snapshot_path).structs_page.text()
+    all_equal: bool = True
+
+    for backend in available_backends():
+        results: dict[bool, Any] = {}
+
+        for partial in (False, True):
+            def stage() -> dict[str, list]:
+                return parse_structs_page(structs_page, html_backend=backend, partial=partial)
+
+            elapsed, results[partial] = measure(stage, repeats)
+            peak_memory: int = measure_peak_memory(stage)
+
+            print(f"{backend:<12} {'частичный' if partial else 'полный':<10}"
+                  f"{elapsed * 1000:>9.2f} мс {peak_memory / 1024 / 1024:>9.2f} МиБ")
+
+        equal: bool = as_plain(results[False]) == as_plain(results[True])
+        all_equal = all_equal and equal
+
+        if not equal:
+            print(f"{backend}: РАСХОЖДЕНИЕ результатов полного и частичного разбора")
+
+    return all_equal
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк частичного разбора страницы sveden/struct")
+    arg_parser.add_argument("snapshot", help="Путь к снимку")
+    arg_parser.add_argument("-n", "--repeats", type=int, default=5, help="Количество повторов (берётся лучшее время)")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+
+    if not run(parsed_args.snapshot, parsed_args.repeats):
+        sys.exit(1)
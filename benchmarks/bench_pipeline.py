@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+from tvgu_structs_parser.config import STRUCTS_PAGE_URL, STRUCTS_TVERSU_PAGE_URL, STRUCTS_API_URL, \
+    ALL_GROUPS_API_URL
+from tvgu_structs_parser.parser import create_parse_executor, fetch_and_parse_all_sources, parse_all_sources, \
+    PARSE_EXECUTORS
+from tvgu_structs_parser.snapshots import load_snapshot
+from tvgu_structs_parser.structs_requests import StructsClient, SourcePayload, SourcesPayloads, fetch_all_sources
+from tvgu_structs_parser.timings import PipelineTimings
+
+from .standin_server import StandInServer, StandInClient, Handler
+
+# Задержки ответа, мс: HTML-страницы tversu.ru отвечают заметно дольше API
+DELAYS_MS: dict[str, int] = {
+    STRUCTS_PAGE_URL: 600,
+    STRUCTS_TVERSU_PAGE_URL: 400,
+    STRUCTS_API_URL: 100,
+    ALL_GROUPS_API_URL: 150,
+}
+
+
+def delayed_response(body: bytes, content_type: str, delay_ms: int) -> Handler:
+    async def handler(_: web.Request) -> web.Response:
+        await asyncio.sleep(delay_ms / 1000)
+        return web.Response(body=body, content_type=content_type, charset="utf-8")
+
+    return handler
+
+
+# Старое поведение: дождаться всех загрузок, затем парсить источники по очереди на цикле событий
+async def run_sequential(client: StructsClient) -> PipelineTimings:
+    timings: PipelineTimings = PipelineTimings()
+
+    with timings.measure("fetch all"):
+        payloads: SourcesPayloads = await fetch_all_sources(client)
+
+    with timings.measure("parse all"):
+        parse_all_sources(payloads)
+
+    return timings
+
+
+async def run_pipelined(client: StructsClient, executor_kind: str) -> PipelineTimings:
+    timings: PipelineTimings = PipelineTimings()
+
+    with create_parse_executor(executor_kind) as executor:
+        await fetch_and_parse_all_sources(client, executor, timings)
+
+    return timings
+
+
+async def run(snapshot_path: str, executor_kind: str) -> None:
+    payloads: SourcesPayloads = load_snapshot(snapshot_path)
+    sources: dict[str, tuple[SourcePayload, str]] = {
+        STRUCTS_PAGE_URL: (payloads.structs_page, "text/html"),
+        STRUCTS_TVERSU_PAGE_URL: (payloads.structs_tversu_page, "text/html"),
+        STRUCTS_API_URL: (payloads.structs_api, "application/json"),
+        ALL_GROUPS_API_URL: (payloads.all_groups, "application/json"),
+    }
+
+    server: StandInServer = StandInServer({
+        urlsplit(url).path: delayed_response(payload.body, content_type, DELAYS_MS[url])
+        for url, (payload, content_type) in sources.items()
+    })
+
+    async with server.running(), StandInClient(server) as client:
+        # Прогрев соединений, чтобы не мерить установку TCP
+        await fetch_all_sources(client)
+
+        sequential: PipelineTimings = await run_sequential(client)
+        pipelined: PipelineTimings = await run_pipelined(client, executor_kind)
+
+    print(f"По очереди: {sequential.total * 1000:.1f} мс\n{sequential.format()}\n")
+    print(f"Конвейер ({executor_kind}): {pipelined.total * 1000:.1f} мс\n{pipelined.format()}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк конвейера загрузки и парсинга на сервере-заглушке")
+    arg_parser.add_argument("snapshot", help="Путь к снимку")
+    arg_parser.add_argument("-e", "--executor", choices=tuple(PARSE_EXECUTORS), default="thread",
+                            help="Пул для парсинга HTML-страниц")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+    asyncio.run(run(parsed_args.snapshot, parsed_args.executor))
@@ -0,0 +1,61 @@
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from tvgu_structs_parser.misc import CustomEncoder
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.parser import replay_tvgu_structs
+from tvgu_structs_parser.serialization import serialize_structs, write_structs, is_orjson_available
+
+from .bench_parsers import measure
+
+
+# Старый способ: `json.dump` с `CustomEncoder.default` на каждый датакласс
+def dump_with_custom_encoder(structs: list[TvGUStruct], output_path: Path, prettify: bool) -> None:
+    with open(output_path, "w", encoding="UTF-8") as file:
+        json.dump(structs, file, ensure_ascii=False, indent=2 if prettify else None, cls=CustomEncoder)
+
+
+def run(snapshot_path: str, scale: int, repeats: int, prettify: bool) -> bool:
+    structs: list[TvGUStruct] = replay_tvgu_structs(snapshot_path) * scale
+
+    with tempfile.TemporaryDirectory() as directory:
+        old_path: Path = Path(directory) / "old.json"
+        new_path: Path = Path(directory) / "new.json"
+
+        encode_time, _ = measure(
+            lambda: json.dumps(structs, ensure_ascii=False, indent=2 if prettify else None, cls=CustomEncoder),
+            repeats
+        )
+        serialize_time, _ = measure(lambda: serialize_structs(structs, prettify), repeats)
+        old_dump_time, _ = measure(lambda: dump_with_custom_encoder(structs, old_path, prettify), repeats)
+        new_dump_time, _ = measure(lambda: write_structs(structs, new_path, prettify), repeats)
+
+        same_output: bool = json.loads(old_path.read_bytes()) == json.loads(new_path.read_bytes())
+
+    print(f"Структур: {len(structs)}, orjson: {'да' if is_orjson_available() else 'нет'}")
+    for stage, elapsed in (
+            ("CustomEncoder, в память", encode_time),
+            ("serialize_structs", serialize_time),
+            ("CustomEncoder, в файл", old_dump_time),
+            ("write_structs", new_dump_time),
+    ):
+        print(f"{stage:<28}{elapsed * 1000:>10.2f} мс")
+    print(f"Результат совпадает: {'да' if same_output else 'НЕТ'}")
+
+    return same_output
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк сериализации структур в JSON")
+    arg_parser.add_argument("snapshot", help="Путь к снимку")
+    arg_parser.add_argument("--scale", type=int, default=100, help="Во сколько раз размножить структуры")
+    arg_parser.add_argument("-n", "--repeats", type=int, default=5, help="Количество повторов (берётся лучшее время)")
+    arg_parser.add_argument("-p", "--prettify", action="store_true", help="С отступами")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+
+    if not run(parsed_args.snapshot, parsed_args.scale, parsed_args.repeats, parsed_args.prettify):
+        sys.exit(1)
@@ -0,0 +1,96 @@
+import argparse
+import dataclasses
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.parser import parse_all_sources, join_parsed_sources
+from tvgu_structs_parser.serialization import write_structs
+from tvgu_structs_parser.sqlite_export import SqliteExportStats, export_structs_sqlite, connect_structs_db, \
+    select_departments, select_struct_by_group
+
+from .synthetic import generate_payloads
+
+
+def measure(function: Callable[[], Any], repeats: int) -> tuple[float, Any]:
+    best: float = float("inf")
+    result: Any = None
+
+    for _ in range(repeats):
+        started: float = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+
+    return best, result
+
+
+# Как сейчас отвечают сервисы: читают всю выгрузку и перебирают её
+def departments_from_json(json_path: Path, struct_name: str) -> list[dict[str, Any]]:
+    structs: list[dict[str, Any]] = json.loads(json_path.read_text(encoding="UTF-8"))
+    return next(struct["departments"] for struct in structs if struct["name"] == struct_name)
+
+
+def struct_by_group_from_json(json_path: Path, group: str) -> Optional[dict[str, Any]]:
+    structs: list[dict[str, Any]] = json.loads(json_path.read_text(encoding="UTF-8"))
+    return next((struct for struct in structs if group in struct["groups"]), None)
+
+
+def run_scale(scale: int, repeats: int) -> None:
+    structs: list[TvGUStruct] = join_parsed_sources(parse_all_sources(generate_payloads(scale)))
+    struct_name: str = structs[-1].name
+    group: str = structs[-1].groups[-1]
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path: Path = Path(directory) / "structs.json"
+        db_path: Path = Path(directory) / "structs.sqlite"
+        write_structs(structs, json_path)
+
+        def export_from_scratch() -> SqliteExportStats:
+            db_path.unlink(missing_ok=True)
+            return export_structs_sqlite(structs, db_path)
+
+        full_time, _ = measure(export_from_scratch, repeats)
+        unchanged_time, unchanged = measure(lambda: export_structs_sqlite(structs, db_path), repeats)
+
+        changed_structs: list[TvGUStruct] = [dataclasses.replace(structs[0], email="new@tversu.ru"), *structs[1:]]
+        export_structs_sqlite(structs, db_path)
+        changed_time, changed = measure(lambda: export_structs_sqlite(changed_structs, db_path), 1)
+
+        json_departments_time, _ = measure(lambda: departments_from_json(json_path, struct_name), repeats)
+        json_group_time, _ = measure(lambda: struct_by_group_from_json(json_path, group), repeats)
+
+        connection: sqlite3.Connection = connect_structs_db(db_path)
+
+        try:
+            db_departments_time, departments = measure(lambda: select_departments(connection, struct_name), repeats)
+            db_group_time, struct = measure(lambda: select_struct_by_group(connection, group), repeats)
+        finally:
+            connection.close()
+
+        assert len(departments) == len(structs[-1].departments) and struct["name"] == struct_name
+
+        print(f"x{scale}: структур {len(structs)}, JSON {json_path.stat().st_size / 1024:.0f} КиБ, "
+              f"SQLite {db_path.stat().st_size / 1024:.0f} КиБ")
+
+    print(f"  выгрузка в SQLite с нуля:         {full_time * 1000:>9.2f} мс")
+    print(f"  повторная, без изменений:         {unchanged_time * 1000:>9.2f} мс ({unchanged})")
+    print(f"  повторная, одна структура:        {changed_time * 1000:>9.2f} мс ({changed})")
+    print(f"  кафедры структуры: JSON / SQLite  {json_departments_time * 1000:>9.2f} / "
+          f"{db_departments_time * 1000:.3f} мс")
+    print(f"  структура группы:  JSON / SQLite  {json_group_time * 1000:>9.2f} / {db_group_time * 1000:.3f} мс")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Выгрузка в SQLite и запросы к ней против разбора JSON")
+    arg_parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50],
+                            help="Во сколько раз больше реальных объёмов")
+    arg_parser.add_argument("-n", "--repeats", type=int, default=5, help="Повторов на замер (берётся лучший)")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+
+    for parsed_scale in parsed_args.scales:
+        run_scale(parsed_scale, parsed_args.repeats)
@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import sys
+import time
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+from tvgu_structs_parser.config import STRUCTS_PAGE_URL, STRUCTS_TVERSU_PAGE_URL, STRUCTS_API_URL, \
+    ALL_GROUPS_API_URL
+from tvgu_structs_parser.last_good import LastGoodStore
+from tvgu_structs_parser.parser import StaleOkStructs, get_all_tvgu_structs, get_tvgu_structs_stale_ok, \
+    create_parse_executor
+from tvgu_structs_parser.snapshots import load_snapshot
+from tvgu_structs_parser.structs_requests import SourcesPayloads, SourcePayload, FetchPolicy
+
+from .standin_server import StandInServer, StandInClient, Handler
+
+FRESH_WAIT_SECONDS: float = 0.5
+
+
+# Задержку источника можно менять между прогонами
+class SwitchableDelay:
+    def __init__(self, body: bytes, content_type: str) -> None:
+        self.body: bytes = body
+        self.content_type: str = content_type
+        self.delay: float = 0.0
+
+    async def __call__(self, _: web.Request) -> web.Response:
+        await asyncio.sleep(self.delay)
+        return web.Response(body=self.body, content_type=self.content_type, charset="utf-8")
+
+
+async def run(snapshot_path: str, slow_seconds: float) -> bool:
+    payloads: SourcesPayloads = load_snapshot(snapshot_path)
+    sources: dict[str, tuple[SourcePayload, str]] = {
+        STRUCTS_PAGE_URL: (payloads.structs_page, "text/html"),
+        STRUCTS_TVERSU_PAGE_URL: (payloads.structs_tversu_page, "text/html"),
+        STRUCTS_API_URL: (payloads.structs_api, "application/json"),
+        ALL_GROUPS_API_URL: (payloads.all_groups, "application/json"),
+    }
+    handlers: dict[str, SwitchableDelay] = {
+        url: SwitchableDelay(payload.body, content_type) for url, (payload, content_type) in sources.items()
+    }
+    routes: dict[str, Handler] = {urlsplit(url).path: handler for url, handler in handlers.items()}
+    server: StandInServer = StandInServer(routes)
+    # Свежими считаются только данные этого прогона, чтобы каждый прогон ходил на сервер
+    store: LastGoodStore = LastGoodStore(fresh_seconds=0)
+    policy: FetchPolicy = FetchPolicy(read_timeout=slow_seconds * 2, read_timeouts={})
+
+    async with server.running(), StandInClient(server, fetch_policy=policy) as client:
+        with create_parse_executor() as executor:
+            await get_tvgu_structs_stale_ok(client, executor, store, fresh_wait=FRESH_WAIT_SECONDS)
+
+            handlers[ALL_GROUPS_API_URL].delay = slow_seconds
+
+            started: float = time.perf_counter()
+            await get_all_tvgu_structs(client=client, executor=executor)
+            plain_elapsed: float = time.perf_counter() - started
+
+            started = time.perf_counter()
+            stale: StaleOkStructs = await get_tvgu_structs_stale_ok(
+                client, executor, store, fresh_wait=FRESH_WAIT_SECONDS
+            )
+            stale_elapsed: float = time.perf_counter() - started
+
+            refreshed: dict[str, bool] = await store.wait_pending()
+            handlers[ALL_GROUPS_API_URL].delay = 0.0
+            fresh: StaleOkStructs = await get_tvgu_structs_stale_ok(
+                client, executor, store, fresh_wait=FRESH_WAIT_SECONDS
+            )
+
+    print(f"Медленный источник all_groups ({slow_seconds * 1000:.0f} мс)")
+    print(f"  get_all_tvgu_structs:       {plain_elapsed * 1000:>8.1f} мс")
+    print(f"  get_tvgu_structs_stale_ok:  {stale_elapsed * 1000:>8.1f} мс, "
+          f"устаревшие источники: {sorted(stale.stale_sources)}, структур: {len(stale.structs)}")
+    print(f"  фоновая загрузка: {refreshed}")
+    print(f"  следующий прогон: устаревшие источники: {sorted(fresh.stale_sources)}, структур: {len(fresh.structs)}")
+
+    return stale_elapsed < plain_elapsed and set(stale.stale_sources) == {"all_groups"} \
+        and all(refreshed.values()) and not fresh.stale_sources and len(stale.structs) == len(fresh.structs)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Устаревшие данные вместо медленного источника на заглушке")
+    arg_parser.add_argument("snapshot", help="Путь к снимку")
+    arg_parser.add_argument("--slow", type=float, default=3.0, help="Задержка медленного источника, с")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+
+    if not asyncio.run(run(parsed_args.snapshot, parsed_args.slow)):
+        sys.exit(1)
@@ -0,0 +1,132 @@
+import asyncio
+import socket
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Awaitable, Any
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+from aiohttp import web
+from aiohttp.abc import AbstractResolver, ResolveResult
+
+from tvgu_structs_parser.config import STREAM_CHUNK_SIZE
+from tvgu_structs_parser.structs_requests import StructsClient, SourcePayload
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+# Локальная замена tversu.ru: отдаёт заранее заданные ответы и считает TCP-соединения
+class StandInServer:
+    def __init__(self, routes: dict[str, Handler]) -> None:
+        self.routes: dict[str, Handler] = routes
+        self.connections: set[object] = set()
+        self.requests_count: int = 0
+        self.port: int = 0
+        self.base_url: str = ""
+
+    @web.middleware
+    async def _count(self, request: web.Request, handler: Handler) -> web.StreamResponse:
+        self.connections.add(request.transport)
+        self.requests_count += 1
+        return await handler(request)
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    # Та же ссылка, но на этот сервер: хост остаётся в URL и в заголовке Host, меняются схема и порт.
+    # Запрашивать через `local_session`
+    def host_url(self, url: str) -> str:
+        parts = urlsplit(url if "://" in url else f"https://{url}")
+        return urlunsplit(("http", f"{parts.hostname}:{self.port}", parts.path or "/", parts.query, ""))
+
+    def reset_counters(self) -> None:
+        self.connections.clear()
+        self.requests_count = 0
+
+    @asynccontextmanager
+    async def running(self) -> AsyncIterator["StandInServer"]:
+        app: web.Application = web.Application(middlewares=[self._count])
+
+        for path, handler in self.routes.items():
+            app.router.add_get(path, handler)
+
+        runner: web.AppRunner = web.AppRunner(app)
+        await runner.setup()
+        site: web.TCPSite = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+
+        self.port = runner.addresses[0][1]
+        self.base_url = f"http://127.0.0.1:{self.port}"
+
+        try:
+            yield self
+        finally:
+            await runner.cleanup()
+
+
+def static_response(body: bytes, content_type: str) -> Handler:
+    async def handler(_: web.Request) -> web.Response:
+        return web.Response(body=body, content_type=content_type, charset="utf-8")
+
+    return handler
+
+
+# Первые `failures` запросов получают `status`, дальше отвечает `handler`
+def failing_response(handler: Handler, failures: int, status: int = 503) -> Handler:
+    remaining: list[int] = [failures]
+
+    async def failing_handler(request: web.Request) -> web.StreamResponse:
+        if remaining[0] > 0:
+            remaining[0] -= 1
+            return web.Response(status=status)
+        return await handler(request)
+
+    return failing_handler
+
+
+# Каждый `every`-й запрос задерживается на `delay_ms` (`every=1` – все)
+def slow_response(handler: Handler, delay_ms: int, every: int = 1) -> Handler:
+    counter: list[int] = [0]
+
+    async def slow_handler(request: web.Request) -> web.StreamResponse:
+        counter[0] += 1
+
+        if counter[0] % every == 0:
+            await asyncio.sleep(delay_ms / 1000)
+        return await handler(request)
+
+    return slow_handler
+
+
+# Любой хост – это 127.0.0.1: запросы на разные хосты приходят на один сервер-заглушку
+class LocalResolver(AbstractResolver):
+    async def resolve(
+            self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[ResolveResult]:
+        return [ResolveResult(hostname=host, host="127.0.0.1", port=port, family=socket.AF_INET, proto=0,
+                              flags=socket.AI_NUMERICHOST)]
+
+    async def close(self) -> None:
+        pass
+
+
+def local_session(limit: int = 100, limit_per_host: int = 0) -> aiohttp.ClientSession:
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(resolver=LocalResolver(), limit=limit, limit_per_host=limit_per_host)
+    )
+
+
+# Клиент, который вместо tversu.ru ходит на локальный сервер-заглушку
+class StandInClient(StructsClient):
+    def __init__(self, server: StandInServer, **client_kwargs: Any) -> None:
+        super().__init__(**client_kwargs)
+        self.server: StandInServer = server
+
+    def _local_url(self, url: str) -> str:
+        return self.server.url(urlsplit(url).path)
+
+    async def fetch(self, url: str) -> SourcePayload:
+        return await super().fetch(self._local_url(url))
+
+    async def stream(self, url: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        async for chunk in super().stream(self._local_url(url), chunk_size):
+            yield chunk
@@ -0,0 +1,185 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Any, Optional
+
+from tvgu_structs_parser.field_normalizer import FIELD_NORMALIZER
+from tvgu_structs_parser.normalizer import normalize_structs
+from tvgu_structs_parser.parsers.parser_all_groups import parse_all_groups
+from tvgu_structs_parser.parsers.parser_structs import parse_structs_page
+from tvgu_structs_parser.parsers.parser_structs_api import parser_structs_api
+from tvgu_structs_parser.parsers.parser_structs_tversu_page import parse_structs_tversu_page
+from tvgu_structs_parser.serialization import serialize_structs
+from tvgu_structs_parser.snapshots import load_snapshot
+from tvgu_structs_parser.structs_requests import SourcesPayloads
+
+from .synthetic import generate_payloads
+
+DEFAULT_SCALES: tuple[int, ...] = (1, 10, 100)
+# Во сколько раз этап может стать медленнее (или прожорливее) базового замера, прежде чем это считается регрессией
+DEFAULT_THRESHOLD: float = 0.25
+# Меньше этого время не сравнивается: шум таймера
+MIN_COMPARED_SECONDS: float = 0.001
+
+
+@dataclass(frozen=True, kw_only=True)
+class StageResult:
+    seconds: float
+    peak_bytes: int
+
+
+Stage = Callable[[], Any]
+
+
+def measure_stage(stage: Stage, repeats: int) -> tuple[StageResult, Any]:
+    best: float = float("inf")
+    result: Any = None
+
+    for _ in range(repeats):
+        # Мемоизация полей иначе ускорит все повторы после первого
+        FIELD_NORMALIZER.clear_memo()
+        started: float = time.perf_counter()
+        result = stage()
+        best = min(best, time.perf_counter() - started)
+
+    FIELD_NORMALIZER.clear_memo()
+    tracemalloc.start()
+
+    try:
+        stage()
+        peak: int = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return StageResult(seconds=best, peak_bytes=peak), result
+
+
+# Все этапы по очереди: результат каждого нужен следующему
+def run_dataset(payloads: SourcesPayloads, repeats: int) -> dict[str, StageResult]:
+    results: dict[str, StageResult] = {}
+
+    results["parse_structs_page"], structs_n_departments = measure_stage(
+        lambda: parse_structs_page(payloads.structs_page.text()), repeats
+    )
+    results["parse_structs_tversu_page"], structs_tversu = measure_stage(
+        lambda: parse_structs_tversu_page(payloads.structs_tversu_page.text()), repeats
+    )
+    results["parser_structs_api"], structs_from_api = measure_stage(
+        lambda: parser_structs_api(payloads.structs_api.json()), repeats
+    )
+    results["parse_all_groups"], structs_from_groups = measure_stage(
+        lambda: parse_all_groups(payloads.all_groups.json()), repeats
+    )
+    results["normalize_structs"], structs = measure_stage(
+        lambda: normalize_structs(
+            structs_n_departments["departments"],
+            structs_n_departments["structs"],
+            structs_tversu,
+            structs_from_api,
+            structs_from_groups
+        ),
+        repeats
+    )
+    results["serialize_structs"], _ = measure_stage(lambda: serialize_structs(structs), repeats)
+
+    return results
+
+
+def collect_datasets(snapshots: list[str], scales: list[int]) -> dict[str, Callable[[], SourcesPayloads]]:
+    datasets: dict[str, Callable[[], SourcesPayloads]] = {}
+
+    for snapshot in snapshots:
+        datasets[f"snapshot:{Path(snapshot).name}"] = lambda snapshot_path=snapshot: load_snapshot(snapshot_path)
+
+    for scale in scales:
+        datasets[f"synthetic:x{scale}"] = lambda payloads_scale=scale: generate_payloads(payloads_scale)
+
+    return datasets
+
+
+def find_regressions(
+        results: dict[str, dict[str, StageResult]],
+        baseline: dict[str, dict[str, dict]],
+        threshold: float
+) -> list[str]:
+    regressions: list[str] = []
+
+    for dataset, stages in results.items():
+        for stage, result in stages.items():
+            base: Optional[dict] = baseline.get(dataset, {}).get(stage)
+
+            if base is None:
+                continue
+
+            if result.seconds > MIN_COMPARED_SECONDS and result.seconds > base["seconds"] * (1 + threshold):
+                regressions.append(f"{dataset} / {stage}: время {base['seconds'] * 1000:.2f} → "
+                                   f"{result.seconds * 1000:.2f} мс")
+            if result.peak_bytes > base["peak_bytes"] * (1 + threshold):
+                regressions.append(f"{dataset} / {stage}: пик памяти {base['peak_bytes'] / 1024:.0f} → "
+                                   f"{result.peak_bytes / 1024:.0f} КиБ")
+
+    return regressions
+
+
+def print_results(dataset: str, stages: dict[str, StageResult]) -> None:
+    print(dataset)
+
+    for stage, result in stages.items():
+        print(f"  {stage:<28}{result.seconds * 1000:>10.2f} мс {result.peak_bytes / 1024 / 1024:>10.2f} МиБ")
+
+
+def run(
+        snapshots: list[str],
+        scales: list[int],
+        repeats: int,
+        baseline_path: Optional[str],
+        save_baseline_path: Optional[str],
+        threshold: float
+) -> bool:
+    results: dict[str, dict[str, StageResult]] = {}
+
+    for dataset, load_payloads in collect_datasets(snapshots, scales).items():
+        results[dataset] = run_dataset(load_payloads(), repeats)
+        print_results(dataset, results[dataset])
+
+    if save_baseline_path is not None:
+        Path(save_baseline_path).write_text(json.dumps(
+            {dataset: {stage: asdict(result) for stage, result in stages.items()} for dataset, stages in results.items()},
+            ensure_ascii=False,
+            indent=2
+        ), encoding="UTF-8")
+        print(f"Базовые замеры сохранены в {save_baseline_path}")
+
+    if baseline_path is None:
+        return True
+
+    regressions: list[str] = find_regressions(
+        results, json.loads(Path(baseline_path).read_text(encoding="UTF-8")), threshold
+    )
+
+    for regression in regressions:
+        print(f"РЕГРЕССИЯ {regression}")
+
+    return not regressions
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк всех этапов на снимках и синтетических данных")
+    arg_parser.add_argument("snapshots", nargs="*", help="Записанные снимки (см. `python -m tvgu_structs_parser record`)")
+    arg_parser.add_argument("--scales", type=int, nargs="*", default=list(DEFAULT_SCALES),
+                            help="Масштабы синтетических данных относительно реальных объёмов")
+    arg_parser.add_argument("-n", "--repeats", type=int, default=3, help="Количество повторов (берётся лучшее время)")
+    arg_parser.add_argument("--baseline", help="Файл базовых замеров для сравнения")
+    arg_parser.add_argument("--save-baseline", help="Сохранить замеры как базовые в файл")
+    arg_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help="Допустимое ухудшение относительно базы (0.25 – на 25%%)")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+
+    if not run(parsed_args.snapshots, parsed_args.scales, parsed_args.repeats, parsed_args.baseline,
+               parsed_args.save_baseline, parsed_args.threshold):
+        sys.exit(1)
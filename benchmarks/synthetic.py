@@ -0,0 +1,142 @@
+import argparse
+import json
+from html import escape
+from pathlib import Path
+
+from tvgu_structs_parser.cache import get_payload_digest
+from tvgu_structs_parser.config import STRUCTS_PAGE_URL, STRUCTS_TVERSU_PAGE_URL, STRUCTS_API_URL, ALL_GROUPS_API_URL
+from tvgu_structs_parser.snapshots import save_snapshot
+from tvgu_structs_parser.structs_requests import SourcePayload, SourcesPayloads
+
+# Реальные объёмы источников (снимок 2026-01): x1 примерно им и соответствует
+STRUCTS_COUNT: int = 14
+DEPARTMENTS_COUNT: int = 61
+GROUPS_COUNT: int = 548
+
+BOSSES: tuple[str, ...] = ("Иванов Иван Иванович", "Петрова Мария Сергеевна", "Сидоров-Белый Пётр Андреевич")
+JOBS: tuple[str, ...] = ("Зав. кафедрой", "Декан, Зав. кафедрой", "И. о. заведующего кафедрой; Профессор")
+ADDRESSES: tuple[str, ...] = (
+    "170100, Центральный федеральный округ, Тверская область, г. Тверь, ул. Желябова, д. 33",
+    "170002, Тверская область, г. Тверь, пр-т Чайковского, д. 70",
+    "170021, Тверская область, г. Тверь, ул. 2-я Грибоедова, д. 22",
+)
+PHONES: tuple[str, ...] = ("+7 (4822) 58-11-22 доб. 123", "+7 (4822) 34-24-36, +7 (4822) 52-09-79", "нет")
+
+
+def struct_name(index: int) -> str:
+    kind: str = "Факультет" if index % 2 == 0 else "Институт"
+    return f"{kind} синтетических данных №{index + 1}"
+
+
+def struct_code(index: int) -> str:
+    return f"СД{index + 1}"
+
+
+def html_payload(url: str, markup: str) -> SourcePayload:
+    body: bytes = markup.encode()
+    return SourcePayload(url=url, body=body, charset="UTF-8", digest=get_payload_digest(body))
+
+
+def json_payload(url: str, data: dict) -> SourcePayload:
+    body: bytes = json.dumps(data, ensure_ascii=False).encode()
+    return SourcePayload(url=url, body=body, charset="UTF-8", digest=get_payload_digest(body))
+
+
+def table(title: str, rows: list[str]) -> str:
+    return f"<h4>{escape(title)}</h4><table><thead><tr><th>Наименование</th></tr></thead>" \
+           f"<tbody>{''.join(rows)}</tbody></table>"
+
+
+def cell(itemprop: str, text: str) -> str:
+    return f'<td itemprop="{itemprop}">{escape(text)}</td>'
+
+
+def generate_structs_page(structs_count: int, departments_count: int) -> str:
+    structs_rows: list[str] = []
+    departments_rows: list[str] = []
+
+    for index in range(structs_count):
+        structs_rows.append(
+            '<tr itemprop="structOrgUprav">'
+            + cell("name", struct_name(index))
+            + cell("fio", BOSSES[index % len(BOSSES)])
+            + cell("addressStr", ADDRESSES[index % len(ADDRESSES)])
+            + cell("site", f"https://sd{index + 1}.tversu.ru")
+            + cell("email", f"sd{index + 1}@tversu.ru")
+            + '<td itemprop="divisionClauseDocLink">нет</td>'
+            + f"<td>{escape(PHONES[index % len(PHONES)])}</td></tr>"
+        )
+
+    for struct_index in range(structs_count):
+        departments_rows.append(f'<tr><td colspan="8">{escape(struct_name(struct_index))}</td></tr>')
+
+        # Кафедры распределяются по структурам поровну, остаток – первым структурам
+        for number in range(departments_count // structs_count + (struct_index < departments_count % structs_count)):
+            department_index: int = struct_index * 1000 + number
+            departments_rows.append(
+                '<tr itemprop="structOrgUprav">'
+                + cell("name", f"Кафедра синтетики №{department_index}")
+                + cell("fio", BOSSES[department_index % len(BOSSES)])
+                + cell("post", JOBS[department_index % len(JOBS)])
+                + cell("addressStr", ADDRESSES[department_index % len(ADDRESSES)])
+                + cell("site", "нет" if number % 2 else f"https://k{department_index}.tversu.ru")
+                + cell("email", f"k{department_index}@tversu.ru")
+                + f'<td itemprop="divisionClauseDocLink"><a href="/docs/{department_index}.pdf">Положение</a></td>'
+                + f"<td>{escape(PHONES[department_index % len(PHONES)])}</td></tr>"
+            )
+
+    return (
+        "<html><head><title>Структура</title></head><body><nav>" + "<a href='#'>Меню</a>" * 200 + "</nav>"
+        + table("Органы управления", ["<tr><td>Учёный совет</td></tr>"])
+        + table("Факультеты и институты", structs_rows)
+        + table("Кафедры", departments_rows)
+        + table("Филиалы", ["<tr><td>нет</td></tr>"])
+        + "<footer>" + "<p>Подвал</p>" * 200 + "</footer></body></html>"
+    )
+
+
+def generate_structs_tversu_page(structs_count: int) -> str:
+    blocks: list[str] = []
+
+    for index in range(structs_count):
+        blocks.append(
+            f"<h4>{escape(struct_name(index))}</h4>"
+            f"<p>{'Описание подразделения с историей и направлениями подготовки. ' * 10}</p>"
+            f'<figure class="media"><oembed url="https://video.example/{index}"></oembed></figure>'
+            "<ul>"
+            f"<li>Адрес: {escape(ADDRESSES[index % len(ADDRESSES)])}</li>"
+            f"<li>Сайт: https://sd{index + 1}.tversu.ru/</li>"
+            f"<li>Электронная почта: sd{index + 1}@tversu.ru</li>"
+            "<li>Телефон: +7 (4822) 58-11-22 доб. 123</li>"
+            "</ul>"
+        )
+
+    return f'<html><body><div class="tvsu-ck-content">{"".join(blocks)}</div></body></html>'
+
+
+def generate_payloads(scale: int) -> SourcesPayloads:
+    structs_count: int = STRUCTS_COUNT * scale
+    departments_count: int = DEPARTMENTS_COUNT * scale
+    groups_count: int = GROUPS_COUNT * scale
+
+    return SourcesPayloads(
+        structs_page=html_payload(STRUCTS_PAGE_URL, generate_structs_page(structs_count, departments_count)),
+        structs_tversu_page=html_payload(STRUCTS_TVERSU_PAGE_URL, generate_structs_tversu_page(structs_count)),
+        structs_api=json_payload(STRUCTS_API_URL, {"data": [
+            {"facultyName": struct_name(index), "facultyShort": struct_code(index)} for index in range(structs_count)
+        ]}),
+        all_groups=json_payload(ALL_GROUPS_API_URL, {"groups": [
+            {"facultyName": struct_name(index % structs_count),
+             "groupName": f"{struct_code(index % structs_count)}-{index // structs_count + 11}"}
+            for index in range(groups_count)
+        ]}),
+    )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Синтетический снимок источников в заданном масштабе")
+    arg_parser.add_argument("snapshots_directory", help="Куда сохранить снимок")
+    arg_parser.add_argument("--scale", type=int, default=1, help="Во сколько раз больше реальных объёмов")
+
+    parsed_args: argparse.Namespace = arg_parser.parse_args()
+    print(save_snapshot(generate_payloads(parsed_args.scale), Path(parsed_args.snapshots_directory)))
@@ -0,0 +1,42 @@
+from pathlib import Path
+from typing import Any
+
+from tvgu_structs_parser.archive import StructsArchive, ArchivePutStats
+from tvgu_structs_parser.diff import load_structs_dump
+from tvgu_structs_parser.serialization import struct_from_dict
+
+DUMPS_DIRECTORY: Path = Path(__file__).resolve().parents[1] / "parsed_structs"
+DUMP_PATH: Path = DUMPS_DIRECTORY / "structs-2026-01-10.json"
+
+
+def test_same_structs_after_imported_dump_add_no_records(tmp_path: Path) -> None:
+    archive: StructsArchive = StructsArchive(tmp_path)
+    imported: list[ArchivePutStats] = archive.import_dumps(DUMPS_DIRECTORY)
+    records: list[dict[str, Any]] = load_structs_dump(DUMP_PATH)
+
+    stats: ArchivePutStats = archive.put("2026-01-11", [struct_from_dict(record) for record in records])
+
+    assert imported[0].new_records > 0
+    assert stats.new_records == 0
+    assert all(len(archive.history(record["name"])) == 1 for record in records)
+
+
+def test_reimport_of_same_records_adds_no_records(tmp_path: Path) -> None:
+    archive: StructsArchive = StructsArchive(tmp_path)
+    archive.import_dumps(DUMPS_DIRECTORY)
+
+    stats: ArchivePutStats = archive.put_records("2026-01-11", load_structs_dump(DUMP_PATH))
+
+    assert stats.new_records == 0
+
+
+# Выгрузки прошлых версий могли содержать поля, которых у `TvGUStruct` уже нет
+def test_unknown_fields_do_not_change_hashes(tmp_path: Path) -> None:
+    archive: StructsArchive = StructsArchive(tmp_path)
+    archive.import_dumps(DUMPS_DIRECTORY)
+    records: list[dict[str, Any]] = [{**record, "stale_sources": []} for record in load_structs_dump(DUMP_PATH)]
+
+    stats: ArchivePutStats = archive.put_records("2026-01-11", records)
+
+    assert stats.new_records == 0
+    assert archive.get("2026-01-11") == archive.get("2026-01-10")
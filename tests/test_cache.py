@@ -0,0 +1,47 @@
+from dataclasses import make_dataclass
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from tvgu_structs_parser import cache
+from tvgu_structs_parser.cache import SourceCache, get_payload_digest, get_records_fingerprint, get_parsed_fingerprint
+from tvgu_structs_parser.config import PARSER_VERSION
+
+URL: str = "https://tversu.ru/sveden/struct/"
+BODY: bytes = "<html>Структура</html>".encode()
+
+
+@pytest.fixture
+def source_cache(tmp_path: Path) -> SourceCache:
+    source_cache: SourceCache = SourceCache(tmp_path)
+    source_cache.put(URL, BODY, etag='"1"', last_modified=None, charset="utf-8")
+    source_cache.put_parsed(URL, get_payload_digest(BODY), ["разобрано"])
+    return source_cache
+
+
+def test_parsed_result_is_reused_for_same_body(source_cache: SourceCache) -> None:
+    assert source_cache.get_parsed(URL, get_payload_digest(BODY)) == ["разобрано"]
+
+
+# Тело то же, но парсеры или их датаклассы изменились: сохранённый результат не годится
+def test_changed_fingerprint_is_cache_miss(source_cache: SourceCache, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cache, "get_parsed_fingerprint", lambda: "другие-парсеры")
+    parsed: list[Any] = []
+
+    assert source_cache.get_parsed(URL, get_payload_digest(BODY)) is None
+    assert source_cache.get_or_parse(URL, get_payload_digest(BODY), lambda: parsed) is parsed
+    assert source_cache.stats.parsed_misses == 1
+
+
+def test_fingerprint_follows_parser_version_and_fields() -> None:
+    record: type = make_dataclass("Record", [("name", str), ("code", str)])
+    reordered: type = make_dataclass("Record", [("code", str), ("name", str)])
+    retyped: type = make_dataclass("Record", [("name", str), ("code", int)])
+    fingerprint: str = get_records_fingerprint(PARSER_VERSION, (record,))
+
+    assert get_records_fingerprint(PARSER_VERSION, (record,)) == fingerprint
+    assert get_records_fingerprint(PARSER_VERSION + 1, (record,)) != fingerprint
+    assert get_records_fingerprint(PARSER_VERSION, (reordered,)) != fingerprint
+    assert get_records_fingerprint(PARSER_VERSION, (retyped,)) != fingerprint
+    assert get_parsed_fingerprint() == get_parsed_fingerprint()
@@ -0,0 +1,54 @@
+import dataclasses
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.synthetic import generate_payloads
+from tvgu_structs_parser.snapshots import save_snapshot
+from tvgu_structs_parser.structs_requests import SourcesPayloads, SourcePayload
+
+PACKAGE_ROOT: Path = Path(__file__).resolve().parents[1]
+
+
+# Снимок, на котором парсер предупреждает о неожиданном заголовке таблицы органов управления
+def save_snapshot_with_warning(directory: Path) -> Path:
+    payloads: SourcesPayloads = generate_payloads(1)
+    structs_page: SourcePayload = payloads.structs_page
+    body: bytes = structs_page.body.replace("Органы управления".encode(), "Управление".encode(), 1)
+
+    return save_snapshot(
+        dataclasses.replace(payloads, structs_page=dataclasses.replace(structs_page, body=body)), directory
+    )
+
+
+def run_cli(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "tvgu_structs_parser", *args],
+        cwd=PACKAGE_ROOT, capture_output=True, check=True,
+    )
+
+
+# stdout – канал данных: предупреждения уходят в stderr и не рвут поток NDJSON
+def test_warnings_do_not_mix_into_ndjson_stdout(tmp_path: Path) -> None:
+    snapshot_path: Path = save_snapshot_with_warning(tmp_path)
+
+    result: subprocess.CompletedProcess = run_cli("replay", "-s", str(snapshot_path), "-f", "ndjson", "-w")
+    lines: list[bytes] = result.stdout.splitlines()
+
+    assert "Неожиданный заголовок".encode() in result.stderr
+    assert lines
+    assert all(isinstance(json.loads(line), dict) for line in lines)
+
+
+# То же для разницы с прошлой выгрузкой: stdout можно перенаправить в файл и получить валидный JSON
+def test_warnings_do_not_mix_into_diff_stdout(tmp_path: Path) -> None:
+    snapshot_path: Path = save_snapshot_with_warning(tmp_path / "snapshots")
+    previous_dump: Path = PACKAGE_ROOT / "parsed_structs" / "structs-2026-01-10.json"
+
+    result: subprocess.CompletedProcess = run_cli(
+        "replay", "-s", str(snapshot_path), "-d", str(previous_dump), "-w"
+    )
+
+    assert "Неожиданный заголовок".encode() in result.stderr
+    assert set(json.loads(result.stdout)) >= {"structs", "departments"}
@@ -0,0 +1,84 @@
+import copy
+import dataclasses
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from tvgu_structs_parser.diff import StructsPatch, diff_structs, load_structs_dump
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.parsers.parser_structs import Department
+from tvgu_structs_parser.serialization import struct_from_dict
+from tvgu_structs_parser.sqlite_export import export_structs_sqlite, connect_structs_db, select_departments
+
+DUMP_PATH: Path = Path(__file__).resolve().parents[1] / "parsed_structs" / "structs-2026-01-10.json"
+
+
+def load_structs() -> tuple[list[dict[str, Any]], list[TvGUStruct]]:
+    records: list[dict[str, Any]] = load_structs_dump(DUMP_PATH)
+    return records, [struct_from_dict(record) for record in records]
+
+
+def test_round_trip_of_dump_is_empty() -> None:
+    records, structs = load_structs()
+
+    assert diff_structs(records, structs).is_empty()
+
+
+# Выгрузки прошлых версий могли содержать поля, которых у `TvGUStruct` уже нет
+def test_unknown_fields_are_not_changes() -> None:
+    records, structs = load_structs()
+
+    assert diff_structs([{**record, "stale_sources": []} for record in records], structs).is_empty()
+
+
+def test_changed_department_is_reported() -> None:
+    records, structs = load_structs()
+    previous: list[dict[str, Any]] = copy.deepcopy(records)
+    previous[0]["departments"][0]["email"] = "old@tversu.ru"
+
+    patch: StructsPatch = diff_structs(previous, structs)
+
+    assert patch.structs.is_empty()
+    assert [department["name"] for department in patch.departments.changed] == [records[0]["departments"][0]["name"]]
+
+
+def test_duplicate_keys_are_reported_instead_of_raising() -> None:
+    records, structs = load_structs()
+    previous: list[dict[str, Any]] = copy.deepcopy(records)
+    previous[0]["departments"].append(copy.deepcopy(previous[0]["departments"][0]))
+    previous.append({**copy.deepcopy(previous[1]), "departments": []})
+
+    patch: StructsPatch = diff_structs(previous, structs)
+
+    assert patch.structs.duplicates == [{"name": records[1]["name"]}]
+    assert patch.departments.duplicates == [
+        {"struct_name": records[0]["departments"][0]["struct_name"], "name": records[0]["departments"][0]["name"]}
+    ]
+    assert patch.is_empty()
+
+
+# Те же повторы – данные источника и для выгрузки в SQLite: остаются последние записи, отброшенные считаются
+def test_duplicate_keys_are_exported_to_sqlite(tmp_path: Path) -> None:
+    _, structs = load_structs()
+    index: int = next(index for index, struct in enumerate(structs) if struct.departments and struct.groups)
+    struct: TvGUStruct = structs[index]
+    last_copy: Department = dataclasses.replace(struct.departments[0], email="last@tversu.ru")
+    structs[index] = dataclasses.replace(
+        struct, departments=[*struct.departments, last_copy], groups=(*struct.groups, struct.groups[0])
+    )
+
+    assert export_structs_sqlite(structs, tmp_path / "structs.sqlite").duplicates_dropped == 2
+
+    connection: sqlite3.Connection = connect_structs_db(tmp_path / "structs.sqlite")
+    try:
+        departments: list[dict[str, Any]] = select_departments(connection, struct.name)
+        groups_count: int = connection.execute(
+            "SELECT COUNT(*) FROM groups WHERE struct_name = ?", (struct.name,)
+        ).fetchone()[0]
+    finally:
+        connection.close()
+
+    assert len(departments) == len(struct.departments)
+    assert next(department for department in departments
+                if department["name"] == last_copy.name)["email"] == "last@tversu.ru"
+    assert groups_count == len(struct.groups)
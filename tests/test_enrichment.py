@@ -0,0 +1,81 @@
+import asyncio
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from benchmarks.bench_enrichment import LinkHosts, crawl, point_links_to, HUNG_SITE_EVERY, MISSING_SITE_EVERY
+from benchmarks.standin_server import StandInServer
+from benchmarks.synthetic import generate_payloads
+from tvgu_structs_parser.enrichment import LinkCrawler, LinkCheckCache, DepartmentLinks
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.parser import parse_all_sources, join_parsed_sources
+
+PER_HOST_CONCURRENCY: int = 2
+
+
+# Так же, как сервер-заглушка решает, отвечать ли сайту кафедры
+def is_website_up(links: DepartmentLinks) -> bool:
+    number: int = int(urlsplit(links.website.url).hostname.split(".")[0].lstrip("k") or 0)
+    return number % MISSING_SITE_EVERY != 0 and number % HUNG_SITE_EVERY != 0
+
+
+def test_links_are_checked_within_limits_and_cached(tmp_path: Path) -> None:
+    hosts: LinkHosts = LinkHosts()
+    server: StandInServer = StandInServer({"/{tail:.*}": hosts})
+
+    async def main() -> None:
+        async with server.running():
+            structs: list[TvGUStruct] = point_links_to(
+                join_parsed_sources(parse_all_sources(generate_payloads(1))), server
+            )
+            enriched, crawler, _ = await crawl(
+                structs, cache=LinkCheckCache(tmp_path), per_host_concurrency=PER_HOST_CONCURRENCY, host_rate=None
+            )
+
+            clauses: int = sum(links.division_clause is not None for links in enriched)
+
+            assert clauses > 0
+            assert all(links.division_clause.digest is not None for links in enriched if links.division_clause)
+            assert all(links.website.reachable == is_website_up(links) for links in enriched if links.website)
+            # Каждый сайт кафедры – свой хост, и предел на хост соблюдается
+            assert len(hosts.max_in_flight) > 1
+            assert max(hosts.max_in_flight.values()) <= PER_HOST_CONCURRENCY
+
+            # Проверки устарели: положения перепроверяются по HEAD и не скачиваются
+            hosts.methods.clear()
+            _, revalidating, _ = await crawl(structs, cache=LinkCheckCache(tmp_path, max_age_seconds=0), host_rate=None)
+
+            assert hosts.methods["GET"] == 0
+            assert revalidating.stats.not_modified == clauses
+
+            _, cached, _ = await crawl(structs, cache=LinkCheckCache(tmp_path))
+
+            assert cached.stats.requests == 0
+
+    asyncio.run(main())
+
+
+# Свой пул соединений не урезает заданные пределы
+def test_own_session_is_sized_for_crawler() -> None:
+    async def main() -> aiohttp.ClientSession:
+        async with LinkCrawler(concurrency=32, per_host_concurrency=8) as crawler:
+            session: aiohttp.ClientSession = crawler.session
+
+            assert (session.connector.limit, session.connector.limit_per_host) == (32, 8)
+
+        return session
+
+    assert asyncio.run(main()).closed
+
+
+# Переданную сессию закрывает тот, кто её создал
+def test_injected_session_is_left_open() -> None:
+    async def main() -> None:
+        async with aiohttp.ClientSession() as session:
+            async with LinkCrawler(session=session) as crawler:
+                assert crawler.session is session
+
+            assert not session.closed
+
+    asyncio.run(main())
@@ -0,0 +1,198 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+import pytest
+
+from benchmarks.bench_fetch_resilience import SOURCES, FAST_BACKOFF
+from benchmarks.standin_server import StandInServer, StandInClient, Handler, static_response, failing_response, \
+    slow_response
+from tvgu_structs_parser.config import STRUCTS_PAGE_URL, STRUCTS_API_URL, ALL_GROUPS_API_URL
+from tvgu_structs_parser.structs_requests import FetchPolicy, SourcePayload, StructsClient, fetch_all_sources, \
+    gather_or_cancel
+
+RETRY_POLICY: FetchPolicy = FetchPolicy(retries=3, **FAST_BACKOFF)
+
+
+def create_server(faults: dict[str, Callable[[Handler], Handler]]) -> StandInServer:
+    routes: dict[str, Handler] = {}
+
+    for url, (body, content_type) in SOURCES.items():
+        handler: Handler = static_response(body, content_type)
+        routes[urlsplit(url).path] = faults[url](handler) if url in faults else handler
+
+    return StandInServer(routes)
+
+
+# Запоминает каждый запрос, когда он завершился – удачно, с ошибкой или отменой
+class RecordingClient(StandInClient):
+    def __init__(self, server: StandInServer, **client_kwargs: Any) -> None:
+        super().__init__(server, **client_kwargs)
+        self.finished: list[str] = []
+
+    async def _fetch_timed(self, url: str) -> SourcePayload:
+        try:
+            return await super()._fetch_timed(url)
+        finally:
+            self.finished.append(url)
+
+
+# Прогон в своём цикле событий; всё, что asyncio сообщил бы в лог (незабранные исключения и т.п.), – ошибка теста
+def run(main: Callable[[], Awaitable[Any]]) -> Any:
+    reported: list[dict[str, Any]] = []
+
+    async def run_reporting() -> Any:
+        asyncio.get_running_loop().set_exception_handler(lambda _, context: reported.append(context))
+        return await main()
+
+    result: Any = asyncio.run(run_reporting())
+    assert reported == []
+    return result
+
+
+def test_transient_errors_are_retried() -> None:
+    server: StandInServer = create_server({STRUCTS_API_URL: lambda handler: failing_response(handler, failures=2)})
+
+    async def main() -> None:
+        async with server.running(), StandInClient(server, fetch_policy=RETRY_POLICY) as client:
+            await fetch_all_sources(client)
+
+    run(main)
+
+    # Четыре источника плюс два повтора
+    assert server.requests_count == 6
+
+
+def test_client_errors_are_not_retried() -> None:
+    server: StandInServer = create_server({
+        STRUCTS_API_URL: lambda handler: failing_response(handler, failures=1, status=404)
+    })
+
+    async def main() -> None:
+        async with server.running(), StandInClient(server, fetch_policy=RETRY_POLICY) as client:
+            with pytest.raises(aiohttp.ClientResponseError) as error:
+                await fetch_all_sources(client)
+
+            assert error.value.status == 404
+
+    run(main)
+
+
+def test_hung_source_times_out_and_siblings_are_cancelled() -> None:
+    server: StandInServer = create_server({
+        ALL_GROUPS_API_URL: lambda handler: slow_response(handler, delay_ms=3_000),
+        STRUCTS_PAGE_URL: lambda handler: slow_response(handler, delay_ms=3_000),
+    })
+
+    async def main() -> tuple[float, list[str]]:
+        async with server.running():
+            policy: FetchPolicy = FetchPolicy(read_timeout=0.3, read_timeouts={}, retries=0)
+
+            async with RecordingClient(server, fetch_policy=policy) as client:
+                started: float = time.perf_counter()
+
+                with pytest.raises(asyncio.TimeoutError):
+                    await fetch_all_sources(client)
+
+                return time.perf_counter() - started, list(client.finished)
+
+    elapsed, finished = run(main)
+
+    # Без отмены прогон ждал бы медленную страницу все 3 с; к моменту ошибки все четыре загрузки уже завершены
+    assert elapsed < 1.5
+    assert len(finished) == 4
+
+
+def test_hedged_request_fires_and_loser_is_cancelled() -> None:
+    # Первые три запроса – быстрые (набирают статистику), четвёртый висит
+    server: StandInServer = create_server({STRUCTS_API_URL: lambda handler: slow_response(handler, 2_000, every=4)})
+    policy: FetchPolicy = FetchPolicy(hedge_percentile=0.5, hedge_min_samples=3)
+
+    async def main() -> tuple[float, int, list[str]]:
+        async with server.running(), RecordingClient(server, fetch_policy=policy) as client:
+            for _ in range(3):
+                await client.fetch(STRUCTS_API_URL)
+
+            started: float = time.perf_counter()
+            payload: SourcePayload = await client.fetch(STRUCTS_API_URL)
+            elapsed: float = time.perf_counter() - started
+
+            assert payload.body == SOURCES[STRUCTS_API_URL][0]
+            return elapsed, server.requests_count, list(client.finished)
+
+    elapsed, requests_count, finished = run(main)
+
+    assert elapsed < 1
+    # Дублирующий запрос ушёл, а зависший отменён и дождан до возврата из `fetch`
+    assert requests_count == 5
+    assert len(finished) == 5
+
+
+def test_gather_or_cancel_waits_for_cancelled_siblings() -> None:
+    cleaned_up: list[str] = []
+
+    async def sibling(name: str) -> None:
+        try:
+            await asyncio.sleep(60)
+        finally:
+            # Отменённая задача успевает, например, вернуть соединение в пул
+            await asyncio.sleep(0)
+            cleaned_up.append(name)
+
+    async def failing() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("источник недоступен")
+
+    async def main() -> Optional[list[str]]:
+        with pytest.raises(ValueError):
+            await gather_or_cancel(sibling("first"), failing(), sibling("second"))
+
+        return sorted(cleaned_up)
+
+    assert run(main) == ["first", "second"]
+
+
+# Соседняя задача отменена снаружи: наружу выходит настоящая ошибка, а не `CancelledError`
+def test_gather_or_cancel_reports_error_next_to_cancelled_sibling() -> None:
+    async def failing() -> None:
+        await asyncio.sleep(0.05)
+        raise ValueError("источник недоступен")
+
+    async def main() -> None:
+        cancelled: asyncio.Task = asyncio.ensure_future(asyncio.sleep(60))
+        asyncio.get_running_loop().call_later(0.01, cancelled.cancel)
+
+        with pytest.raises(ValueError):
+            await gather_or_cancel(cancelled, failing())
+
+    run(main)
+
+
+# Первый запрос отменён снаружи, пока дублирующий ещё идёт: берётся ответ дублирующего
+class CancelledFirstClient(StructsClient):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: int = 0
+
+    def latency_percentile(self, url: str) -> Optional[float]:
+        return 0.01
+
+    async def _fetch_timed(self, url: str) -> SourcePayload:
+        self.calls += 1
+
+        if self.calls == 1:
+            await asyncio.sleep(0.05)
+            raise asyncio.CancelledError()
+
+        await asyncio.sleep(0.1)
+        return SourcePayload(url=url, body=b"{}", charset="utf-8", digest="")
+
+
+def test_hedged_request_survives_cancelled_attempt() -> None:
+    async def main() -> SourcePayload:
+        async with CancelledFirstClient() as client:
+            return await client._fetch_hedged(STRUCTS_API_URL)
+
+    assert run(main).body == b"{}"
@@ -0,0 +1,68 @@
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from benchmarks.synthetic import generate_payloads
+from tvgu_structs_parser.html_backend import BACKEND_MODULES, is_backend_available
+from tvgu_structs_parser.parsers.parser_structs import parse_structs_page
+from tvgu_structs_parser.parsers.parser_structs_tversu_page import parse_structs_tversu_page
+from tvgu_structs_parser.snapshots import load_snapshot
+from tvgu_structs_parser.structs_requests import SourcesPayloads
+
+REFERENCE_BACKEND: str = "html.parser"
+# Снимки, записанные `record` в директорию по умолчанию, проверяются вместе с синтетическими страницами
+SNAPSHOTS_DIRECTORY: Path = Path(__file__).resolve().parents[1] / "snapshots"
+SNAPSHOT_PATHS: list[Path] = sorted(SNAPSHOTS_DIRECTORY.glob("snapshot-*"))
+
+
+def as_plain(parsed: Any) -> Any:
+    if isinstance(parsed, dict):
+        return {key: as_plain(value) for key, value in parsed.items()}
+    if isinstance(parsed, list):
+        return [as_plain(value) for value in parsed]
+    return asdict(parsed)
+
+
+@pytest.fixture(params=["synthetic", *SNAPSHOT_PATHS], ids=str)
+def payloads(request: pytest.FixtureRequest) -> SourcesPayloads:
+    if request.param == "synthetic":
+        return generate_payloads(1)
+    return load_snapshot(request.param)
+
+
+@pytest.mark.parametrize("backend", [backend for backend in BACKEND_MODULES if backend != REFERENCE_BACKEND])
+@pytest.mark.parametrize("partial", [True, False])
+def test_structs_page_is_same_for_all_backends(payloads: SourcesPayloads, backend: str, partial: bool) -> None:
+    if not is_backend_available(backend):
+        pytest.skip(f"{backend} не установлен")
+
+    structs_page: str = payloads.structs_page.text()
+    # Сравниваются все поля: `__eq__` у `StructInfo` сравнивает не все
+    reference: dict[str, Any] = as_plain(
+        parse_structs_page(structs_page, html_backend=REFERENCE_BACKEND, partial=partial)
+    )
+
+    assert reference["structs"] and reference["departments"]
+    assert as_plain(parse_structs_page(structs_page, html_backend=backend, partial=partial)) == reference
+
+
+@pytest.mark.parametrize("backend", [backend for backend in BACKEND_MODULES if backend != REFERENCE_BACKEND])
+def test_tversu_page_is_same_for_all_backends(payloads: SourcesPayloads, backend: str) -> None:
+    if not is_backend_available(backend):
+        pytest.skip(f"{backend} не установлен")
+
+    tversu_page: str = payloads.structs_tversu_page.text()
+    reference: list[dict[str, Any]] = as_plain(parse_structs_tversu_page(tversu_page, html_backend=REFERENCE_BACKEND))
+
+    assert reference
+    assert as_plain(parse_structs_tversu_page(tversu_page, html_backend=backend)) == reference
+
+
+# Разбор только нужных таблиц не должен менять результат
+def test_partial_structs_page_is_same_as_full(payloads: SourcesPayloads) -> None:
+    structs_page: str = payloads.structs_page.text()
+
+    assert as_plain(parse_structs_page(structs_page, partial=True)) \
+        == as_plain(parse_structs_page(structs_page, partial=False))
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Iterator
+from urllib.parse import urlsplit
+
+from benchmarks.standin_server import StandInServer, StandInClient, static_response
+from benchmarks.synthetic import generate_payloads
+from tvgu_structs_parser.config import STRUCTS_PAGE_URL, STRUCTS_TVERSU_PAGE_URL, STRUCTS_API_URL, \
+    ALL_GROUPS_API_URL
+from tvgu_structs_parser.incremental import IncrementalState
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.parser import ParsedSources, get_all_tvgu_structs, iter_tvgu_structs, iter_joined_structs, \
+    create_parse_executor, parse_all_sources
+from tvgu_structs_parser.serialization import struct_to_dict
+from tvgu_structs_parser.structs_requests import SourcesPayloads
+
+
+def create_server(payloads: SourcesPayloads) -> StandInServer:
+    return StandInServer({
+        urlsplit(url).path: static_response(payload.body, content_type)
+        for url, payload, content_type in (
+            (STRUCTS_PAGE_URL, payloads.structs_page, "text/html"),
+            (STRUCTS_TVERSU_PAGE_URL, payloads.structs_tversu_page, "text/html"),
+            (STRUCTS_API_URL, payloads.structs_api, "application/json"),
+            (ALL_GROUPS_API_URL, payloads.all_groups, "application/json"),
+        )
+    })
+
+
+def test_iter_with_incremental_matches_batch_and_reuses_structs() -> None:
+    server: StandInServer = create_server(generate_payloads(1))
+    state: IncrementalState = IncrementalState()
+
+    async def main() -> tuple[list[TvGUStruct], list[TvGUStruct], list[TvGUStruct]]:
+        async with server.running(), StandInClient(server) as client:
+            with create_parse_executor("thread") as executor:
+                batch: list[TvGUStruct] = await get_all_tvgu_structs(client=client, executor=executor)
+                first: list[TvGUStruct] = [
+                    struct async for struct in iter_tvgu_structs(client=client, executor=executor, incremental=state)
+                ]
+                second: list[TvGUStruct] = [
+                    struct async for struct in iter_tvgu_structs(client=client, executor=executor, incremental=state)
+                ]
+
+        return batch, first, second
+
+    batch, first, second = asyncio.run(main())
+
+    assert [struct_to_dict(struct) for struct in first] == [struct_to_dict(struct) for struct in batch]
+    # Второй прогон: источники не разбирались, структуры – те же объекты
+    assert all(reused is struct for reused, struct in zip(second, first, strict=True))
+    assert state.stats.sources_reused == 4
+    assert state.stats.structs_reused == len(first)
+
+
+# Потребитель остановился на первой структуре: прошлый прогон остаётся в силе
+def test_abandoned_stream_keeps_previous_state() -> None:
+    parsed: ParsedSources = parse_all_sources(generate_payloads(1))
+    state: IncrementalState = IncrementalState()
+    structs: list[TvGUStruct] = state.join(parsed)
+
+    stream: Iterator[TvGUStruct] = iter_joined_structs(parsed, state)
+    assert next(stream) is structs[0]
+    stream.close()
+
+    assert (state.stats.structs_rebuilt, state.stats.structs_reused) == (len(structs), 0)
+    assert all(reused is struct for reused, struct in zip(state.join(parsed), structs, strict=True))
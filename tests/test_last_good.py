@@ -0,0 +1,45 @@
+import pickle
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+from tvgu_structs_parser import last_good
+from tvgu_structs_parser.cache import get_parsed_fingerprint, write_atomic
+from tvgu_structs_parser.last_good import LastGoodStore, LAST_GOOD_SUFFIX
+
+SOURCE: str = "structs_api"
+
+
+# Датакласс, которого при следующем запуске уже нет
+@dataclass(frozen=True, kw_only=True, slots=True)
+class RemovedRecord:
+    name: str
+
+
+def test_stored_source_survives_restart(tmp_path: Path) -> None:
+    LastGoodStore(tmp_path).put(SOURCE, ["разобрано"])
+
+    assert LastGoodStore(tmp_path).get(SOURCE).parsed == ["разобрано"]
+
+
+def test_changed_fingerprint_is_missing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    LastGoodStore(tmp_path).put(SOURCE, ["разобрано"])
+    monkeypatch.setattr(last_good, "get_parsed_fingerprint", lambda: "другие-парсеры")
+
+    assert LastGoodStore(tmp_path).get(SOURCE) is None
+
+
+def test_unpicklable_entry_is_missing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    LastGoodStore(tmp_path).put(SOURCE, [RemovedRecord(name="Факультет")])
+    monkeypatch.delattr(sys.modules[__name__], "RemovedRecord")
+
+    assert LastGoodStore(tmp_path).get(SOURCE) is None
+
+
+def test_entry_of_wrong_shape_is_missing(tmp_path: Path) -> None:
+    entry: bytes = pickle.dumps((get_parsed_fingerprint(), ["не StoredSource"]))
+    write_atomic(tmp_path / f"{SOURCE}{LAST_GOOD_SUFFIX}", entry)
+
+    assert LastGoodStore(tmp_path).get(SOURCE) is None
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+from tvgu_structs_parser import serialization
+from tvgu_structs_parser.diff import load_structs_dump
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.serialization import serialize_structs, serialize_struct_line, write_structs, \
+    struct_from_dict
+
+pytest.importorskip("orjson")
+
+DUMP_PATH: Path = Path(__file__).resolve().parents[1] / "parsed_structs" / "structs-2026-01-10.json"
+
+
+@pytest.fixture
+def structs() -> list[TvGUStruct]:
+    return [struct_from_dict(record) for record in load_structs_dump(DUMP_PATH)]
+
+
+def without_orjson(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(serialization, "orjson", None)
+
+
+# Байты выгрузки не должны зависеть от того, установлен ли orjson
+@pytest.mark.parametrize("prettify", [False, True])
+def test_fallback_is_byte_equal_to_orjson(
+        structs: list[TvGUStruct], prettify: bool, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    with_orjson: bytes = serialize_structs(structs, prettify)
+    without_orjson(monkeypatch)
+
+    assert serialize_structs(structs, prettify) == with_orjson
+
+
+@pytest.mark.parametrize("prettify", [False, True])
+def test_written_file_is_byte_equal_to_orjson(
+        structs: list[TvGUStruct], prettify: bool, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    write_structs(structs, tmp_path / "orjson.json", prettify)
+    without_orjson(monkeypatch)
+    write_structs(structs, tmp_path / "json.json", prettify)
+
+    assert (tmp_path / "json.json").read_bytes() == (tmp_path / "orjson.json").read_bytes()
+
+
+def test_ndjson_line_is_byte_equal_to_orjson(structs: list[TvGUStruct], monkeypatch: pytest.MonkeyPatch) -> None:
+    with_orjson: list[bytes] = [serialize_struct_line(struct) for struct in structs]
+    without_orjson(monkeypatch)
+
+    assert [serialize_struct_line(struct) for struct in structs] == with_orjson
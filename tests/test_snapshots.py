@@ -0,0 +1,25 @@
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.synthetic import generate_payloads
+from tvgu_structs_parser.snapshots import save_snapshot, load_snapshot, create_snapshot_directory
+from tvgu_structs_parser.structs_requests import SourcesPayloads
+
+
+def test_directories_in_same_second_are_unique(tmp_path: Path) -> None:
+    recorded_at: datetime = datetime(2026, 1, 10, 12, 30, 15)
+
+    paths: list[Path] = [create_snapshot_directory(tmp_path, recorded_at) for _ in range(3)]
+
+    assert [path.name for path in paths] == [
+        "snapshot-2026-01-10T12-30-15", "snapshot-2026-01-10T12-30-15-1", "snapshot-2026-01-10T12-30-15-2"
+    ]
+
+
+def test_snapshots_in_loop_do_not_collide(tmp_path: Path) -> None:
+    payloads: SourcesPayloads = generate_payloads(1)
+
+    paths: list[Path] = [save_snapshot(payloads, tmp_path) for _ in range(3)]
+
+    assert len(set(paths)) == 3
+    assert all(load_snapshot(path) == payloads for path in paths)
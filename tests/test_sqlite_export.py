@@ -0,0 +1,89 @@
+import sqlite3
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+from tvgu_structs_parser import sqlite_export
+from tvgu_structs_parser.diff import load_structs_dump
+from tvgu_structs_parser.normalizer import TvGUStruct
+from tvgu_structs_parser.serialization import struct_from_dict
+from tvgu_structs_parser.sqlite_export import SqliteExportStats, export_structs_sqlite, connect_structs_db, \
+    existing_columns, select_departments
+
+DUMP_PATH: Path = Path(__file__).resolve().parents[1] / "parsed_structs" / "structs-2026-01-10.json"
+
+
+@pytest.fixture
+def structs() -> list[TvGUStruct]:
+    return [struct_from_dict(record) for record in load_structs_dump(DUMP_PATH)]
+
+
+def failing_rows(_: list[dict[str, Any]]) -> Iterator[tuple]:
+    raise RuntimeError("выгрузка прервана")
+    yield
+
+
+def count_rows(path: Path, table: str) -> int:
+    connection: sqlite3.Connection = connect_structs_db(path)
+
+    try:
+        return connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_reexport_of_same_structs_changes_nothing(structs: list[TvGUStruct], tmp_path: Path) -> None:
+    path: Path = tmp_path / "structs.sqlite"
+    export_structs_sqlite(structs, path)
+
+    assert export_structs_sqlite(structs, path) == SqliteExportStats(
+        added=0, changed=0, removed=0, unchanged=len(structs), duplicates_dropped=0
+    )
+
+    connection: sqlite3.Connection = connect_structs_db(path)
+    try:
+        assert len(select_departments(connection, structs[0].name)) == len(structs[0].departments)
+    finally:
+        connection.close()
+
+
+def test_failed_export_keeps_previous_data(
+        structs: list[TvGUStruct], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path: Path = tmp_path / "structs.sqlite"
+    export_structs_sqlite(structs, path)
+    monkeypatch.setattr(sqlite_export, "group_rows", failing_rows)
+
+    with pytest.raises(RuntimeError):
+        export_structs_sqlite(structs[1:], path)
+
+    assert count_rows(path, "structs") == len(structs)
+
+
+# Схема устарела: таблицы пересоздаются в той же транзакции, что и запись, и при ошибке остаются старыми
+def test_failed_export_after_schema_change_keeps_old_tables(
+        structs: list[TvGUStruct], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path: Path = tmp_path / "structs.sqlite"
+    connection: sqlite3.Connection = connect_structs_db(path)
+    connection.execute("CREATE TABLE structs (name TEXT PRIMARY KEY, removed_field TEXT)")
+    connection.execute("INSERT INTO structs VALUES ('Старая структура', '')")
+    connection.close()
+    monkeypatch.setattr(sqlite_export, "department_rows", failing_rows)
+
+    with pytest.raises(RuntimeError):
+        export_structs_sqlite(structs, path)
+
+    connection = connect_structs_db(path)
+    try:
+        assert existing_columns(connection, "structs") == ("name", "removed_field")
+        assert existing_columns(connection, "departments") == ()
+    finally:
+        connection.close()
+    assert count_rows(path, "structs") == 1
+
+    monkeypatch.undo()
+
+    assert export_structs_sqlite(structs, path).added == len(structs)
+    assert count_rows(path, "structs") == len(structs)
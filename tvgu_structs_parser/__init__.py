@@ -1,3 +1,59 @@
-from .parser import get_all_tvgu_structs
+import importlib
+from typing import Any, TYPE_CHECKING
 
-__all__ = ["get_all_tvgu_structs"]
+# Модули импортируются при первом обращении к имени (PEP 562): `import tvgu_structs_parser` не тянет aiohttp и bs4,
+# пока не понадобятся загрузка или парсинг
+_EXPORTS: dict[str, str] = {
+    "get_all_tvgu_structs": ".parser",
+    "iter_tvgu_structs": ".parser",
+    "get_tvgu_structs_stale_ok": ".parser",
+    "record_tvgu_structs": ".parser",
+    "replay_tvgu_structs": ".parser",
+    "StaleOkStructs": ".parser",
+    "StructsClient": ".structs_requests",
+    "ConnectorConfig": ".structs_requests",
+    "FetchPolicy": ".structs_requests",
+    "PipelineTimings": ".timings",
+    "PipelineMetrics": ".metrics",
+    "serve_tvgu_structs": ".serve",
+    "StructIndex": ".index",
+    "LastGoodStore": ".last_good",
+    "LinkCrawler": ".enrichment",
+    "enrich_departments": ".enrichment",
+    "StructsArchive": ".archive",
+    "load_structs": ".packed",
+    "IncrementalState": ".incremental",
+}
+
+if TYPE_CHECKING:
+    from .archive import StructsArchive
+    from .enrichment import LinkCrawler, enrich_departments
+    from .incremental import IncrementalState
+    from .index import StructIndex
+    from .last_good import LastGoodStore
+    from .metrics import PipelineMetrics
+    from .packed import load_structs
+    from .parser import get_all_tvgu_structs, iter_tvgu_structs, get_tvgu_structs_stale_ok, record_tvgu_structs, \
+        replay_tvgu_structs, StaleOkStructs
+    from .serve import serve_tvgu_structs
+    from .structs_requests import StructsClient, ConnectorConfig, FetchPolicy
+    from .timings import PipelineTimings
+
+__all__ = ["get_all_tvgu_structs", "iter_tvgu_structs", "get_tvgu_structs_stale_ok", "StaleOkStructs",
+           "record_tvgu_structs", "replay_tvgu_structs", "StructsClient", "ConnectorConfig", "FetchPolicy",
+           "PipelineTimings", "PipelineMetrics", "serve_tvgu_structs", "StructIndex", "LastGoodStore", "LinkCrawler",
+           "enrich_departments", "StructsArchive", "load_structs", "IncrementalState"]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value: Any = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    # Следующие обращения не проходят через `__getattr__`
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
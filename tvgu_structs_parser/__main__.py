@@ -1,72 +1,358 @@
 import argparse
 import asyncio
+import cProfile
 import json
+import os
+import sys
+import tracemalloc
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Iterator, BinaryIO, TYPE_CHECKING
 
-from .parser import get_all_tvgu_structs
+from .archive import ArchivePutStats, StructsArchive
+from .cache import SourceCache
+from .config import PARSE_EXECUTOR, SERVE_HOST, SERVE_PORT
+from .diff import StructsPatch, diff_structs, find_previous_dump, load_structs_dump
+from .field_normalizer import FIELD_NORMALIZER
+from .last_good import LastGoodStore
+from .serialization import write_structs, write_structs_ndjson, write_structs_ndjson_async
 from .normalizer import TvGUStruct
 from .misc import CustomEncoder
+from .packed import write_packed_structs
+from .timings import PipelineTimings
+
+# Загрузка (aiohttp), парсинг HTML (bs4), сервер и SQLite импортируются в тех режимах, где нужны:
+# `--help` и работа с сохранёнными выгрузками не платят за их импорт
+if TYPE_CHECKING:
+    from .enrichment import DepartmentLinks
+    from .sqlite_export import SqliteExportStats
 
 
 @dataclass(frozen=True, kw_only=True)
 class Args:
+    mode: str
+    snapshot_dir: Optional[str]
     prettify: bool
     output: Optional[str]
     output_directory: Optional[str]
-    output_auto: Optional[str]
+    output_auto: bool
+    output_sqlite: Optional[str]
+    output_format: str
+    archive_dir: Optional[str]
     show_warnings: bool
+    cache_dir: Optional[str]
+    parse_executor: str
+    show_timings: bool
+    profile: bool
+    profile_output: Optional[str]
+    diff_against: Optional[str]
+    diff_output: Optional[str]
+    enrich_output: Optional[str]
+    host: str
+    port: int
 
 
-def dump_structs(structs: list[TvGUStruct], output_path: str, prettify: bool) -> None:
-    json.dump(
-        structs,
-        open(output_path, "w+", encoding="UTF-8"),
-        ensure_ascii=False,
-        indent=2 if prettify else None,
-        cls=CustomEncoder
-    )
+async def fetch_structs_by_mode(args: Args, timings: PipelineTimings) -> list[TvGUStruct]:
+    from .parser import get_all_tvgu_structs, record_tvgu_structs, replay_tvgu_structs, create_parse_executor
+    from .structs_requests import StructsClient
 
+    if args.mode == "replay":
+        return replay_tvgu_structs(args.snapshot_dir, args.show_warnings, timings)
 
-async def main(args: Args) -> None:
-    final_structs: list[TvGUStruct] = await get_all_tvgu_structs(args.show_warnings)
+    cache: Optional[SourceCache] = None if args.cache_dir is None else SourceCache(args.cache_dir)
 
-    if args.output is not None or args.output_auto is not None:
-        if args.output_auto is not None:
-            output_path: str = f"structs-{date.today()}.json"
+    async with StructsClient(cache=cache) as client:
+        if args.mode == "record":
+            snapshot_path, final_structs = await record_tvgu_structs(
+                args.snapshot_dir, args.show_warnings, client, timings
+            )
+            print(f"Снимок источников сохранён в {snapshot_path}", file=sys.stderr)
         else:
-            output_path: str = args.output
+            with create_parse_executor(args.parse_executor) as executor:
+                final_structs: list[TvGUStruct] = await get_all_tvgu_structs(
+                    args.show_warnings, client, executor, timings
+                )
+
+    if cache is not None:
+        print(f"Кэш источников: {cache.stats}", file=sys.stderr)
+
+    return final_structs
+
+
+def report_timings(args: Args, timings: PipelineTimings) -> None:
+    if args.show_timings:
+        print(f"Этапы загрузки и парсинга:\n{timings.format()}", file=sys.stderr)
+        # В пуле процессов разбор идёт в дочерних процессах: здесь счётчики останутся нулевыми
+        print(f"Мемоизация полей: {FIELD_NORMALIZER.memo_stats()}", file=sys.stderr)
+
+    if args.profile:
+        print(f"Профиль этапов:\n{timings.format_report()}", file=sys.stderr)
+
 
-        if args.output_directory is not None:
-            directory: Path = Path(args.output_directory)
-            directory.mkdir(parents=True, exist_ok=True)
-            output_path = directory / output_path
+async def load_structs_by_mode(args: Args) -> list[TvGUStruct]:
+    timings: PipelineTimings = PipelineTimings()
+    final_structs: list[TvGUStruct] = await fetch_structs_by_mode(args, timings)
+    report_timings(args, timings)
 
-        dump_structs(final_structs, output_path, args.prettify)
+    return final_structs
+
+
+def get_output_path(args: Args) -> Optional[Path]:
+    if args.output is None and not args.output_auto:
+        return None
+
+    if args.output_auto:
+        output_path: Path = Path(f"structs-{date.today()}.{args.output_format}")
     else:
-        print(*final_structs, sep="\n")
+        output_path: Path = Path(args.output)
+
+    if args.output_directory is not None:
+        directory: Path = Path(args.output_directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        output_path = directory / output_path
+
+    return output_path
+
+
+# NDJSON пишется сразу в файл (или stdout), без временного файла: читатель может обрабатывать строки по мере записи
+@contextmanager
+def open_ndjson_output(output_path: Optional[Path]) -> Iterator[BinaryIO]:
+    if output_path is None:
+        try:
+            yield sys.stdout.buffer
+        except BrokenPipeError:
+            # Читатель закрыл канал (например, `| head`): остальное писать некуда
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+
+    with open(output_path, "wb") as file:
+        yield file
+
+
+# Структуры пишутся по одной, как только собраны, – когда их больше ни для чего не нужно держать в памяти
+def can_stream(args: Args) -> bool:
+    return args.output_format == "ndjson" and args.mode == "fetch" and args.diff_against is None \
+        and args.enrich_output is None and args.output_sqlite is None and args.archive_dir is None
+
+
+async def stream_structs(args: Args) -> None:
+    from .parser import iter_tvgu_structs, create_parse_executor
+    from .structs_requests import StructsClient
+
+    timings: PipelineTimings = PipelineTimings()
+    cache: Optional[SourceCache] = None if args.cache_dir is None else SourceCache(args.cache_dir)
+
+    with open_ndjson_output(get_output_path(args)) as file:
+        async with StructsClient(cache=cache) as client:
+            with create_parse_executor(args.parse_executor) as executor:
+                await write_structs_ndjson_async(
+                    iter_tvgu_structs(args.show_warnings, client, executor, timings), file
+                )
+
+    if cache is not None:
+        print(f"Кэш источников: {cache.stats}", file=sys.stderr)
+
+    report_timings(args, timings)
+
+
+# Без `--diff-output` в stdout идёт только сама разница: предупреждения и отчёты пишутся в stderr
+def dump_patch(patch: StructsPatch, output_path: Optional[str], prettify: bool) -> None:
+    if output_path is None:
+        print(json.dumps(patch, ensure_ascii=False, indent=2 if prettify else None, cls=CustomEncoder))
+        return
+
+    with open(output_path, "w", encoding="UTF-8") as file:
+        json.dump(patch, file, ensure_ascii=False, indent=2 if prettify else None, cls=CustomEncoder)
+
+
+# Считается до записи новой выгрузки, чтобы она не оказалась собственной базой
+def diff_with_previous(final_structs: list[TvGUStruct], args: Args) -> None:
+    previous_dump: Optional[Path] = find_previous_dump(args.diff_against)
+
+    if previous_dump is None:
+        print(f"Предыдущая выгрузка в {args.diff_against} не найдена: разница не считается", file=sys.stderr)
+        return
+
+    patch: StructsPatch = diff_structs(load_structs_dump(previous_dump), final_structs, previous_dump.name)
+    dump_patch(patch, args.diff_output, args.prettify)
+
+
+async def enrich(final_structs: list[TvGUStruct], args: Args) -> None:
+    from .enrichment import LinkCrawler, LinkCheckCache, enrich_departments, write_enrichment
+
+    cache: Optional[LinkCheckCache] = None if args.cache_dir is None \
+        else LinkCheckCache(Path(args.cache_dir) / "enrichment")
+
+    async with LinkCrawler(cache) as crawler:
+        enriched: list[DepartmentLinks] = await enrich_departments(final_structs, crawler)
+
+    print(f"Проверка ссылок кафедр: {crawler.stats}", file=sys.stderr)
+    write_enrichment(enriched, args.enrich_output, args.prettify)
+
+
+async def serve(args: Args) -> None:
+    from .parser import create_parse_executor
+    from .serve import serve_tvgu_structs
+    from .structs_requests import StructsClient
+
+    cache: Optional[SourceCache] = None if args.cache_dir is None else SourceCache(args.cache_dir)
+
+    # С кэшем последние удачные результаты источников переживают перезапуск
+    last_good: LastGoodStore = LastGoodStore(None if args.cache_dir is None else Path(args.cache_dir) / "last_good")
+
+    async with StructsClient(cache=cache) as client:
+        with create_parse_executor(args.parse_executor) as executor:
+            await serve_tvgu_structs(args.host, args.port, client, executor, args.show_warnings, last_good)
+
+
+async def main(args: Args) -> None:
+    if args.mode == "serve":
+        return await serve(args)
+
+    if can_stream(args):
+        return await stream_structs(args)
+
+    final_structs: list[TvGUStruct] = await load_structs_by_mode(args)
+
+    if args.diff_against is not None:
+        diff_with_previous(final_structs, args)
+
+    if args.enrich_output is not None:
+        await enrich(final_structs, args)
+
+    output_path: Optional[Path] = get_output_path(args)
+
+    if output_path is not None and args.output_format == "ndjson":
+        with open_ndjson_output(output_path) as file:
+            write_structs_ndjson(final_structs, file)
+    elif output_path is not None and args.output_format == "packed":
+        write_packed_structs(final_structs, output_path)
+    elif output_path is not None:
+        write_structs(final_structs, output_path, args.prettify)
+
+    if args.archive_dir is not None:
+        archive_stats: ArchivePutStats = StructsArchive(args.archive_dir).put(date.today().isoformat(), final_structs)
+        print(f"Архив выгрузок {args.archive_dir}: {archive_stats}", file=sys.stderr)
+
+    if args.output_sqlite is not None:
+        from .sqlite_export import export_structs_sqlite
+
+        stats: SqliteExportStats = export_structs_sqlite(final_structs, args.output_sqlite)
+        print(f"База SQLite {args.output_sqlite}: {stats}", file=sys.stderr)
+
+    if output_path is None and args.output_sqlite is None and args.archive_dir is None \
+            and args.diff_against is None and args.enrich_output is None:
+        if args.output_format == "ndjson":
+            with open_ndjson_output(None) as file:
+                write_structs_ndjson(final_structs, file)
+        else:
+            print(*final_structs, sep="\n")
+
+
+# cProfile видит только главный поток: разбор в пуле в дамп не попадёт, для него удобнее replay
+def run_profiled(args: Args) -> None:
+    profiler: Optional[cProfile.Profile] = None if args.profile_output is None else cProfile.Profile()
+
+    if args.profile:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+
+    try:
+        asyncio.run(main(args))
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile_output)
+            print(f"Профиль cProfile сохранён в {args.profile_output}", file=sys.stderr)
+        if args.profile:
+            tracemalloc.stop()
 
 
 def parse_args() -> Args:
     parser = argparse.ArgumentParser(description="Парсер расписания ТвГУ")
 
+    parser.add_argument("mode", nargs="?", choices=("fetch", "record", "replay", "serve"), default="fetch",
+                        help="fetch – загрузка из источников, record – загрузка с сохранением снимка ответов, "
+                             "replay – парсинг сохранённого снимка без сети, "
+                             "serve – HTTP-сервер, отдающий структуры из памяти с обновлением по расписанию")
+    parser.add_argument("-s", "--snapshot-dir",
+                        help="record: директория для снимков (по умолчанию snapshots); replay: путь к снимку")
+
     parser.add_argument("-o", "--output", help="Путь к выходному файлу для экспорта расписаний")
     parser.add_argument("-od", "--output-directory", help="Путь к директории для экспорта расписаний")
     parser.add_argument("-oa", "--output-auto", action="store_true",
                         help="Автоматическое формирование имени выходного файла в виде даты")
+    parser.add_argument("-os", "--output-sqlite",
+                        help="Записать структуры, кафедры и группы в базу SQLite (существующая обновляется)")
+    parser.add_argument("-f", "--format", choices=("json", "ndjson", "packed"), default="json",
+                        help="json – один массив; ndjson – по структуре на строку, строки пишутся по мере готовности "
+                             "(без -o – в stdout); packed – файл с индексом для load_structs: записи читаются "
+                             "по запросу через mmap")
+    parser.add_argument("-a", "--archive-dir",
+                        help="Добавить выгрузку за сегодня в архив: хранятся только изменившиеся записи, сжатыми")
     parser.add_argument("-p", "--prettify", action="store_true", help="Форматированный вывод JSON")
     parser.add_argument("-w", "--warnings", action="store_true", help="Показывать предупреждения")
+    parser.add_argument("-c", "--cache-dir",
+                        help="Директория кэша ответов источников (условные запросы по ETag / Last-Modified)")
+    parser.add_argument("-pe", "--parse-executor", choices=("thread", "process"), default=PARSE_EXECUTOR,
+                        help="Пул для парсинга HTML-страниц: потоки или процессы")
+    parser.add_argument("-t", "--timings", action="store_true",
+                        help="Показать время загрузки и парсинга каждого источника")
+    parser.add_argument("-P", "--profile", action="store_true",
+                        help="Показать по каждому этапу время, процессорное время, полученные байты, "
+                             "количество записей и пик памяти (tracemalloc замедляет прогон)")
+    parser.add_argument("-po", "--profile-output", help="Сохранить профиль cProfile в файл (смотреть через pstats)")
+    parser.add_argument("-d", "--diff-against",
+                        help="Предыдущая выгрузка (файл или директория с structs-YYYY-MM-DD.json): "
+                             "вывести только добавленные, удалённые и изменённые записи")
+    parser.add_argument("-do", "--diff-output", help="Файл для разницы с предыдущей выгрузкой (по умолчанию stdout)")
+    parser.add_argument("-e", "--enrich-output",
+                        help="Проверить положения и сайты кафедр (размер, дата изменения, хэш положения, "
+                             "доступность сайта) и сохранить результат в файл. Ходит в сеть и в режиме replay")
+    parser.add_argument("--host", default=SERVE_HOST, help="serve: адрес HTTP-сервера")
+    parser.add_argument("--port", type=int, default=SERVE_PORT, help="serve: порт HTTP-сервера")
 
     args: argparse.Namespace = parser.parse_args()
 
+    if args.mode == "replay" and args.snapshot_dir is None:
+        parser.error("Для режима replay нужно указать путь к снимку: --snapshot-dir")
+
+    if args.mode == "serve" and (args.profile or args.profile_output is not None):
+        parser.error("В режиме serve метрики этапов отдаются на /metrics, --profile не используется")
+
+    if args.mode == "serve" and (args.enrich_output, args.output_sqlite, args.archive_dir) != (None, None, None):
+        parser.error("В режиме serve --enrich-output, --output-sqlite и --archive-dir не используются")
+
+    if args.format == "packed" and args.output is None and not args.output_auto:
+        parser.error("Для --format packed нужен файл: --output или --output-auto")
+
+    if args.diff_output is not None and args.diff_against is None:
+        parser.error("--diff-output используется только вместе с --diff-against")
+
     return Args(
+        mode=args.mode,
+        snapshot_dir=args.snapshot_dir or ("snapshots" if args.mode == "record" else None),
         prettify=args.prettify,
         output=args.output,
         output_directory=args.output_directory,
         output_auto=args.output_auto,
+        output_sqlite=args.output_sqlite,
+        output_format=args.format,
+        archive_dir=args.archive_dir,
         show_warnings=args.warnings,
+        cache_dir=args.cache_dir,
+        parse_executor=args.parse_executor,
+        show_timings=args.timings,
+        profile=args.profile,
+        profile_output=args.profile_output,
+        diff_against=args.diff_against,
+        diff_output=args.diff_output,
+        enrich_output=args.enrich_output,
+        host=args.host,
+        port=args.port,
     )
 
 
@@ -75,7 +361,7 @@ if __name__ == "__main__":
 
     args: Args = parse_args()
 
-    if args.output is not None and args.output_auto is not None:
+    if args.output is not None and args.output_auto:
         raise ValueError("Одновременно можно использовать параметр -o и -oa")
 
-    asyncio.run(main(args))
+    run_profiled(args)
@@ -0,0 +1,212 @@
+import gzip
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Union, Optional, Final
+
+from .cache import write_atomic, get_payload_digest
+from .config import ARCHIVE_COMPRESSION_LEVEL
+from .diff import DUMP_GLOB, load_structs_dump
+from .normalizer import TvGUStruct
+from .serialization import struct_to_dict, struct_from_dict, normalize_struct_record
+
+OBJECTS_DIRECTORY: Final[str] = "objects"
+MANIFESTS_DIRECTORY: Final[str] = "manifests"
+HISTORY_FILENAME: Final[str] = "history.json"
+OBJECT_SUFFIX: Final[str] = ".json.gz"
+MANIFEST_SUFFIX: Final[str] = ".json.gz"
+DUMP_DATE_PATTERN: Final[re.Pattern] = re.compile(r"structs-(\d{4}-\d{2}-\d{2})\.json$")
+
+# Запись истории структуры: дата и хэш версии структуры (`tree`), None – структура пропала
+HistoryEntry = dict[str, Any]
+
+
+@dataclass(frozen=True, kw_only=True)
+class ArchivePutStats:
+    date: str
+    # Записи, которых в архиве ещё не было
+    new_records: int
+    reused_records: int
+    bytes_written: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class StructVersion:
+    date: str
+    # None – в этот день структуры не было
+    struct: Optional[TvGUStruct]
+
+
+# Тот же вид, что в `get_record_hash`: хэш записи в архиве совпадает с хэшем в разнице выгрузок
+def canonical_json(record: dict[str, Any]) -> bytes:
+    return json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode()
+
+
+# Архив ежедневных выгрузок. Структуры (без кафедр) и кафедры хранятся по хэшу содержимого, каждая один раз,
+# сжатыми файлами в `objects`. Версия структуры (`tree`) – тоже запись: хэш структуры и хэши её кафедр,
+# а выгрузка дня – манифест с версиями структур. Неизменившиеся записи и версии между днями общие,
+# поэтому каждый день добавляет только изменившиеся записи и небольшой манифест.
+# `history.json` – изменения каждой структуры по дням: история читается без разбора всех манифестов
+class StructsArchive:
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory: Path = Path(directory)
+        (self.directory / OBJECTS_DIRECTORY).mkdir(parents=True, exist_ok=True)
+        (self.directory / MANIFESTS_DIRECTORY).mkdir(parents=True, exist_ok=True)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.directory / OBJECTS_DIRECTORY / digest[:2] / f"{digest}{OBJECT_SUFFIX}"
+
+    def _manifest_path(self, date: str) -> Path:
+        return self.directory / MANIFESTS_DIRECTORY / f"{date}{MANIFEST_SUFFIX}"
+
+    def _history_path(self) -> Path:
+        return self.directory / HISTORY_FILENAME
+
+    # Возвращает число записанных байт: 0, если запись уже есть
+    def _put_object(self, record: dict[str, Any]) -> tuple[str, int]:
+        data: bytes = canonical_json(record)
+        digest: str = get_payload_digest(data)
+        path: Path = self._object_path(digest)
+
+        if path.exists():
+            return digest, 0
+
+        path.parent.mkdir(exist_ok=True)
+        compressed: bytes = gzip.compress(data, compresslevel=ARCHIVE_COMPRESSION_LEVEL, mtime=0)
+        write_atomic(path, compressed)
+
+        return digest, len(compressed)
+
+    def _get_object(self, digest: str) -> dict[str, Any]:
+        return json.loads(gzip.decompress(self._object_path(digest).read_bytes()))
+
+    def _read_manifest(self, date: str) -> dict[str, Any]:
+        try:
+            return json.loads(gzip.decompress(self._manifest_path(date).read_bytes()))
+        except FileNotFoundError:
+            raise KeyError(f"В архиве {self.directory} нет выгрузки за {date}") from None
+
+    def _read_history(self) -> dict[str, list[HistoryEntry]]:
+        try:
+            return json.loads(self._history_path().read_text(encoding="UTF-8"))
+        except FileNotFoundError:
+            return {}
+
+    def _write_history(self, history: dict[str, list[HistoryEntry]]) -> None:
+        write_atomic(self._history_path(), json.dumps(history, ensure_ascii=False).encode())
+
+    def dates(self) -> list[str]:
+        return sorted(path.name.removesuffix(MANIFEST_SUFFIX)
+                      for path in (self.directory / MANIFESTS_DIRECTORY).glob(f"*{MANIFEST_SUFFIX}"))
+
+    # Повторная запись того же дня заменяет его манифест
+    def put(self, date: str, structs: list[TvGUStruct]) -> ArchivePutStats:
+        return self.put_records(date, [struct_to_dict(struct) for struct in structs])
+
+    # Записи приводятся к полям `TvGUStruct`: те же данные из старой выгрузки и из прогона дают те же хэши
+    def put_records(self, date: str, records: list[dict[str, Any]]) -> ArchivePutStats:
+        records = [normalize_struct_record(record) for record in records]
+        manifest_structs: list[dict[str, Any]] = []
+        new_records: int = 0
+        reused_records: int = 0
+        bytes_written: int = 0
+
+        for record in records:
+            department_digests: list[str] = []
+
+            for department in record["departments"]:
+                digest, written = self._put_object(department)
+                department_digests.append(digest)
+                new_records += written > 0
+                reused_records += written == 0
+                bytes_written += written
+
+            struct_digest, written = self._put_object(
+                {key: value for key, value in record.items() if key != "departments"}
+            )
+            new_records += written > 0
+            reused_records += written == 0
+            bytes_written += written
+
+            tree, written = self._put_object({"struct": struct_digest, "departments": department_digests})
+            bytes_written += written
+
+            manifest_structs.append({"name": record["name"], "tree": tree})
+
+        manifest: bytes = gzip.compress(
+            canonical_json({"date": date, "structs": manifest_structs}),
+            compresslevel=ARCHIVE_COMPRESSION_LEVEL,
+            mtime=0,
+        )
+        write_atomic(self._manifest_path(date), manifest)
+        bytes_written += len(manifest)
+
+        history: dict[str, list[HistoryEntry]] = self._read_history()
+        history_dates: set[str] = {entry["date"] for entries in history.values() for entry in entries}
+
+        # Обычно добавляется новый последний день: историю достаточно дописать.
+        # Более ранний или уже записанный день меняет историю задним числом – она пересобирается по манифестам
+        if self.dates()[-1] == date and date not in history_dates:
+            append_history(history, date, manifest_structs)
+            self._write_history(history)
+        else:
+            self.rebuild_history()
+
+        return ArchivePutStats(
+            date=date, new_records=new_records, reused_records=reused_records, bytes_written=bytes_written
+        )
+
+    def rebuild_history(self) -> None:
+        history: dict[str, list[HistoryEntry]] = {}
+
+        for date in self.dates():
+            append_history(history, date, self._read_manifest(date)["structs"])
+
+        self._write_history(history)
+
+    def _build_struct(self, tree: str) -> TvGUStruct:
+        digests: dict[str, Any] = self._get_object(tree)
+        record: dict[str, Any] = self._get_object(digests["struct"])
+        record["departments"] = [self._get_object(digest) for digest in digests["departments"]]
+        return struct_from_dict(record)
+
+    def get(self, date: str) -> list[TvGUStruct]:
+        return [self._build_struct(manifest_struct["tree"]) for manifest_struct in self._read_manifest(date)["structs"]]
+
+    # Только дни, когда структура изменилась, появилась или пропала
+    def history(self, name: str) -> list[StructVersion]:
+        return [
+            StructVersion(
+                date=entry["date"],
+                struct=None if entry["tree"] is None else self._build_struct(entry["tree"]),
+            )
+            for entry in self._read_history().get(name, [])
+        ]
+
+    # Выгрузки `structs-YYYY-MM-DD.json` из директории (например, parsed_structs), по порядку дат
+    def import_dumps(self, dumps_directory: Union[str, Path]) -> list[ArchivePutStats]:
+        stats: list[ArchivePutStats] = []
+
+        for dump_path in sorted(Path(dumps_directory).glob(DUMP_GLOB)):
+            match: Optional[re.Match] = DUMP_DATE_PATTERN.search(dump_path.name)
+
+            if match is not None:
+                stats.append(self.put_records(match.group(1), load_structs_dump(dump_path)))
+
+        return stats
+
+
+def append_history(history: dict[str, list[HistoryEntry]], date: str, manifest_structs: list[dict[str, Any]]) -> None:
+    present: set[str] = set()
+
+    for manifest_struct in manifest_structs:
+        present.add(manifest_struct["name"])
+        entries: list[HistoryEntry] = history.setdefault(manifest_struct["name"], [])
+
+        if not entries or entries[-1]["tree"] != manifest_struct["tree"]:
+            entries.append({"date": date, "tree": manifest_struct["tree"]})
+
+    for name, entries in history.items():
+        if name not in present and entries[-1]["tree"] is not None:
+            entries.append({"date": date, "tree": None})
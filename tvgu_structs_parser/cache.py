@@ -0,0 +1,301 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+from dataclasses import dataclass, asdict, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Any, Callable, TypeVar, Union, Awaitable
+
+from .config import CACHE_MAX_SIZE_BYTES, CACHE_MAX_AGE_SECONDS, PARSER_VERSION
+
+T = TypeVar("T")
+
+BODY_SUFFIX: str = ".body"
+META_SUFFIX: str = ".meta.json"
+PARSED_SUFFIX: str = ".parsed.pickle"
+
+
+@dataclass(kw_only=True)
+class CacheStats:
+    # Ответ 304: тело взято из кэша
+    hits: int = 0
+    # Полная загрузка (записи не было или источник изменился)
+    misses: int = 0
+    parsed_hits: int = 0
+    parsed_misses: int = 0
+    evictions: int = 0
+
+
+@dataclass(kw_only=True)
+class CacheEntry:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    charset: Optional[str]
+    digest: str
+    size: int
+    stored_at: float
+    validated_at: float
+    accessed_at: float
+    parsed_key: Optional[str] = None
+    parsed_size: int = 0
+
+
+def get_payload_digest(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+# Хэш версии парсеров и полей датаклассов (имя и аннотация каждого, по порядку). Датакласс со `slots` распаковывается
+# из pickle по порядку слотов: без полей в ключе изменённый класс получил бы значения не в те поля
+def get_records_fingerprint(parser_version: int, record_classes: tuple[type, ...]) -> str:
+    described: tuple = (parser_version, tuple(
+        (record_class.__module__, record_class.__qualname__,
+         tuple((record_field.name, str(record_field.type)) for record_field in fields(record_class)))
+        for record_class in record_classes
+    ))
+    return hashlib.sha256(repr(described).encode()).hexdigest()[:16]
+
+
+# Всё, что может лежать в сохранённых результатах разбора (`SourceCache`, `LastGoodStore`).
+# Парсеры импортируются здесь, а не в начале модуля: кэш ответов не должен платить за их импорт
+@lru_cache(maxsize=None)
+def get_parsed_fingerprint() -> str:
+    from .normalizer import TvGUStruct
+    from .parsers.parser_all_groups import StructInfoGroups
+    from .parsers.parser_structs import StructInfo, Department
+    from .parsers.parser_structs_api import StructInfoAPI
+    from .parsers.parser_structs_tversu_page import StructInfoTversu
+
+    return get_records_fingerprint(
+        PARSER_VERSION, (StructInfo, Department, StructInfoTversu, StructInfoAPI, StructInfoGroups, TvGUStruct)
+    )
+
+
+# Кэш сырых ответов источников с валидаторами (ETag / Last-Modified) и уже распарсенных результатов
+class SourceCache:
+    def __init__(
+            self,
+            directory: Union[str, Path],
+            max_size_bytes: int = CACHE_MAX_SIZE_BYTES,
+            max_age_seconds: float = CACHE_MAX_AGE_SECONDS
+    ) -> None:
+        self.directory: Path = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes: int = max_size_bytes
+        self.max_age_seconds: float = max_age_seconds
+        self.stats: CacheStats = CacheStats()
+
+    def _path(self, url: str, suffix: str) -> Path:
+        return self.directory / (hashlib.sha1(url.encode()).hexdigest() + suffix)
+
+    def _read_entry(self, url: str) -> Optional[CacheEntry]:
+        try:
+            meta: dict = json.loads(self._path(url, META_SUFFIX).read_text(encoding="UTF-8"))
+        except (OSError, ValueError):
+            return None
+
+        try:
+            return CacheEntry(**meta)
+        except TypeError:
+            return None
+
+    def _write_entry(self, entry: CacheEntry) -> None:
+        write_atomic(self._path(entry.url, META_SUFFIX), json.dumps(asdict(entry)).encode())
+
+    def _drop(self, url: str) -> None:
+        for suffix in (BODY_SUFFIX, META_SUFFIX, PARSED_SUFFIX):
+            self._path(url, suffix).unlink(missing_ok=True)
+
+    def _is_expired(self, entry: CacheEntry, now: float) -> bool:
+        return now - entry.validated_at > self.max_age_seconds
+
+    def get(self, url: str) -> Optional[tuple[CacheEntry, bytes]]:
+        entry: Optional[CacheEntry] = self._read_entry(url)
+
+        if entry is None:
+            return None
+
+        if self._is_expired(entry, time.time()):
+            self._drop(url)
+            self.stats.evictions += 1
+            return None
+
+        try:
+            body: bytes = self._path(url, BODY_SUFFIX).read_bytes()
+        except OSError:
+            self._drop(url)
+            return None
+
+        if get_payload_digest(body) != entry.digest:
+            self._drop(url)
+            return None
+
+        return entry, body
+
+    def request_headers(self, url: str) -> dict[str, str]:
+        entry: Optional[CacheEntry] = self._read_entry(url)
+
+        if entry is None:
+            return {}
+
+        headers: dict[str, str] = {}
+
+        if entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        return headers
+
+    def put(
+            self,
+            url: str,
+            body: bytes,
+            etag: Optional[str],
+            last_modified: Optional[str],
+            charset: Optional[str]
+    ) -> CacheEntry:
+        now: float = time.time()
+        previous: Optional[CacheEntry] = self._read_entry(url)
+        digest: str = get_payload_digest(body)
+
+        entry: CacheEntry = CacheEntry(
+            url=url,
+            etag=etag,
+            last_modified=last_modified,
+            charset=charset,
+            digest=digest,
+            size=len(body),
+            stored_at=now,
+            validated_at=now,
+            accessed_at=now,
+        )
+
+        # Если тело не изменилось, распарсенный результат всё ещё валиден
+        if previous is not None and previous.digest == digest:
+            entry.parsed_key = previous.parsed_key
+            entry.parsed_size = previous.parsed_size
+        else:
+            self._path(url, PARSED_SUFFIX).unlink(missing_ok=True)
+
+        write_atomic(self._path(url, BODY_SUFFIX), body)
+        self._write_entry(entry)
+        self.stats.misses += 1
+        self.evict()
+
+        return entry
+
+    def mark_not_modified(self, url: str) -> Optional[tuple[CacheEntry, bytes]]:
+        cached: Optional[tuple[CacheEntry, bytes]] = self.get(url)
+
+        if cached is None:
+            return None
+
+        entry, body = cached
+        entry.validated_at = entry.accessed_at = time.time()
+        self._write_entry(entry)
+        self.stats.hits += 1
+
+        return entry, body
+
+    def _parsed_key(self, digest: str) -> str:
+        return f"{get_parsed_fingerprint()}:{digest}"
+
+    def get_parsed(self, url: str, digest: str) -> Optional[Any]:
+        entry: Optional[CacheEntry] = self._read_entry(url)
+
+        if entry is None or entry.parsed_key != self._parsed_key(digest):
+            return None
+
+        try:
+            with self._path(url, PARSED_SUFFIX).open("rb") as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, AttributeError, EOFError, TypeError):
+            return None
+
+    def put_parsed(self, url: str, digest: str, parsed: Any) -> None:
+        entry: Optional[CacheEntry] = self._read_entry(url)
+
+        # Кэшируем только результат для тела, которое сейчас лежит в кэше
+        if entry is None or entry.digest != digest:
+            return
+
+        data: bytes = pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL)
+        write_atomic(self._path(url, PARSED_SUFFIX), data)
+
+        entry.parsed_key = self._parsed_key(digest)
+        entry.parsed_size = len(data)
+        self._write_entry(entry)
+        self.evict()
+
+    def get_or_parse(self, url: str, digest: str, parse: Callable[[], T]) -> T:
+        parsed: Optional[T] = self.get_parsed(url, digest)
+
+        if parsed is not None:
+            self.stats.parsed_hits += 1
+            return parsed
+
+        self.stats.parsed_misses += 1
+        parsed = parse()
+        self.put_parsed(url, digest, parsed)
+
+        return parsed
+
+    # То же, но сам парсинг идёт в пуле потоков или процессов
+    async def get_or_parse_async(self, url: str, digest: str, parse: Callable[[], Awaitable[T]]) -> T:
+        parsed: Optional[T] = self.get_parsed(url, digest)
+
+        if parsed is not None:
+            self.stats.parsed_hits += 1
+            return parsed
+
+        self.stats.parsed_misses += 1
+        parsed = await parse()
+        self.put_parsed(url, digest, parsed)
+
+        return parsed
+
+    def entries(self) -> list[CacheEntry]:
+        entries: list[CacheEntry] = []
+
+        for meta_path in self.directory.glob(f"*{META_SUFFIX}"):
+            try:
+                entries.append(CacheEntry(**json.loads(meta_path.read_text(encoding="UTF-8"))))
+            except (OSError, ValueError, TypeError):
+                meta_path.unlink(missing_ok=True)
+
+        return entries
+
+    def evict(self) -> None:
+        now: float = time.time()
+        alive: list[CacheEntry] = []
+
+        for entry in self.entries():
+            if self._is_expired(entry, now):
+                self._drop(entry.url)
+                self.stats.evictions += 1
+            else:
+                alive.append(entry)
+
+        total_size: int = sum(entry.size + entry.parsed_size for entry in alive)
+
+        # Сначала выкидываем давно не использовавшиеся записи
+        for entry in sorted(alive, key=lambda cached_entry: cached_entry.accessed_at):
+            if total_size <= self.max_size_bytes:
+                break
+
+            self._drop(entry.url)
+            self.stats.evictions += 1
+            total_size -= entry.size + entry.parsed_size
+
+    def clear(self) -> None:
+        for entry in self.entries():
+            self._drop(entry.url)
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    tmp_path: Path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
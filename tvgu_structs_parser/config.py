@@ -1,5 +1,5 @@
 import re
-from typing import Final
+from typing import Final, Optional
 
 STRUCTS_PAGE_URL: Final[str] = "https://tversu.ru/sveden/struct"
 STRUCTS_API_URL: Final[str] = "https://abiturient.tversu.ru/api/catalog/faculties"
@@ -7,14 +7,111 @@ STRUCTS_TVERSU_PAGE_URL: Final[str] = "https://tversu.ru/pages/2182"
 # Единственный известный мне эндпоинт, где есть коды структур (в названиях групп, например, "ПМиК", "М", "ИСТ" и т.д.)
 ALL_GROUPS_API_URL: Final[str] = "https://timetable.tversu.ru/api/v3/groups"
 
+# Параметры общего пула соединений (см. `StructsClient`)
+CONNECTOR_LIMIT: Final[int] = 16
+CONNECTOR_LIMIT_PER_HOST: Final[int] = 4
+CONNECTOR_DNS_CACHE_TTL: Final[int] = 300
+CONNECTOR_KEEPALIVE_TIMEOUT: Final[float] = 60.0
+
+# Таймауты загрузки источников (см. `FetchPolicy`): на соединение и на паузу между кусками ответа
+FETCH_CONNECT_TIMEOUT_SECONDS: Final[float] = 10.0
+FETCH_READ_TIMEOUT_SECONDS: Final[float] = 30.0
+# HTML-страницы tversu.ru отдаются дольше API
+FETCH_READ_TIMEOUTS_SECONDS: Final[dict[str, float]] = {
+    STRUCTS_PAGE_URL: 60.0,
+    STRUCTS_TVERSU_PAGE_URL: 60.0,
+    STRUCTS_API_URL: 20.0,
+    ALL_GROUPS_API_URL: 30.0,
+}
+# Повторы при обрывах, таймаутах и ответах 5xx / 429: пауза случайная, от 0 до BASE * 2^попытка, но не больше MAX
+FETCH_RETRIES: Final[int] = 3
+FETCH_BACKOFF_BASE_SECONDS: Final[float] = 0.5
+FETCH_BACKOFF_MAX_SECONDS: Final[float] = 10.0
+# Дублирующий запрос, если ответа нет дольше этого перцентиля прошлых загрузок источника. None – выключено
+FETCH_HEDGE_PERCENTILE: Final[Optional[float]] = None
+# Сколько прошлых загрузок нужно, чтобы перцентилю можно было верить
+FETCH_HEDGE_MIN_SAMPLES: Final[int] = 10
+FETCH_LATENCY_WINDOW: Final[int] = 100
+
+# Группы расписаний разбираются потоково, по кускам ответа (только без кэша: кэшу нужно тело целиком)
+STREAM_ALL_GROUPS: Final[bool] = True
+STREAM_CHUNK_SIZE: Final[int] = 64 * 1024
+
+# Где парсить HTML-страницы, чтобы не блокировать цикл событий: "thread" или "process" (см. `create_parse_executor`)
+PARSE_EXECUTOR: Final[str] = "thread"
+# None – на усмотрение `concurrent.futures`
+PARSE_WORKERS: Final[Optional[int]] = None
+
+# Выгрузка JSON через orjson, если он установлен (см. `serialize_structs`)
+USE_ORJSON: Final[bool] = True
+SERIALIZER_BUFFER_SIZE: Final[int] = 1024 * 1024
+
+# Режим serve: адрес HTTP-сервера и расписание обновлений (к интервалу добавляется случайный разброс до JITTER)
+SERVE_HOST: Final[str] = "127.0.0.1"
+SERVE_PORT: Final[int] = 8080
+SERVE_REFRESH_INTERVAL_SECONDS: Final[float] = 6 * 60 * 60
+SERVE_REFRESH_JITTER_SECONDS: Final[float] = 5 * 60
+# После неудачного обновления следующая попытка раньше
+SERVE_RETRY_INTERVAL_SECONDS: Final[float] = 10 * 60
+
+# Последние удачные результаты источников (см. `LastGoodStore`, `get_tvgu_structs_stale_ok`)
+# Столько ждём свежие данные источника, прежде чем отдать последние удачные
+STALE_FRESH_WAIT_SECONDS: Final[float] = 5.0
+# Результат моложе этого считается свежим: источник не загружается заново
+LAST_GOOD_FRESH_SECONDS: Final[float] = 5 * 60
+# Дольше этого последние удачные данные источника не отдаются: без свежих прогон упадёт, как раньше
+LAST_GOOD_MAX_AGE_SECONDS: Final[dict[str, float]] = {
+    "structs_page": 30 * 24 * 60 * 60,
+    "structs_tversu_page": 30 * 24 * 60 * 60,
+    "structs_api": 30 * 24 * 60 * 60,
+    # Группы меняются каждый семестр
+    "all_groups": 7 * 24 * 60 * 60,
+}
+
+# Проверка положений и сайтов кафедр (см. `LinkCrawler`): всего одновременных запросов, на один хост и
+# не больше запросов в секунду на хост (None – без ограничения частоты)
+ENRICH_CONCURRENCY: Final[int] = 32
+ENRICH_PER_HOST_CONCURRENCY: Final[int] = 4
+ENRICH_HOST_RATE_PER_SECOND: Final[Optional[float]] = 20.0
+ENRICH_TIMEOUT_SECONDS: Final[float] = 15.0
+# Результат проверки моложе этого не перепроверяется
+ENRICH_CACHE_MAX_AGE_SECONDS: Final[float] = 24 * 60 * 60
+
+# Сжатие записей и манифестов архива выгрузок (см. `StructsArchive`), 1–9
+ARCHIVE_COMPRESSION_LEVEL: Final[int] = 9
+
+# Сколько разобранных структур и кафедр помнить при чтении выгрузки, отображённой в память (см. `PackedStructs`)
+PACKED_MEMO_SIZE: Final[int] = 1024
+
+# Кэш ответов источников (см. `SourceCache`)
+CACHE_MAX_SIZE_BYTES: Final[int] = 64 * 1024 * 1024
+CACHE_MAX_AGE_SECONDS: Final[float] = 14 * 24 * 60 * 60
+# Версия логики парсеров: увеличивать, когда меняется результат разбора при тех же полях датаклассов.
+# Вместе с полями датаклассов входит в ключ сохранённых результатов разбора (см. `get_parsed_fingerprint`)
+PARSER_VERSION: Final[int] = 2
+
 TEACHER_FULLNAME_PATTERN: Final[re.Pattern] = re.compile(r"([a-zA-Zёа-яА-Я\-]+(?:\s+[a-zA-Zёа-яА-Я\-]*)?)"
                                                          r"\s+([a-zA-Zёа-яА-Я\-]+)\s+([a-zA-Zёа-яА-Я\-]+)")
 TEACHER_NAME_PARTS: Final[tuple[str, ...]] = ("surname", "name", "patronymic")
 
+# Построители дерева BeautifulSoup в порядке предпочтения: берётся первый установленный
+HTML_PARSER_BACKENDS: Final[tuple[str, ...]] = ("lxml", "html.parser")
+
+# Парсить со страницы структуры только нужные таблицы (см. `parse_structs_page`)
+PARTIAL_STRUCTS_PAGE_PARSING: Final[bool] = True
+
+# Сколько последних разобранных ФИО, адресов и телефонов помнить (0 – без мемоизации, см. `FieldNormalizer`)
+FIELD_MEMO_SIZE: Final[int] = 4096
+
 NON_DIGITS_PATTERN: Final[re.Pattern] = re.compile(r"\D")
 
 # Без приписок "Центральный федеральный округ, Тверская область"
 USE_SHORTER_ADDRESSES: Final[bool] = True
+# Что вырезается из адресов при USE_SHORTER_ADDRESSES (по порядку, без учёта регистра)
+ADDRESS_PARTS_TO_DROP: Final[tuple[str, ...]] = (
+    "Центральный федеральный округ, Тверская область,",
+    "Тверская область,",
+)
 
 STRUCTS_TO_SKIP: Final[tuple[str, ...]] = (
     "Аспирантура",
@@ -0,0 +1,141 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Union, Optional, Final
+
+from .cache import get_payload_digest
+from .normalizer import TvGUStruct
+from .serialization import struct_to_dict, normalize_struct_record
+
+DUMP_GLOB: Final[str] = "structs-*.json"
+
+RecordKey = tuple[str, ...]
+
+
+@dataclass(frozen=True, kw_only=True)
+class RecordsPatch:
+    added: list[dict[str, Any]]
+    # Ключи удалённых записей
+    removed: list[dict[str, str]]
+    # Изменившиеся записи целиком, в новом виде
+    changed: list[dict[str, Any]]
+    # Ключи, которые встретились в выгрузке больше одного раза: сравнивается последняя запись с таким ключом
+    duplicates: list[dict[str, str]]
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+# Разница между двумя выгрузками: структуры без кафедр, кафедры – отдельно
+@dataclass(frozen=True, kw_only=True)
+class StructsPatch:
+    base: Optional[str]
+    structs: RecordsPatch
+    departments: RecordsPatch
+
+    def is_empty(self) -> bool:
+        return self.structs.is_empty() and self.departments.is_empty()
+
+
+STRUCT_KEY_FIELDS: Final[tuple[str, ...]] = ("name",)
+DEPARTMENT_KEY_FIELDS: Final[tuple[str, ...]] = ("struct_name", "name")
+
+
+def get_record_hash(record: dict[str, Any]) -> str:
+    return get_payload_digest(
+        json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode()
+    )
+
+
+def split_struct_records(structs: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    struct_records: list[dict[str, Any]] = []
+    department_records: list[dict[str, Any]] = []
+
+    for struct in structs:
+        struct_records.append({field: value for field, value in struct.items() if field != "departments"})
+        department_records.extend(struct["departments"])
+
+    return struct_records, department_records
+
+
+# Повторный ключ не ошибка: на сайте бывают одноимённые записи, а разница должна посчитаться
+def index_records(
+        records: list[dict[str, Any]],
+        key_fields: tuple[str, ...]
+) -> tuple[dict[RecordKey, dict[str, Any]], list[RecordKey]]:
+    indexed: dict[RecordKey, dict[str, Any]] = {}
+    duplicates: list[RecordKey] = []
+
+    for record in records:
+        key: RecordKey = tuple(record[field] for field in key_fields)
+
+        if key in indexed and key not in duplicates:
+            duplicates.append(key)
+
+        indexed[key] = record
+
+    return indexed, duplicates
+
+
+def diff_records(
+        previous: list[dict[str, Any]],
+        current: list[dict[str, Any]],
+        key_fields: tuple[str, ...]
+) -> RecordsPatch:
+    previous_by_key, previous_duplicates = index_records(previous, key_fields)
+    current_by_key, current_duplicates = index_records(current, key_fields)
+
+    added: list[dict[str, Any]] = []
+    changed: list[dict[str, Any]] = []
+
+    for key, record in current_by_key.items():
+        previous_record: Optional[dict[str, Any]] = previous_by_key.get(key)
+
+        if previous_record is None:
+            added.append(record)
+        # Совпавшие по хэшу записи дальше не сравниваются
+        elif get_record_hash(previous_record) != get_record_hash(record):
+            changed.append(record)
+
+    return RecordsPatch(
+        added=added,
+        removed=[dict(zip(key_fields, key)) for key in previous_by_key if key not in current_by_key],
+        changed=changed,
+        duplicates=[
+            dict(zip(key_fields, key))
+            for key in dict.fromkeys(previous_duplicates + current_duplicates)
+        ],
+    )
+
+
+def diff_structs(
+        previous: list[dict[str, Any]],
+        current: list[TvGUStruct],
+        base: Optional[str] = None
+) -> StructsPatch:
+    # Обе стороны в одном наборе полей: поля, которых у `TvGUStruct` уже нет, не считаются изменением
+    previous_structs, previous_departments = split_struct_records(
+        [normalize_struct_record(record) for record in previous]
+    )
+    current_structs, current_departments = split_struct_records([struct_to_dict(struct) for struct in current])
+
+    return StructsPatch(
+        base=base,
+        structs=diff_records(previous_structs, current_structs, STRUCT_KEY_FIELDS),
+        departments=diff_records(previous_departments, current_departments, DEPARTMENT_KEY_FIELDS),
+    )
+
+
+# Путь к файлу или к директории с выгрузками: тогда берётся самая свежая `structs-YYYY-MM-DD.json`
+def find_previous_dump(path: Union[str, Path]) -> Optional[Path]:
+    path = Path(path)
+
+    if path.is_file():
+        return path
+
+    dumps: list[Path] = sorted(path.glob(DUMP_GLOB))
+    return dumps[-1] if dumps else None
+
+
+def load_structs_dump(dump_path: Union[str, Path]) -> list[dict[str, Any]]:
+    return json.loads(Path(dump_path).read_text(encoding="UTF-8"))
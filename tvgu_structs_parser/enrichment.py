@@ -0,0 +1,289 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, asdict, replace
+from pathlib import Path
+from typing import Optional, Literal, TypeAlias, Union, Iterator
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .cache import write_atomic
+from .config import ENRICH_CONCURRENCY, ENRICH_PER_HOST_CONCURRENCY, ENRICH_HOST_RATE_PER_SECOND, \
+    ENRICH_TIMEOUT_SECONDS, ENRICH_CACHE_MAX_AGE_SECONDS, STREAM_CHUNK_SIZE
+from .normalizer import TvGUStruct
+from .parsers.parser_structs import Department
+from .structs_requests import ConnectorConfig
+from .timings import PipelineTimings
+
+LinkKind: TypeAlias = Literal["division_clause", "website"]
+
+# Без HEAD сервер отвечает так – тогда проверяем через GET
+HEAD_UNSUPPORTED_STATUSES: frozenset[int] = frozenset({405, 501})
+LINK_CHECK_SUFFIX: str = ".link.json"
+
+
+@dataclass(frozen=True, kw_only=True)
+class LinkCheck:
+    url: str
+    kind: LinkKind
+    # None – сервер не ответил (ошибка соединения, таймаут)
+    status: Optional[int]
+    reachable: bool
+    content_type: Optional[str] = None
+    size: Optional[int] = None
+    last_modified: Optional[str] = None
+    etag: Optional[str] = None
+    # SHA-256 содержимого, только для положений о кафедрах
+    digest: Optional[str] = None
+    error: Optional[str] = None
+    checked_at: float
+
+
+@dataclass(frozen=True, kw_only=True)
+class DepartmentLinks:
+    struct_name: str
+    name: str
+    division_clause: Optional[LinkCheck]
+    website: Optional[LinkCheck]
+
+
+def website_url(website: str) -> str:
+    return website if "://" in website else f"https://{website}"
+
+
+# Результаты проверок по URL, по файлу на ссылку (как в `SourceCache`)
+class LinkCheckCache:
+    def __init__(self, directory: Union[str, Path], max_age_seconds: float = ENRICH_CACHE_MAX_AGE_SECONDS) -> None:
+        self.directory: Path = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_age_seconds: float = max_age_seconds
+
+    def _path(self, url: str) -> Path:
+        return self.directory / (hashlib.sha1(url.encode()).hexdigest() + LINK_CHECK_SUFFIX)
+
+    def get(self, url: str) -> Optional[LinkCheck]:
+        try:
+            return LinkCheck(**json.loads(self._path(url).read_text(encoding="UTF-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def is_fresh(self, check: LinkCheck) -> bool:
+        return time.time() - check.checked_at <= self.max_age_seconds
+
+    def put(self, check: LinkCheck) -> None:
+        write_atomic(self._path(check.url), json.dumps(asdict(check)).encode())
+
+
+# Не чаще `rate` запросов в секунду на хост: каждый запрос занимает следующий свободный интервал
+class HostRateLimiter:
+    def __init__(self, rate: Optional[float]) -> None:
+        self.interval: float = 0.0 if not rate else 1 / rate
+        self._next_slot: dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        if not self.interval:
+            return
+
+        now: float = asyncio.get_running_loop().time()
+        slot: float = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+@dataclass(kw_only=True)
+class CrawlStats:
+    requests: int = 0
+    head_requests: int = 0
+    cache_hits: int = 0
+    # Положение не изменилось по HEAD (ETag / Last-Modified / размер): повторно не скачивалось
+    not_modified: int = 0
+
+
+# Проверяет ссылки кафедр, не перегружая tversu.ru: общий предел одновременных запросов, предел на хост и
+# ограничение частоты. Сначала HEAD; положение скачивается (потоково, ради хэша), только если оно изменилось.
+# Пул соединений свой, по размеру `concurrency` и `per_host_concurrency`: пул `StructsClient` меньше и урезал бы их.
+# Переданную `session` crawler не закрывает, её пул должен быть не меньше этих пределов
+class LinkCrawler:
+    def __init__(
+            self,
+            cache: Optional[LinkCheckCache] = None,
+            concurrency: int = ENRICH_CONCURRENCY,
+            per_host_concurrency: int = ENRICH_PER_HOST_CONCURRENCY,
+            host_rate: Optional[float] = ENRICH_HOST_RATE_PER_SECOND,
+            timeout: float = ENRICH_TIMEOUT_SECONDS,
+            session: Optional[aiohttp.ClientSession] = None
+    ) -> None:
+        self.connector_config: ConnectorConfig = ConnectorConfig(limit=concurrency, limit_per_host=per_host_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = session
+        self._owns_session: bool = session is None
+        self.cache: Optional[LinkCheckCache] = cache
+        self.per_host_concurrency: int = per_host_concurrency
+        self.timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(total=timeout)
+        self.stats: CrawlStats = CrawlStats()
+        self._slots: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self._rate_limiter: HostRateLimiter = HostRateLimiter(host_rate)
+        # Одна проверка на URL, даже если ссылка встречается у нескольких кафедр
+        self._checks: dict[str, asyncio.Task] = {}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=self.connector_config.create_connector())
+            self._owns_session = True
+        return self._session
+
+    async def close(self) -> None:
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "LinkCrawler":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def check(self, url: str, kind: LinkKind) -> asyncio.Task:
+        task: Optional[asyncio.Task] = self._checks.get(url)
+
+        if task is None:
+            task = self._checks[url] = asyncio.create_task(self._check_cached(url, kind))
+
+        return task
+
+    async def _check_cached(self, url: str, kind: LinkKind) -> LinkCheck:
+        cached: Optional[LinkCheck] = None if self.cache is None else self.cache.get(url)
+
+        if cached is not None and self.cache.is_fresh(cached):
+            self.stats.cache_hits += 1
+            return cached
+
+        check: LinkCheck = await self._check_limited(url, kind, cached)
+
+        if self.cache is not None:
+            self.cache.put(check)
+
+        return check
+
+    async def _check_limited(self, url: str, kind: LinkKind, cached: Optional[LinkCheck]) -> LinkCheck:
+        host: str = urlsplit(url).netloc
+        host_slots: asyncio.Semaphore = self._host_slots.setdefault(
+            host, asyncio.Semaphore(self.per_host_concurrency)
+        )
+
+        async with self._slots, host_slots:
+            try:
+                return await self._check(url, kind, host, cached)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as error:
+                return LinkCheck(url=url, kind=kind, status=None, reachable=False,
+                                 error=f"{type(error).__name__}: {error}", checked_at=time.time())
+
+    async def _request(self, method: str, url: str, host: str) -> aiohttp.ClientResponse:
+        await self._rate_limiter.wait(host)
+        self.stats.requests += 1
+        self.stats.head_requests += method == "HEAD"
+        return await self.session.request(method, url, timeout=self.timeout, allow_redirects=True)
+
+    async def _check(self, url: str, kind: LinkKind, host: str, cached: Optional[LinkCheck]) -> LinkCheck:
+        async with await self._request("HEAD", url, host) as response:
+            head: LinkCheck = response_check(url, kind, response)
+
+        if head.status in HEAD_UNSUPPORTED_STATUSES:
+            return await self._get(url, kind, host, read_body=kind == "division_clause")
+
+        if kind == "website" or not head.reachable:
+            return head
+
+        if cached is not None and cached.digest is not None and is_same_document(cached, head):
+            self.stats.not_modified += 1
+            return replace(cached, checked_at=head.checked_at)
+
+        return await self._get(url, kind, host, read_body=True)
+
+    async def _get(self, url: str, kind: LinkKind, host: str, read_body: bool) -> LinkCheck:
+        async with await self._request("GET", url, host) as response:
+            check: LinkCheck = response_check(url, kind, response)
+
+            if not read_body or not check.reachable:
+                return check
+
+            digest, size = await hash_content(response)
+
+        return replace(check, digest=digest, size=size)
+
+
+def response_check(url: str, kind: LinkKind, response: aiohttp.ClientResponse) -> LinkCheck:
+    return LinkCheck(
+        url=url,
+        kind=kind,
+        status=response.status,
+        reachable=response.status < 400,
+        content_type=response.headers.get("Content-Type"),
+        size=response.content_length,
+        last_modified=response.headers.get("Last-Modified"),
+        etag=response.headers.get("ETag"),
+        checked_at=time.time(),
+    )
+
+
+# Сравниваем по самому надёжному из валидаторов, которые отдал сервер
+def is_same_document(cached: LinkCheck, head: LinkCheck) -> bool:
+    if head.etag is not None:
+        return head.etag == cached.etag
+    if head.last_modified is not None:
+        return head.last_modified == cached.last_modified and head.size == cached.size
+    return False
+
+
+async def hash_content(response: aiohttp.ClientResponse) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size: int = 0
+
+    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+
+    return digest.hexdigest(), size
+
+
+def iter_departments(structs: list[TvGUStruct]) -> Iterator[Department]:
+    for struct in structs:
+        yield from struct.departments
+
+
+async def enrich_departments(
+        structs: list[TvGUStruct],
+        crawler: LinkCrawler,
+        timings: Optional[PipelineTimings] = None
+) -> list[DepartmentLinks]:
+    async def enrich(department: Department) -> DepartmentLinks:
+        clause: Optional[asyncio.Task] = None if department.division_clause_url is None \
+            else crawler.check(department.division_clause_url, "division_clause")
+        website: Optional[asyncio.Task] = None if department.website is None \
+            else crawler.check(website_url(department.website), "website")
+
+        return DepartmentLinks(
+            struct_name=department.struct_name,
+            name=department.name,
+            division_clause=None if clause is None else await clause,
+            website=None if website is None else await website,
+        )
+
+    if timings is None:
+        return list(await asyncio.gather(*map(enrich, iter_departments(structs))))
+
+    with timings.measure("enrichment", cpu=False) as probe:
+        enriched: list[DepartmentLinks] = list(await asyncio.gather(*map(enrich, iter_departments(structs))))
+        probe.records = len(enriched)
+
+    return enriched
+
+
+def write_enrichment(enriched: list[DepartmentLinks], output_path: Union[str, Path], prettify: bool = False) -> None:
+    with open(output_path, "w", encoding="UTF-8") as file:
+        json.dump([asdict(links) for links in enriched], file, ensure_ascii=False, indent=2 if prettify else None)
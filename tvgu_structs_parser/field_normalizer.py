@@ -0,0 +1,157 @@
+import re
+from typing import Optional, Final, Iterable
+
+from .config import STRUCTS_TO_SKIP, NON_DIGITS_PATTERN, TEACHER_FULLNAME_PATTERN, TEACHER_NAME_PARTS, \
+    USE_SHORTER_ADDRESSES, ADDRESS_PARTS_TO_DROP, FIELD_MEMO_SIZE
+from .memo import LRUMemo, MemoStats
+
+PHONE_TRANSLATION: Final[dict[int, str]] = str.maketrans({
+    "\xa0": "",
+    " ": "",
+    "+": "",
+    "-": "",
+    "(": "",
+    ")": "",
+})
+EMPTY_BOSS_NAME: Final[dict[str, Optional[str]]] = {part: None for part in TEACHER_NAME_PARTS}
+
+PhonesNCodes = tuple[Optional[tuple[str, ...]], Optional[tuple[str, ...]]]
+
+
+def truly_capitalize(word: Optional[str]) -> str:
+    if not word:
+        return ""
+    return word[0].upper() + word[1:]
+
+
+# Всё, что хелперы из `misc.py` раньше собирали на каждый вызов, готовится один раз:
+# регулярки разделителей, таблица для телефонов, общий матчер пропускаемых структур, сокращения адресов.
+# Методы `*_column` разбирают целый столбец таблицы за один вызов.
+# ФИО, адреса и телефоны у кафедр часто повторяются, поэтому их разбор мемоизирован (`memo_stats`).
+# Экземпляр `FIELD_NORMALIZER` живёт всё время процесса, так что в режиме serve мемоизация переживает обновления
+class FieldNormalizer:
+    def __init__(
+            self,
+            structs_to_skip: Iterable[str] = STRUCTS_TO_SKIP,
+            address_parts_to_drop: Iterable[str] = ADDRESS_PARTS_TO_DROP,
+            shorten_addresses: bool = USE_SHORTER_ADDRESSES,
+            memo_size: int = FIELD_MEMO_SIZE
+    ) -> None:
+        skip_names: list[str] = [name.lower() for name in structs_to_skip]
+        self.skip_pattern: Optional[re.Pattern] = re.compile(
+            "|".join(map(re.escape, skip_names))
+        ) if skip_names else None
+        self.address_patterns: tuple[re.Pattern, ...] = tuple(
+            re.compile(re.escape(part), re.IGNORECASE) for part in address_parts_to_drop
+        ) if shorten_addresses else ()
+        self._split_patterns: dict[tuple[str, ...], re.Pattern] = {}
+        self._teacher_name_parts: LRUMemo[str, tuple[str, ...]] = LRUMemo(self._parse_teacher_name_parts, memo_size)
+        self._addresses: LRUMemo[str, tuple[Optional[str], str]] = LRUMemo(self._parse_address, memo_size)
+        self._phones: LRUMemo[Optional[str], PhonesNCodes] = LRUMemo(self._parse_phones, memo_size)
+
+    def memo_stats(self) -> dict[str, MemoStats]:
+        return {
+            "teacher_name": self._teacher_name_parts.stats,
+            "address": self._addresses.stats,
+            "phones": self._phones.stats,
+        }
+
+    def clear_memo(self) -> None:
+        self._teacher_name_parts.clear()
+        self._addresses.clear()
+        self._phones.clear()
+
+    def _split_pattern(self, splitters: tuple[str, ...]) -> re.Pattern:
+        pattern: Optional[re.Pattern] = self._split_patterns.get(splitters)
+
+        if pattern is None:
+            # Разделители внутри скобок не считаются
+            pattern = re.compile(r"(?:%s)(?![^()]*\))" % "|".join(map(re.escape, splitters)))
+            self._split_patterns[splitters] = pattern
+
+        return pattern
+
+    def split_n_clean(self, text: str, *splitters: str) -> list[str]:
+        splitted: list[str] = self._split_pattern(splitters).split(text) if splitters else [text]
+        return [part for part in (truly_capitalize(job.strip().strip("/")) for job in splitted) if part]
+
+    def is_struct_skipping(self, struct_name: str) -> bool:
+        return self.skip_pattern is not None and self.skip_pattern.search(struct_name.lower()) is not None
+
+    @staticmethod
+    def is_missing(value: str) -> bool:
+        lowered: str = value.lower()
+        return lowered == "нет" or "отсутствует" in lowered
+
+    def shorten_address(self, address: str) -> str:
+        for pattern in self.address_patterns:
+            address = pattern.sub("", address).strip()
+        return address
+
+    def parse_phone(self, phone_l: str) -> str:
+        return phone_l.replace("Телефон:", "").split("доб")[0].translate(PHONE_TRANSLATION).strip()
+
+    @staticmethod
+    def _parse_teacher_name_parts(boss_name: str) -> tuple[str, ...]:
+        return tuple(part.capitalize() for part in TEACHER_FULLNAME_PATTERN.findall(boss_name)[0])
+
+    # Словарь собирается заново: закэшированное значение не должно меняться снаружи
+    def parse_teacher_name(self, boss_name: str) -> dict[str, str]:
+        return dict(zip(TEACHER_NAME_PARTS, self._teacher_name_parts(boss_name)))
+
+    def parse_boss_name(self, boss_name: str) -> dict[str, Optional[str]]:
+        if self.is_missing(boss_name):
+            return dict(EMPTY_BOSS_NAME)
+        return self.parse_teacher_name(boss_name)
+
+    @staticmethod
+    def _parse_address(address_text: str) -> tuple[Optional[str], str]:
+        address_splitted: list[str] = address_text.strip().split(",", 1)
+
+        postal_code: Optional[str] = None
+
+        if len(address_splitted) == 1:
+            address_str: Optional[str] = address_splitted[0]
+        else:
+            postal_code, address_str = address_splitted
+
+        return None if postal_code is None else postal_code.strip(), address_str.strip()
+
+    def parse_address_n_postal_code(self, address_text: Optional[str]) -> tuple[Optional[str], Optional[str]]:
+        return self._addresses(address_text)
+
+    def _parse_phones(self, phones_text: Optional[str]) -> PhonesNCodes:
+        if not phones_text:
+            return None, None
+
+        phones: list[str] = []
+        additional_codes: list[Optional[str]] = []
+
+        for phone_text in self.split_n_clean(phones_text.lower(), ",", ";"):
+            phone, *rest = [NON_DIGITS_PATTERN.sub("", phone_part) for phone_part in phone_text.split("доб")]
+
+            phones.append(phone)
+            additional_codes.append(rest[0] if phone and rest else None)
+
+        return tuple(phones), tuple(additional_codes)
+
+    def parse_phones_n_additional_codes(self, phones_text: Optional[str]) -> PhonesNCodes:
+        return self._phones(phones_text)
+
+    def boss_names_column(self, boss_names: list[str]) -> list[dict[str, Optional[str]]]:
+        return [self.parse_boss_name(boss_name) for boss_name in boss_names]
+
+    def addresses_column(self, address_texts: list[str]) -> list[tuple[Optional[str], str]]:
+        parsed: list[tuple[Optional[str], str]] = []
+
+        for address_text in address_texts:
+            postal_code, address = self.parse_address_n_postal_code(address_text)
+            parsed.append((postal_code, self.shorten_address(address)))
+
+        return parsed
+
+    def phones_column(self, phones_texts: list[Optional[str]]) -> list[PhonesNCodes]:
+        return [self.parse_phones_n_additional_codes(phones_text) for phones_text in phones_texts]
+
+
+FIELD_NORMALIZER: Final[FieldNormalizer] = FieldNormalizer()
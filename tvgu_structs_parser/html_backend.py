@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Optional, TYPE_CHECKING
+
+from .config import HTML_PARSER_BACKENDS
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, SoupStrainer
+
+# Модуль, без которого построитель дерева недоступен
+BACKEND_MODULES: dict[str, Optional[str]] = {
+    "lxml": "lxml",
+    "html5lib": "html5lib",
+    "html.parser": None,
+}
+
+
+def is_backend_available(backend: str) -> bool:
+    if backend not in BACKEND_MODULES:
+        raise ValueError(f"Неизвестный HTML-бэкенд: {backend}")
+
+    module: Optional[str] = BACKEND_MODULES[backend]
+    return module is None or find_spec(module) is not None
+
+
+def available_backends() -> list[str]:
+    return [backend for backend in BACKEND_MODULES if is_backend_available(backend)]
+
+
+# Первый установленный из HTML_PARSER_BACKENDS; "html.parser" есть всегда
+@lru_cache(maxsize=None)
+def get_default_backend() -> str:
+    for backend in HTML_PARSER_BACKENDS:
+        if is_backend_available(backend):
+            return backend
+    return "html.parser"
+
+
+def make_soup(markup: str, backend: Optional[str] = None, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    if backend is None:
+        backend = get_default_backend()
+    elif not is_backend_available(backend):
+        raise ValueError(f"HTML-бэкенд {backend} не установлен")
+
+    # bs4 импортируется при первом разборе HTML, а не при импорте пакета
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(markup, backend, parse_only=parse_only)
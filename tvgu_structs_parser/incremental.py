@@ -0,0 +1,200 @@
+from collections import defaultdict
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
+from threading import Lock
+from typing import Optional, Any, Callable, Awaitable, Iterator, TypeVar, TYPE_CHECKING
+
+from .normalizer import TvGUStruct, iter_normalized_structs
+from .parsers.parser_all_groups import StructInfoGroups
+from .parsers.parser_structs import Department, StructInfo
+from .parsers.parser_structs_api import StructInfoAPI
+from .parsers.parser_structs_tversu_page import StructInfoTversu
+
+if TYPE_CHECKING:
+    from .parser import ParsedSources
+    from .structs_requests import SourcePayload
+
+T = TypeVar("T")
+
+
+@dataclass(kw_only=True)
+class IncrementalStats:
+    # Тело источника изменилось (или прогон первый) – источник разобран
+    sources_parsed: int = 0
+    # Тело то же, что в прошлом прогоне: взят прошлый результат разбора
+    sources_reused: int = 0
+    # Входные записи структуры изменились – `TvGUStruct` собрана заново
+    structs_rebuilt: int = 0
+    structs_reused: int = 0
+
+
+# Всё, из чего собирается одна `TvGUStruct`
+@dataclass(kw_only=True, slots=True)
+class StructInputs:
+    struct: Optional[StructInfo] = None
+    struct_tversu: Optional[StructInfoTversu] = None
+    struct_from_api: Optional[StructInfoAPI] = None
+    struct_from_groups: Optional[StructInfoGroups] = None
+    departments: list[Department] = field(default_factory=list)
+
+
+# Отпечаток входных записей структуры: значения всех полей каждой записи. `__eq__` у `StructInfo` сравнивает
+# не все поля, а хэш repr в несколько раз дольше самой сборки структуры – кортежи сравниваются точно и быстро
+InputsFingerprint = tuple[Any, ...]
+
+_RECORD_GETTERS: dict[type, attrgetter] = {}
+
+
+def get_record_values(record: Optional[Any]) -> Optional[tuple[Any, ...]]:
+    if record is None:
+        return None
+
+    getter: Optional[attrgetter] = _RECORD_GETTERS.get(type(record))
+
+    if getter is None:
+        getter = _RECORD_GETTERS[type(record)] = attrgetter(*(record_field.name for record_field in fields(record)))
+
+    return getter(record)
+
+
+def get_inputs_fingerprint(inputs: "StructInputs") -> InputsFingerprint:
+    return (
+        get_record_values(inputs.struct),
+        get_record_values(inputs.struct_tversu),
+        get_record_values(inputs.struct_from_api),
+        get_record_values(inputs.struct_from_groups),
+        tuple(get_record_values(department) for department in inputs.departments),
+    )
+
+
+# Результат разбора неизменившегося источника берётся из прошлого прогона, и его записи – те же объекты.
+# Если все входные записи структуры – те же объекты, что в прошлый раз, отпечаток не считается
+def is_same_inputs(inputs: StructInputs, previous: StructInputs) -> bool:
+    return inputs.struct is previous.struct and inputs.struct_tversu is previous.struct_tversu \
+        and inputs.struct_from_api is previous.struct_from_api \
+        and inputs.struct_from_groups is previous.struct_from_groups \
+        and len(inputs.departments) == len(previous.departments) \
+        and all(department is previous_department
+                for department, previous_department in zip(inputs.departments, previous.departments))
+
+
+@dataclass(frozen=True, kw_only=True)
+class JoinedStruct:
+    inputs: StructInputs
+    fingerprint: InputsFingerprint
+    struct: TvGUStruct
+
+
+# В том же порядке, что и `iter_normalized_structs`: кафедры, затем источники структур
+def group_struct_inputs(parsed: "ParsedSources") -> dict[str, StructInputs]:
+    inputs: defaultdict[str, StructInputs] = defaultdict(StructInputs)
+
+    for department in parsed.departments:
+        inputs[department.struct_name].departments.append(department)
+
+    for struct in parsed.structs:
+        inputs[struct.name].struct = struct
+
+    for struct in parsed.structs_tversu:
+        inputs[struct.name].struct_tversu = struct
+
+    for struct in parsed.structs_from_api:
+        inputs[struct.name].struct_from_api = struct
+
+    for struct in parsed.structs_from_groups:
+        inputs[struct.name].struct_from_groups = struct
+
+    return dict(inputs)
+
+
+# Состояние между прогонами долгоживущего процесса (serve): источник с тем же телом ответа не разбирается заново,
+# а `TvGUStruct` пересобирается, только если изменились её входные записи; остальные берутся из прошлого прогона.
+# В отличие от `SourceCache`, всё хранится в памяти и не требует директории кэша
+class IncrementalState:
+    def __init__(self) -> None:
+        self.stats: IncrementalStats = IncrementalStats()
+        # URL источника -> хэш тела и результат разбора
+        self._payloads: dict[str, tuple[str, Any]] = {}
+        # Название структуры -> входные записи, их отпечаток и собранная структура
+        self._structs: dict[str, JoinedStruct] = {}
+        self._lock: Lock = Lock()
+
+    def _get_parsed(self, payload: "SourcePayload") -> Optional[Any]:
+        with self._lock:
+            digest, parsed = self._payloads.get(payload.url, (None, None))
+
+            if digest == payload.digest:
+                self.stats.sources_reused += 1
+                return parsed
+
+            self.stats.sources_parsed += 1
+            return None
+
+    def _put_parsed(self, payload: "SourcePayload", parsed: Any) -> None:
+        with self._lock:
+            self._payloads[payload.url] = (payload.digest, parsed)
+
+    # Подходит как `parse_payload` для `parse_all_sources`
+    def parse_payload(self, payload: "SourcePayload", parse: Callable[["SourcePayload"], T]) -> T:
+        parsed: Optional[T] = self._get_parsed(payload)
+
+        if parsed is None:
+            parsed = parse(payload)
+            self._put_parsed(payload, parsed)
+
+        return parsed
+
+    # То же, но сам разбор идёт в пуле или через `SourceCache`
+    async def parse_payload_async(self, payload: "SourcePayload", parse: Callable[[], Awaitable[T]]) -> T:
+        parsed: Optional[T] = self._get_parsed(payload)
+
+        if parsed is None:
+            parsed = await parse()
+            self._put_parsed(payload, parsed)
+
+        return parsed
+
+    def _get_fingerprint(self, name: str, inputs: StructInputs) -> InputsFingerprint:
+        previous: Optional[JoinedStruct] = self._structs.get(name)
+
+        if previous is not None and is_same_inputs(inputs, previous.inputs):
+            return previous.fingerprint
+        return get_inputs_fingerprint(inputs)
+
+    def _get_joined(self, name: str, inputs: StructInputs) -> tuple[JoinedStruct, bool]:
+        fingerprint: InputsFingerprint = self._get_fingerprint(name, inputs)
+        previous: Optional[JoinedStruct] = self._structs.get(name)
+
+        if previous is not None and previous.fingerprint == fingerprint:
+            return JoinedStruct(inputs=inputs, fingerprint=fingerprint, struct=previous.struct), False
+
+        # Неполные входные записи передаются как есть: `iter_normalized_structs` упадёт на них, как при полной сборке
+        struct: TvGUStruct = next(iter_normalized_structs(
+            inputs.departments,
+            [] if inputs.struct is None else [inputs.struct],
+            [] if inputs.struct_tversu is None else [inputs.struct_tversu],
+            [] if inputs.struct_from_api is None else [inputs.struct_from_api],
+            [] if inputs.struct_from_groups is None else [inputs.struct_from_groups],
+        ))
+        return JoinedStruct(inputs=inputs, fingerprint=fingerprint, struct=struct), True
+
+    # Как `iter_joined_structs`, но без проверки множеств названий: её делает вызывающий.
+    # Структуры отдаются по одной, как только собраны или взяты из прошлого прогона. Состояние и счётчики
+    # обновляются, когда отдана последняя: если потребитель остановился раньше, прошлый прогон остаётся в силе
+    def iter_join(self, parsed: "ParsedSources") -> Iterator[TvGUStruct]:
+        joined: dict[str, JoinedStruct] = {}
+        rebuilt: int = 0
+
+        for name, inputs in group_struct_inputs(parsed).items():
+            joined[name], is_rebuilt = self._get_joined(name, inputs)
+            rebuilt += is_rebuilt
+            yield joined[name].struct
+
+        with self._lock:
+            # Пропавшие структуры забываются
+            self._structs = joined
+            self.stats.structs_rebuilt += rebuilt
+            self.stats.structs_reused += len(joined) - rebuilt
+
+    def join(self, parsed: "ParsedSources") -> list[TvGUStruct]:
+        return list(self.iter_join(parsed))
@@ -0,0 +1,118 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional, TypeVar
+
+from .normalizer import TvGUStruct
+from .parsers.parser_structs import Department
+
+T = TypeVar("T")
+
+
+def normalize_key(key: Optional[str]) -> Optional[str]:
+    if key is None:
+        return None
+    return key.strip().casefold() or None
+
+
+@dataclass(frozen=True, kw_only=True)
+class IndexMaps:
+    by_name: dict[str, TvGUStruct]
+    by_group: dict[str, TvGUStruct]
+    by_code: dict[str, TvGUStruct]
+    by_shortname: dict[str, TvGUStruct]
+    department_by_email: dict[str, Department]
+    department_by_name: dict[str, Department]
+    structs_by_boss_surname: dict[str, list[TvGUStruct]]
+    departments_by_boss_surname: dict[str, list[Department]]
+
+
+def _put_first(index: dict[str, T], key: Optional[str], value: T) -> None:
+    key = normalize_key(key)
+
+    # При совпадении ключей остаётся первая запись
+    if key is not None and key not in index:
+        index[key] = value
+
+
+def _append(index: defaultdict[str, list[T]], key: Optional[str], value: T) -> None:
+    key = normalize_key(key)
+
+    if key is not None:
+        index[key].append(value)
+
+
+def build_index_maps(structs: list[TvGUStruct]) -> IndexMaps:
+    by_name: dict[str, TvGUStruct] = {}
+    by_group: dict[str, TvGUStruct] = {}
+    by_code: dict[str, TvGUStruct] = {}
+    by_shortname: dict[str, TvGUStruct] = {}
+    department_by_email: dict[str, Department] = {}
+    department_by_name: dict[str, Department] = {}
+    structs_by_boss_surname: defaultdict[str, list[TvGUStruct]] = defaultdict(list)
+    departments_by_boss_surname: defaultdict[str, list[Department]] = defaultdict(list)
+
+    for struct in structs:
+        _put_first(by_name, struct.name, struct)
+        _put_first(by_code, struct.code, struct)
+        _put_first(by_shortname, struct.shortname, struct)
+        _append(structs_by_boss_surname, struct.boss_surname, struct)
+
+        for group in struct.groups:
+            _put_first(by_group, group, struct)
+
+        for department in struct.departments:
+            _put_first(department_by_email, department.email, department)
+            _put_first(department_by_name, department.name, department)
+            _append(departments_by_boss_surname, department.boss_surname, department)
+
+    return IndexMaps(
+        by_name=by_name,
+        by_group=by_group,
+        by_code=by_code,
+        by_shortname=by_shortname,
+        department_by_email=department_by_email,
+        department_by_name=department_by_name,
+        structs_by_boss_surname=dict(structs_by_boss_surname),
+        departments_by_boss_surname=dict(departments_by_boss_surname),
+    )
+
+
+# Поиск структур и кафедр за O(1) вместо перебора всех `TvGUStruct.groups`.
+# Ключи сравниваются без учёта регистра и пробелов по краям
+class StructIndex:
+    def __init__(self, structs: Optional[list[TvGUStruct]] = None) -> None:
+        self._maps: IndexMaps = build_index_maps(structs or [])
+
+    # Новые карты строятся целиком и подменяются одним присваиванием: читатели не видят полупостроенный индекс
+    def rebuild(self, structs: list[TvGUStruct]) -> None:
+        self._maps = build_index_maps(structs)
+
+    def __len__(self) -> int:
+        return len(self._maps.by_name)
+
+    def by_name(self, name: str) -> Optional[TvGUStruct]:
+        return self._maps.by_name.get(normalize_key(name))
+
+    def by_group(self, group_name: str) -> Optional[TvGUStruct]:
+        return self._maps.by_group.get(normalize_key(group_name))
+
+    def by_code(self, code: str) -> Optional[TvGUStruct]:
+        return self._maps.by_code.get(normalize_key(code))
+
+    def by_shortname(self, shortname: str) -> Optional[TvGUStruct]:
+        return self._maps.by_shortname.get(normalize_key(shortname))
+
+    def department_by_email(self, email: str) -> Optional[Department]:
+        return self._maps.department_by_email.get(normalize_key(email))
+
+    def department_by_name(self, name: str) -> Optional[Department]:
+        return self._maps.department_by_name.get(normalize_key(name))
+
+    def struct_of_department(self, department: Department) -> Optional[TvGUStruct]:
+        return self.by_name(department.struct_name)
+
+    def structs_by_boss_surname(self, surname: str) -> list[TvGUStruct]:
+        return list(self._maps.structs_by_boss_surname.get(normalize_key(surname), ()))
+
+    def departments_by_boss_surname(self, surname: str) -> list[Department]:
+        return list(self._maps.departments_by_boss_surname.get(normalize_key(surname), ()))
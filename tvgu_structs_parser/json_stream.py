@@ -0,0 +1,149 @@
+import codecs
+import json
+from typing import Any, Iterator, Optional
+
+WHITESPACE: str = " \t\n\r"
+NUMBER_START: str = "-0123456789"
+
+# Состояния разбора объекта верхнего уровня
+EXPECT_OBJECT: int = 0
+EXPECT_KEY: int = 1
+EXPECT_COLON: int = 2
+EXPECT_VALUE: int = 3
+EXPECT_ITEM: int = 4
+EXPECT_ITEM_SEPARATOR: int = 5
+EXPECT_KEY_SEPARATOR: int = 6
+DONE: int = 7
+
+
+# Потоковый разбор ответа вида {"...": ..., "<key>": [{...}, {...}, ...], ...}:
+# элементы массива `key` отдаются по мере поступления кусков, остальные значения пропускаются.
+# В памяти держится только недоразобранный хвост, а не весь ответ
+class JSONArrayStreamDecoder:
+    def __init__(self, key: str) -> None:
+        self.key: str = key
+        self.found_key: bool = False
+        self._decoder: json.JSONDecoder = json.JSONDecoder()
+        self._bytes_decoder: codecs.IncrementalDecoder = codecs.getincrementaldecoder("UTF-8")()
+        self._buffer: str = ""
+        self._state: int = EXPECT_OBJECT
+        self._current_key: Optional[str] = None
+        self._final: bool = False
+
+    def feed(self, chunk: bytes) -> Iterator[Any]:
+        self._buffer += self._bytes_decoder.decode(chunk)
+        yield from self._drain()
+
+    def finish(self) -> Iterator[Any]:
+        self._buffer += self._bytes_decoder.decode(b"", final=True)
+        self._final = True
+
+        yield from self._drain()
+
+        if self._state != DONE or self._buffer.strip(WHITESPACE):
+            raise ValueError("Поток JSON оборвался или содержит лишние данные")
+
+    def _skip_whitespace(self, position: int) -> int:
+        while position < len(self._buffer) and self._buffer[position] in WHITESPACE:
+            position += 1
+        return position
+
+    # Значение целиком лежит в буфере? Иначе ждём следующий кусок
+    def _try_decode(self, position: int) -> Optional[tuple[Any, int]]:
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, position)
+        except json.JSONDecodeError:
+            return None
+
+        # Число в конце буфера могло быть обрезано куском: "12" из "123"
+        if end == len(self._buffer) and not self._final and self._buffer[position] in NUMBER_START:
+            return None
+
+        return value, end
+
+    def _expect_char(self, position: int, expected: str) -> int:
+        if self._buffer[position] != expected:
+            raise ValueError(f"Ожидался символ {expected!r}, получен {self._buffer[position]!r}")
+        return position + 1
+
+    def _drain(self) -> Iterator[Any]:
+        position: int = 0
+
+        try:
+            while True:
+                position = self._skip_whitespace(position)
+
+                if position >= len(self._buffer) or self._state == DONE:
+                    return
+
+                if self._state == EXPECT_OBJECT:
+                    position = self._expect_char(position, "{")
+                    self._state = EXPECT_KEY
+
+                elif self._state == EXPECT_KEY:
+                    if self._buffer[position] == "}":
+                        position += 1
+                        self._state = DONE
+                        continue
+
+                    decoded: Optional[tuple[Any, int]] = self._try_decode(position)
+
+                    if decoded is None:
+                        return
+
+                    self._current_key, position = decoded
+                    self._state = EXPECT_COLON
+
+                elif self._state == EXPECT_COLON:
+                    position = self._expect_char(position, ":")
+                    self._state = EXPECT_VALUE
+
+                elif self._state == EXPECT_VALUE:
+                    if self._current_key == self.key:
+                        position = self._expect_char(position, "[")
+                        self.found_key = True
+                        self._state = EXPECT_ITEM
+                        continue
+
+                    # Чужие ключи пропускаем, но значение всё равно нужно дождаться целиком
+                    decoded: Optional[tuple[Any, int]] = self._try_decode(position)
+
+                    if decoded is None:
+                        return
+
+                    position = decoded[1]
+                    self._state = EXPECT_KEY_SEPARATOR
+
+                elif self._state == EXPECT_ITEM:
+                    if self._buffer[position] == "]":
+                        position += 1
+                        self._state = EXPECT_KEY_SEPARATOR
+                        continue
+
+                    decoded: Optional[tuple[Any, int]] = self._try_decode(position)
+
+                    if decoded is None:
+                        return
+
+                    item, position = decoded
+                    self._state = EXPECT_ITEM_SEPARATOR
+
+                    yield item
+
+                elif self._state == EXPECT_ITEM_SEPARATOR:
+                    if self._buffer[position] == "]":
+                        position += 1
+                        self._state = EXPECT_KEY_SEPARATOR
+                    else:
+                        position = self._expect_char(position, ",")
+                        self._state = EXPECT_ITEM
+
+                elif self._state == EXPECT_KEY_SEPARATOR:
+                    if self._buffer[position] == "}":
+                        position += 1
+                        self._state = DONE
+                    else:
+                        position = self._expect_char(position, ",")
+                        self._state = EXPECT_KEY
+        finally:
+            self._buffer = self._buffer[position:]
@@ -0,0 +1,123 @@
+import asyncio
+import pickle
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Any, Callable, Awaitable, Union, Mapping
+
+from .cache import write_atomic, get_parsed_fingerprint
+from .config import LAST_GOOD_FRESH_SECONDS, LAST_GOOD_MAX_AGE_SECONDS
+
+LAST_GOOD_SUFFIX: str = ".last-good.pickle"
+
+
+@dataclass(frozen=True, kw_only=True)
+class StoredSource:
+    parsed: Any
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+
+# Последний удачно загруженный и разобранный результат каждого источника.
+# Держится в памяти; если задана `directory`, переживает перезапуск процесса.
+# Загрузки, запущенные через `revalidate`, доводятся до конца в фоне, даже если прогон их не дождался
+class LastGoodStore:
+    def __init__(
+            self,
+            directory: Optional[Union[str, Path]] = None,
+            fresh_seconds: float = LAST_GOOD_FRESH_SECONDS,
+            max_age_seconds: Optional[Mapping[str, float]] = None
+    ) -> None:
+        self.directory: Optional[Path] = None if directory is None else Path(directory)
+        self.fresh_seconds: float = fresh_seconds
+        self.max_age_seconds: Mapping[str, float] = LAST_GOOD_MAX_AGE_SECONDS if max_age_seconds is None \
+            else max_age_seconds
+        self.pending: dict[str, asyncio.Task] = {}
+        self._stored: dict[str, StoredSource] = {}
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, source: str) -> Path:
+        return self.directory / f"{source}{LAST_GOOD_SUFFIX}"
+
+    def _load(self, source: str) -> Optional[StoredSource]:
+        if self.directory is None:
+            return None
+
+        # Запись от других парсеров или датаклассов (см. `get_parsed_fingerprint`) и любая, что не распаковывается
+        # в `StoredSource`, считается отсутствующей: её поля могли бы оказаться не на своих местах
+        try:
+            with self._path(source).open("rb") as file:
+                fingerprint, stored = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, AttributeError, ImportError, EOFError, TypeError, ValueError):
+            return None
+
+        if fingerprint != get_parsed_fingerprint() or not isinstance(stored, StoredSource):
+            return None
+
+        return stored
+
+    def get(self, source: str) -> Optional[StoredSource]:
+        stored: Optional[StoredSource] = self._stored.get(source)
+
+        if stored is None:
+            stored = self._load(source)
+
+            if stored is not None:
+                self._stored[source] = stored
+
+        if stored is None or stored.age > self.max_age_seconds.get(source, float("inf")):
+            return None
+
+        return stored
+
+    def is_fresh(self, stored: StoredSource) -> bool:
+        return stored.age <= self.fresh_seconds
+
+    def put(self, source: str, parsed: Any) -> None:
+        stored: StoredSource = StoredSource(parsed=parsed, stored_at=time.time())
+        self._stored[source] = stored
+
+        if self.directory is not None:
+            write_atomic(
+                self._path(source), pickle.dumps((get_parsed_fingerprint(), stored), protocol=pickle.HIGHEST_PROTOCOL)
+            )
+
+    async def _load_and_put(self, source: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        parsed: Any = await load()
+        self.put(source, parsed)
+        return parsed
+
+    # Одна загрузка источника на всех: повторный вызов, пока она идёт, вернёт ту же задачу.
+    # Ошибка фоновой загрузки видна в `wait_pending`, с `show_warnings` – ещё и в stderr
+    def revalidate(self, source: str, load: Callable[[], Awaitable[Any]], show_warnings: bool = False) -> asyncio.Task:
+        task: Optional[asyncio.Task] = self.pending.get(source)
+
+        if task is None or task.done():
+            task = asyncio.create_task(self._load_and_put(source, load))
+            task.add_done_callback(lambda done_task: _report_failure(source, done_task, show_warnings))
+            self.pending[source] = task
+
+        return task
+
+    # Дождаться фоновых загрузок; по каждому источнику – удалась ли
+    async def wait_pending(self) -> dict[str, bool]:
+        pending: dict[str, asyncio.Task] = dict(self.pending)
+        await asyncio.gather(*pending.values(), return_exceptions=True)
+
+        return {
+            source: not task.cancelled() and task.exception() is None
+            for source, task in pending.items()
+        }
+
+
+# Исключение забирается всегда: иначе asyncio предупредит, что его никто не получил
+def _report_failure(source: str, task: asyncio.Task, show_warnings: bool) -> None:
+    if not task.cancelled() and task.exception() is not None and show_warnings:
+        error: BaseException = task.exception()
+        print(f"Не удалось обновить источник {source}: {type(error).__name__}: {error}", file=sys.stderr)
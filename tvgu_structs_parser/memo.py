@@ -0,0 +1,61 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Generic, TypeVar, Hashable
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass(kw_only=True)
+class MemoStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total: int = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# Ограниченная мемоизация чистой функции одного аргумента: вытесняется давно не использовавшееся.
+# Значения отдаются всем вызывающим как есть, поэтому функция должна возвращать неизменяемые объекты.
+# HTML-страницы парсятся в пуле потоков, поэтому словарь правится под блокировкой
+class LRUMemo(Generic[K, V]):
+    def __init__(self, function: Callable[[K], V], max_size: int) -> None:
+        self.function: Callable[[K], V] = function
+        self.max_size: int = max_size
+        self.stats: MemoStats = MemoStats()
+        self._values: OrderedDict[K, V] = OrderedDict()
+        self._lock: Lock = Lock()
+
+    def __call__(self, key: K) -> V:
+        if self.max_size <= 0:
+            return self.function(key)
+
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                self.stats.hits += 1
+                return self._values[key]
+
+            self.stats.misses += 1
+
+        value: V = self.function(key)
+
+        with self._lock:
+            self._values[key] = value
+
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+                self.stats.evictions += 1
+
+        return value
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from .timings import StageTiming
+
+METRICS_PREFIX: str = "tvgu_structs"
+OPENMETRICS_CONTENT_TYPE: str = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+@dataclass(kw_only=True)
+class StageTotals:
+    runs: int = 0
+    seconds: float = 0.0
+    # Счётчики появляются у этапа, только если он их сообщает
+    cpu_seconds: Optional[float] = None
+    bytes_received: Optional[int] = None
+    last_records: Optional[int] = None
+    last_peak_bytes: Optional[int] = None
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\"", r"\"").replace("\n", r"\n")
+
+
+# Накопитель метрик этапов для долгоживущего процесса: передаётся в `PipelineTimings(observers=...)`,
+# `render()` отдаёт всё накопленное в текстовом формате OpenMetrics
+class PipelineMetrics:
+    def __init__(self, prefix: str = METRICS_PREFIX) -> None:
+        self.prefix: str = prefix
+        self.stages: dict[str, StageTotals] = {}
+        self._lock: Lock = Lock()
+
+    def __call__(self, timing: StageTiming) -> None:
+        with self._lock:
+            totals: StageTotals = self.stages.setdefault(timing.stage, StageTotals())
+            totals.runs += 1
+            totals.seconds += timing.duration
+            if timing.cpu_time is not None:
+                totals.cpu_seconds = (totals.cpu_seconds or 0.0) + timing.cpu_time
+            if timing.bytes_received is not None:
+                totals.bytes_received = (totals.bytes_received or 0) + timing.bytes_received
+            if timing.records is not None:
+                totals.last_records = timing.records
+            if timing.peak_bytes is not None:
+                totals.last_peak_bytes = timing.peak_bytes
+
+    def render(self) -> str:
+        with self._lock:
+            stages: list[tuple[str, StageTotals]] = sorted(self.stages.items())
+
+        name: str = f"{self.prefix}_stage"
+        lines: list[str] = []
+
+        def family(metric: str, metric_type: str, unit: Optional[str], help_text: str) -> None:
+            lines.append(f"# TYPE {metric} {metric_type}")
+            if unit is not None:
+                lines.append(f"# UNIT {metric} {unit}")
+            lines.append(f"# HELP {metric} {help_text}")
+
+        family(f"{name}_duration_seconds", "summary", "seconds", "Время этапов загрузки, парсинга и нормализации")
+        for stage, totals in stages:
+            label: str = f'{{stage="{escape_label(stage)}"}}'
+            lines.append(f"{name}_duration_seconds_count{label} {totals.runs}")
+            lines.append(f"{name}_duration_seconds_sum{label} {totals.seconds}")
+
+        family(f"{name}_cpu_seconds", "counter", "seconds", "Процессорное время этапов")
+        for stage, totals in stages:
+            if totals.cpu_seconds is not None:
+                lines.append(f'{name}_cpu_seconds_total{{stage="{escape_label(stage)}"}} {totals.cpu_seconds}')
+
+        family(f"{name}_received_bytes", "counter", "bytes", "Байт получено от источников")
+        for stage, totals in stages:
+            if totals.bytes_received is not None:
+                lines.append(f'{name}_received_bytes_total{{stage="{escape_label(stage)}"}} {totals.bytes_received}')
+
+        family(f"{name}_records", "gauge", None, "Записей на выходе последнего прогона этапа")
+        for stage, totals in stages:
+            if totals.last_records is not None:
+                lines.append(f'{name}_records{{stage="{escape_label(stage)}"}} {totals.last_records}')
+
+        family(f"{name}_peak_bytes", "gauge", "bytes", "Пик выделенной памяти последнего прогона этапа под tracemalloc")
+        for stage, totals in stages:
+            if totals.last_peak_bytes is not None:
+                lines.append(f'{name}_peak_bytes{{stage="{escape_label(stage)}"}} {totals.last_peak_bytes}')
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
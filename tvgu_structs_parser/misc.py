@@ -1,25 +1,19 @@
-import json
-import re
-from typing import Optional
-
-from bs4 import Tag
+from __future__ import annotations
 
-from .config import STRUCTS_TO_SKIP, NON_DIGITS_PATTERN, TEACHER_FULLNAME_PATTERN, TEACHER_NAME_PARTS
+import json
+import sys
+from dataclasses import is_dataclass, fields
+from typing import Optional, Any, TYPE_CHECKING
 
+from .field_normalizer import FIELD_NORMALIZER, PhonesNCodes, truly_capitalize
 
-def truly_capitalize(word: Optional[str]) -> str:
-    if not word:
-        return ""
-    return word[0].upper() + word[1:]
+# bs4 нужен только для аннотаций: выгрузки читаются без него
+if TYPE_CHECKING:
+    from bs4 import Tag
 
 
 def split_n_clean(text: str, *splitters: str) -> list[str]:
-    if splitters:
-        splitted = re.split(r"(?:%s)(?![^()]*\))" % "|".join(map(re.escape, splitters)), text)
-    else:
-        splitted = [text]
-
-    return list(filter(lambda x: x, (truly_capitalize(job.strip().strip("/")) for job in splitted)))
+    return FIELD_NORMALIZER.split_n_clean(text, *splitters)
 
 
 def parse_name(name_l: str) -> str:
@@ -74,70 +68,45 @@ def handle_possible_modal(tag: Tag, *splitters: str) -> list[str]:
     return contents
 
 
-def parse_phones_n_additional_codes(phones_text: Optional[str]) -> tuple[Optional[list[str]], Optional[list[str]]]:
-    if not phones_text:
-        return None, None
-
-    phones: list[str] = []
-    additional_codes: list[str] = []
-
-    phones_text = phones_text.lower()
-    for phone_text in split_n_clean(phones_text, ",", ";"):
-        phone_with_add_code: Optional[list[str]] = [
-            re.sub(NON_DIGITS_PATTERN, "", phone_part) for phone_part in phone_text.split("доб")
-        ] if phone_text else None
-        phone: Optional[str] = phone_with_add_code[0] if phone_with_add_code else None
-
-        if phone and len(phone_with_add_code) > 1:
-            phone_additional_code: Optional[str] = phone_with_add_code[1]
-        else:
-            phone_additional_code: Optional[str] = None
-
-        phones.append(phone)
-        additional_codes.append(phone_additional_code)
-
-    return phones, additional_codes
+def parse_phones_n_additional_codes(phones_text: Optional[str]) -> PhonesNCodes:
+    return FIELD_NORMALIZER.parse_phones_n_additional_codes(phones_text)
 
 
 def parse_address_n_postal_code(address_text: Optional[str]) -> tuple[Optional[str], Optional[str]]:
-    address_splitted: list[str] = address_text.strip().split(",", 1)
+    return FIELD_NORMALIZER.parse_address_n_postal_code(address_text)
 
-    postal_code: Optional[str] = None
 
-    if len(address_splitted) == 1:
-        address_str: Optional[str] = address_splitted[0]
-    else:
-        postal_code, address_str = address_splitted
+def parse_phone(phone_l: str) -> str:
+    return FIELD_NORMALIZER.parse_phone(phone_l)
 
-    return None if postal_code is None else postal_code.strip(), address_str.strip()
 
+def parse_teacher_name(boss_name: str) -> dict[str, str]:
+    return FIELD_NORMALIZER.parse_teacher_name(boss_name)
 
-def parse_phone(phone_l: str) -> str:
-    phone_l = phone_l.replace("Телефон:", "").split("доб")[0]
-    phone_l = phone_l.translate(str.maketrans({
-        "\xa0": "",
-        " ": "",
-        "+": "",
-        "-": "",
-        "(": "",
-        ")": "",
-    }))
 
-    return phone_l.strip()
+def is_struct_skipping(struct_name: str) -> bool:
+    return FIELD_NORMALIZER.is_struct_skipping(struct_name)
 
 
-def parse_teacher_name(boss_name: str) -> dict[str, str]:
-    parts: list[str] = re.findall(TEACHER_FULLNAME_PATTERN, boss_name)[0]
-    return dict(zip(TEACHER_NAME_PARTS, [part.capitalize() for part in parts]))
+# Одинаковые строки (адреса, должности, коды) во всех записях и снимках – один объект в памяти
+def intern_fields(record: Any, *field_names: str) -> None:
+    for field_name in field_names:
+        value: Any = getattr(record, field_name)
 
+        if isinstance(value, str):
+            interned: Any = sys.intern(value)
+        elif isinstance(value, tuple):
+            interned: Any = tuple(sys.intern(item) if isinstance(item, str) else item for item in value)
+        else:
+            continue
 
-def is_struct_skipping(struct_name: str) -> bool:
-    for skip_struct in STRUCTS_TO_SKIP:
-        if skip_struct.lower() in struct_name.lower():
-            return True
-    return False
+        # Записи заморожены: обходим `__setattr__` датакласса
+        object.__setattr__(record, field_name, interned)
 
 
 class CustomEncoder(json.JSONEncoder):
     def default(self, obj):
+        # У датаклассов со `__slots__` нет `__dict__`
+        if is_dataclass(obj):
+            return {field.name: getattr(obj, field.name) for field in fields(obj)}
         return obj.__dict__
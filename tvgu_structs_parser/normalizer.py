@@ -1,15 +1,16 @@
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Iterator
 
 from .config import USE_SHORTER_ADDRESSES
+from .misc import intern_fields
 from .parsers.parser_all_groups import StructInfoGroups
 from .parsers.parser_structs import Department, StructInfo, StructType
 from .parsers.parser_structs_api import StructInfoAPI
 from .parsers.parser_structs_tversu_page import StructInfoTversu
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class TvGUStructBase:
     name: str
     shortname: str
@@ -20,8 +21,8 @@ class TvGUStructBase:
     postal_code: Optional[str]
     website: Optional[str]
     email: str
-    phones: Optional[list[str]]
-    phones_additional_codes: Optional[list[str]]
+    phones: Optional[tuple[str, ...]]
+    phones_additional_codes: Optional[tuple[str, ...]]
     video_url: Optional[str]
 
     def _identify(self) -> tuple[str, str, StructType, str, str, str]:
@@ -44,14 +45,17 @@ class TvGUStructBase:
         return NotImplemented
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class TvGUStruct(TvGUStructBase):
     departments: list[Department]
-    groups: list[str]
+    groups: tuple[str, ...]
     boss_name: Optional[str]
     boss_surname: Optional[str]
     boss_patronymic: Optional[str]
 
+    def __post_init__(self) -> None:
+        intern_fields(self, "type", "code", "address", "postal_code", "groups")
+
 
 def normalize_structs(
         departments: list[Department],
@@ -60,6 +64,17 @@ def normalize_structs(
         structs_from_api: list[StructInfoAPI],
         structs_from_groups: list[StructInfoGroups]
 ) -> list[TvGUStruct]:
+    return list(iter_normalized_structs(departments, structs, structs_tversu, structs_from_api, structs_from_groups))
+
+
+# Структуры отдаются по одной, как только собраны из всех источников
+def iter_normalized_structs(
+        departments: list[Department],
+        structs: list[StructInfo],
+        structs_tversu: list[StructInfoTversu],
+        structs_from_api: list[StructInfoAPI],
+        structs_from_groups: list[StructInfoGroups]
+) -> Iterator[TvGUStruct]:
     structs_pre_handle: dict[str, dict] = defaultdict(lambda: {
         "departments": [],
         "struct": None,
@@ -83,8 +98,6 @@ def normalize_structs(
     for struct in structs_from_groups:
         structs_pre_handle[struct.name]["struct_from_groups"] = struct
 
-    final_structs: list[TvGUStruct] = []
-
     for struct_name, struct_info in structs_pre_handle.items():
         if not all(struct_info.values()):
             raise ValueError(f"Структура ТвГУ {struct_name} имеет не всю информацию: {struct_info}")
@@ -99,26 +112,22 @@ def normalize_structs(
         else:
             address: str = struct.address
 
-        final_structs.append(
-            TvGUStruct(
-                name=struct_name,
-                shortname=struct_from_api.shortname,
-                description=struct_tversu.description,
-                code=struct_from_groups.code,
-                type=struct.type,
-                boss_name=struct.boss_name,
-                boss_surname=struct.boss_surname,
-                boss_patronymic=struct.boss_patronymic,
-                address=address,
-                postal_code=struct_tversu.postal_code or struct.postal_code,
-                website=struct.website or struct_tversu.website,
-                email=struct.email or struct_tversu.email,
-                phones=struct.phones,
-                phones_additional_codes=struct.phones_additional_codes,
-                video_url=struct_tversu.video_url,
-                departments=struct_info.get("departments", []),
-                groups=struct_from_groups.groups
-            )
+        yield TvGUStruct(
+            name=struct_name,
+            shortname=struct_from_api.shortname,
+            description=struct_tversu.description,
+            code=struct_from_groups.code,
+            type=struct.type,
+            boss_name=struct.boss_name,
+            boss_surname=struct.boss_surname,
+            boss_patronymic=struct.boss_patronymic,
+            address=address,
+            postal_code=struct_tversu.postal_code or struct.postal_code,
+            website=struct.website or struct_tversu.website,
+            email=struct.email or struct_tversu.email,
+            phones=struct.phones,
+            phones_additional_codes=struct.phones_additional_codes,
+            video_url=struct_tversu.video_url,
+            departments=struct_info.get("departments", []),
+            groups=struct_from_groups.groups,
         )
-
-    return final_structs
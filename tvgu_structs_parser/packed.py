@@ -0,0 +1,230 @@
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+from struct import Struct
+from typing import Any, Union, Optional, Final, Iterator, Callable
+
+from .cache import write_atomic
+from .config import PACKED_MEMO_SIZE
+from .index import normalize_key
+from .memo import LRUMemo
+from .normalizer import TvGUStruct
+from .parsers.parser_structs import Department
+from .serialization import struct_to_dict, department_to_dict, department_from_dict, struct_from_dict, \
+    is_orjson_available
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PACKED_MAGIC: Final[bytes] = b"TVGUPAK1"
+# Разделы файла по порядку заголовка: записи структур и кафедр, затем таблицы ключей
+RECORD_SECTIONS: Final[tuple[str, ...]] = ("structs", "departments")
+KEY_SECTIONS: Final[tuple[str, ...]] = (
+    "by_name", "by_code", "by_shortname", "by_group", "department_by_name", "department_by_email"
+)
+# Заголовок: сигнатура и по каждому разделу смещение и число элементов
+HEADER: Final[Struct] = Struct("<8s" + "QI" * (len(RECORD_SECTIONS) + len(KEY_SECTIONS)))
+# Запись: смещение и длина JSON
+RECORD_SLOT: Final[Struct] = Struct("<QI")
+# Ключ: 64-битный хэш нормализованного ключа, номер записи, смещение и длина самого ключа в UTF-8.
+# Таблица отсортирована по хэшу
+KEY_SLOT: Final[Struct] = Struct("<QIQI")
+
+KeyTable = dict[str, int]
+
+
+# `hash()` у строк случайный в каждом процессе, а таблицы ключей читают разные процессы
+def get_key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+def _encode_record(record: dict[str, Any]) -> bytes:
+    if is_orjson_available():
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _decode_record(data: bytes) -> dict[str, Any]:
+    return orjson.loads(data) if is_orjson_available() else json.loads(data)
+
+
+# При совпадении ключей остаётся первая запись, как в `StructIndex`
+def _put_first(table: KeyTable, key: Optional[str], number: int) -> None:
+    key = normalize_key(key)
+
+    if key is not None and key not in table:
+        table[key] = number
+
+
+def pack_structs(structs: list[TvGUStruct]) -> bytes:
+    body: bytearray = bytearray(HEADER.size)
+    records: dict[str, list[tuple[int, int]]] = {section: [] for section in RECORD_SECTIONS}
+    keys: dict[str, KeyTable] = {section: {} for section in KEY_SECTIONS}
+
+    def append_record(section: str, record: dict[str, Any]) -> int:
+        data: bytes = _encode_record(record)
+        records[section].append((len(body), len(data)))
+        body.extend(data)
+        return len(records[section]) - 1
+
+    for struct in structs:
+        # Кафедры – отдельные записи: структура хранит их номера, а кафедру можно прочитать без структуры
+        department_numbers: list[int] = []
+
+        for department in struct.departments:
+            number: int = append_record("departments", department_to_dict(department))
+            department_numbers.append(number)
+            _put_first(keys["department_by_name"], department.name, number)
+            _put_first(keys["department_by_email"], department.email, number)
+
+        record: dict[str, Any] = struct_to_dict(struct)
+        record["departments"] = department_numbers
+        number: int = append_record("structs", record)
+
+        _put_first(keys["by_name"], struct.name, number)
+        _put_first(keys["by_code"], struct.code, number)
+        _put_first(keys["by_shortname"], struct.shortname, number)
+
+        for group in struct.groups:
+            _put_first(keys["by_group"], group, number)
+
+    sections: list[tuple[int, int]] = []
+
+    for section in RECORD_SECTIONS:
+        sections.append((len(body), len(records[section])))
+
+        for offset, length in records[section]:
+            body.extend(RECORD_SLOT.pack(offset, length))
+
+    for section in KEY_SECTIONS:
+        key_slots: list[tuple[int, int, int, int]] = []
+
+        for key, number in keys[section].items():
+            encoded_key: bytes = key.encode()
+            key_slots.append((get_key_hash(key), number, len(body), len(encoded_key)))
+            body.extend(encoded_key)
+
+        sections.append((len(body), len(key_slots)))
+
+        for key_slot in sorted(key_slots):
+            body.extend(KEY_SLOT.pack(*key_slot))
+
+    HEADER.pack_into(body, 0, PACKED_MAGIC, *(value for section in sections for value in section))
+    return bytes(body)
+
+
+# Пишется во временный файл и переименовывается: процессы, уже открывшие старый файл, дочитают его
+def write_packed_structs(structs: list[TvGUStruct], output_path: Union[str, Path]) -> None:
+    write_atomic(Path(output_path), pack_structs(structs))
+
+
+# Выгрузка, отображённая в память (mmap). Открытие читает только заголовок фиксированного размера;
+# записи разбираются по запросу и запоминаются (`PACKED_MEMO_SIZE`), поиск – двоичный по таблицам хэшей ключей.
+# Страницы файла общие у всех процессов, открывших его. Ключи сравниваются как в `StructIndex`
+class PackedStructs:
+    def __init__(self, path: Union[str, Path], memo_size: int = PACKED_MEMO_SIZE) -> None:
+        self.path: Path = Path(path)
+
+        with open(self.path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size or file.read(len(PACKED_MAGIC)) != PACKED_MAGIC:
+                raise ValueError(f"{self.path} – не выгрузка, записанная `write_packed_structs`")
+
+            self._data: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header: tuple[Any, ...] = HEADER.unpack_from(self._data, 0)
+        self._sections: dict[str, tuple[int, int]] = {
+            section: (header[1 + i * 2], header[2 + i * 2])
+            for i, section in enumerate(RECORD_SECTIONS + KEY_SECTIONS)
+        }
+        self._structs: LRUMemo[int, TvGUStruct] = LRUMemo(self._read_struct, memo_size)
+        self._departments: LRUMemo[int, Department] = LRUMemo(self._read_department, memo_size)
+
+    def __enter__(self) -> "PackedStructs":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._data.close()
+
+    def __len__(self) -> int:
+        return self._sections["structs"][1]
+
+    def __iter__(self) -> Iterator[TvGUStruct]:
+        return (self._structs(number) for number in range(len(self)))
+
+    def _read_record(self, section: str, number: int) -> dict[str, Any]:
+        slots_offset, _ = self._sections[section]
+        offset, length = RECORD_SLOT.unpack_from(self._data, slots_offset + number * RECORD_SLOT.size)
+        return _decode_record(self._data[offset:offset + length])
+
+    def _read_department(self, number: int) -> Department:
+        return department_from_dict(self._read_record("departments", number))
+
+    def _read_struct(self, number: int) -> TvGUStruct:
+        record: dict[str, Any] = self._read_record("structs", number)
+        record["departments"] = [self._read_record("departments", department) for department in record["departments"]]
+        return struct_from_dict(record)
+
+    def _find(self, section: str, key: str, read: Callable[[int], Any]) -> Optional[Any]:
+        key = normalize_key(key)
+
+        if key is None:
+            return None
+
+        slots_offset, count = self._sections[section]
+        key_hash: int = get_key_hash(key)
+        encoded_key: bytes = key.encode()
+        low: int = 0
+        high: int = count
+
+        while low < high:
+            middle: int = (low + high) // 2
+
+            if KEY_SLOT.unpack_from(self._data, slots_offset + middle * KEY_SLOT.size)[0] < key_hash:
+                low = middle + 1
+            else:
+                high = middle
+
+        # У разных ключей хэш может совпасть: сам ключ сравнивается по байтам из файла, запись не разбирается
+        for position in range(low, count):
+            slot_hash, number, key_offset, key_length = KEY_SLOT.unpack_from(
+                self._data, slots_offset + position * KEY_SLOT.size
+            )
+
+            if slot_hash != key_hash:
+                break
+            if self._data[key_offset:key_offset + key_length] == encoded_key:
+                return read(number)
+
+        return None
+
+    def by_name(self, name: str) -> Optional[TvGUStruct]:
+        return self._find("by_name", name, self._structs)
+
+    def by_code(self, code: str) -> Optional[TvGUStruct]:
+        return self._find("by_code", code, self._structs)
+
+    def by_shortname(self, shortname: str) -> Optional[TvGUStruct]:
+        return self._find("by_shortname", shortname, self._structs)
+
+    def by_group(self, group_name: str) -> Optional[TvGUStruct]:
+        return self._find("by_group", group_name, self._structs)
+
+    def department_by_name(self, name: str) -> Optional[Department]:
+        return self._find("department_by_name", name, self._departments)
+
+    def department_by_email(self, email: str) -> Optional[Department]:
+        return self._find("department_by_email", email, self._departments)
+
+    def struct_of_department(self, department: Department) -> Optional[TvGUStruct]:
+        return self.by_name(department.struct_name)
+
+
+def load_structs(path: Union[str, Path]) -> PackedStructs:
+    return PackedStructs(path)
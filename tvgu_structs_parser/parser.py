@@ -1,27 +1,438 @@
 import asyncio
+import sys
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Optional, Union, Callable, TypeVar, Any, Awaitable, AsyncIterator, Iterator
 
-from .normalizer import normalize_structs, TvGUStruct
-from .parsers.parser_all_groups import StructInfoGroups, parse_all_groups
+from .config import STREAM_ALL_GROUPS, ALL_GROUPS_API_URL, PARSE_EXECUTOR, PARSE_WORKERS, STALE_FRESH_WAIT_SECONDS
+from .incremental import IncrementalState
+from .last_good import LastGoodStore, StoredSource
+from .normalizer import iter_normalized_structs, TvGUStruct
+from .parsers.parser_all_groups import StructInfoGroups, parse_all_groups, parse_all_groups_stream
 from .parsers.parser_structs import Department, StructInfo, parse_structs_page
 from .parsers.parser_structs_api import StructInfoAPI, parser_structs_api
 from .parsers.parser_structs_tversu_page import StructInfoTversu, parse_structs_tversu_page
-from .structs_requests import get_structs_tversu_page, get_structs_page, get_structs_small_info, get_all_groups
+from .snapshots import save_snapshot, load_snapshot
+from .structs_requests import StructsClient, SourcePayload, SourcesPayloads, SourceFetcher, fetch_all_sources, \
+    fetch_source, gather_or_cancel, get_structs_page, get_structs_tversu_page, get_structs_small_info, get_all_groups
+from .timings import PipelineTimings, StageProbe
 
+T = TypeVar("T")
+PayloadParser = Callable[[SourcePayload, Callable[[SourcePayload], Any]], Any]
 
-async def get_all_tvgu_structs(show_warnings: bool = False) -> list[TvGUStruct]:
-    tversu_page, structs_page, structs_small_page, all_groups_page = await asyncio.gather(
-        get_structs_tversu_page(),
-        get_structs_page(),
-        get_structs_small_info(),
-        get_all_groups(),
+PARSE_EXECUTORS: dict[str, type[Executor]] = {
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+}
+
+
+@dataclass(frozen=True, kw_only=True)
+class ParsedSources:
+    structs: list[StructInfo]
+    departments: list[Department]
+    structs_tversu: list[StructInfoTversu]
+    structs_from_api: list[StructInfoAPI]
+    structs_from_groups: list[StructInfoGroups]
+
+
+# Результат `get_tvgu_structs_stale_ok`. Устаревание – свойство прогона, а не записи: в структуры оно не попадает,
+# иначе выгрузки, хэши архива и разницы менялись бы без изменения данных
+@dataclass(frozen=True, kw_only=True)
+class StaleOkStructs:
+    structs: list[TvGUStruct]
+    # Источник -> время (`time.time()`) последней удачной загрузки, данные которой взяты вместо свежих
+    stale_sources: dict[str, float]
+
+
+def create_parse_executor(kind: str = PARSE_EXECUTOR, workers: Optional[int] = PARSE_WORKERS) -> Executor:
+    if kind not in PARSE_EXECUTORS:
+        raise ValueError(f"Неизвестный пул для парсинга: {kind}")
+    return PARSE_EXECUTORS[kind](max_workers=workers)
+
+
+# С `incremental` повторные вызовы не разбирают неизменившиеся источники и не пересобирают неизменившиеся структуры
+async def get_all_tvgu_structs(
+        show_warnings: bool = False,
+        client: Optional[StructsClient] = None,
+        executor: Optional[Executor] = None,
+        timings: Optional[PipelineTimings] = None,
+        incremental: Optional[IncrementalState] = None
+) -> list[TvGUStruct]:
+    if client is None:
+        async with StructsClient() as own_client:
+            return await get_all_tvgu_structs(show_warnings, own_client, executor, timings, incremental)
+
+    if executor is None:
+        with create_parse_executor() as own_executor:
+            return await get_all_tvgu_structs(show_warnings, client, own_executor, timings, incremental)
+
+    if timings is None:
+        timings = PipelineTimings()
+
+    parsed: ParsedSources = await fetch_and_parse_all_sources(client, executor, timings, show_warnings, incremental)
+    return join_measured(parsed, timings, incremental)
+
+
+# То же, но структуры отдаются по одной, как только собраны (или, с `incremental`, взяты из прошлого прогона):
+# потребитель может писать их, не дожидаясь остальных. Поток начинается после загрузки и парсинга всех источников –
+# кафедры и сведения о структуре приходят из разных ответов, и без всех источников структуру не собрать
+async def iter_tvgu_structs(
+        show_warnings: bool = False,
+        client: Optional[StructsClient] = None,
+        executor: Optional[Executor] = None,
+        timings: Optional[PipelineTimings] = None,
+        incremental: Optional[IncrementalState] = None
+) -> AsyncIterator[TvGUStruct]:
+    if client is None:
+        async with StructsClient() as own_client:
+            async for struct in iter_tvgu_structs(show_warnings, own_client, executor, timings, incremental):
+                yield struct
+        return
+
+    if executor is None:
+        with create_parse_executor() as own_executor:
+            async for struct in iter_tvgu_structs(show_warnings, client, own_executor, timings, incremental):
+                yield struct
+        return
+
+    if timings is None:
+        timings = PipelineTimings()
+
+    parsed: ParsedSources = await fetch_and_parse_all_sources(client, executor, timings, show_warnings, incremental)
+
+    for struct in iter_joined_structs(parsed, incremental):
+        yield struct
+
+
+async def record_tvgu_structs(
+        snapshots_directory: Union[str, Path],
+        show_warnings: bool = False,
+        client: Optional[StructsClient] = None,
+        timings: Optional[PipelineTimings] = None
+) -> tuple[Path, list[TvGUStruct]]:
+    if client is None:
+        async with StructsClient() as own_client:
+            return await record_tvgu_structs(snapshots_directory, show_warnings, own_client, timings)
+
+    if timings is None:
+        timings = PipelineTimings()
+
+    payloads: SourcesPayloads = await fetch_all_sources(client, timings)
+    snapshot_path: Path = save_snapshot(payloads, snapshots_directory)
+    parsed: ParsedSources = parse_all_sources(payloads, show_warnings, client.parse_payload, timings=timings)
+
+    return snapshot_path, join_measured(parsed, timings)
+
+
+# Полный прогон парсеров и нормализации по сохранённому снимку, без сети
+def replay_tvgu_structs(
+        snapshot_path: Union[str, Path],
+        show_warnings: bool = False,
+        timings: Optional[PipelineTimings] = None
+) -> list[TvGUStruct]:
+    if timings is None:
+        timings = PipelineTimings()
+
+    parsed: ParsedSources = parse_all_sources(load_snapshot(snapshot_path), show_warnings, timings=timings)
+    return join_measured(parsed, timings)
+
+
+def _parse_directly(payload: SourcePayload, parse: Callable[[SourcePayload], T]) -> T:
+    return parse(payload)
+
+
+# Парсеры источников – функции модуля, а не лямбды: их можно отправить в пул процессов
+def parse_structs_page_payload(payload: SourcePayload, show_warnings: bool = False) -> dict[str, list]:
+    return parse_structs_page(payload.text(), show_warnings)
+
+
+def parse_structs_tversu_page_payload(payload: SourcePayload) -> list[StructInfoTversu]:
+    return parse_structs_tversu_page(payload.text())
+
+
+def parse_structs_api_payload(payload: SourcePayload) -> list[StructInfoAPI]:
+    return parser_structs_api(payload.json())
+
+
+def parse_all_groups_payload(payload: SourcePayload) -> list[StructInfoGroups]:
+    return parse_all_groups(payload.json())
+
+
+def count_records(parsed: Union[list, dict[str, list]]) -> int:
+    if isinstance(parsed, dict):
+        return sum(map(len, parsed.values()))
+    return len(parsed)
+
+
+async def count_bytes(chunks: AsyncIterator[bytes], probe: StageProbe) -> AsyncIterator[bytes]:
+    probe.bytes_received = 0
+
+    async for chunk in chunks:
+        probe.bytes_received += len(chunk)
+        yield chunk
+
+
+def parse_all_sources(
+        payloads: SourcesPayloads,
+        show_warnings: bool = False,
+        parse_payload: PayloadParser = _parse_directly,
+        structs_from_groups: Optional[list[StructInfoGroups]] = None,
+        timings: Optional[PipelineTimings] = None
+) -> ParsedSources:
+    if timings is None:
+        timings = PipelineTimings()
+
+    def parse_measured(source: str, payload: SourcePayload, parse: Callable[[SourcePayload], T]) -> T:
+        with timings.measure(f"{source}: parse") as probe:
+            # При включённом кэше неизменившиеся источники не парсятся повторно
+            parsed: T = parse_payload(payload, parse)
+            probe.records = count_records(parsed)
+
+        return parsed
+
+    structs_n_departments: dict[str, list] = parse_measured(
+        "structs_page", payloads.structs_page, partial(parse_structs_page_payload, show_warnings=show_warnings)
     )
+    structs_tversu: list[StructInfoTversu] = parse_measured(
+        "structs_tversu_page", payloads.structs_tversu_page, parse_structs_tversu_page_payload
+    )
+    structs_from_api: list[StructInfoAPI] = parse_measured(
+        "structs_api", payloads.structs_api, parse_structs_api_payload
+    )
+
+    # Группы уже могли быть разобраны потоково
+    if structs_from_groups is None:
+        structs_from_groups = parse_measured("all_groups", payloads.all_groups, parse_all_groups_payload)
+
+    return ParsedSources(
+        structs=structs_n_departments["structs"],
+        departments=structs_n_departments["departments"],
+        structs_tversu=structs_tversu,
+        structs_from_api=structs_from_api,
+        structs_from_groups=structs_from_groups,
+    )
+
 
-    structs_n_departments: dict[str, list] = parse_structs_page(structs_page, show_warnings)
-    structs: list[StructInfo] = structs_n_departments["structs"]
-    departments: list[Department] = structs_n_departments["departments"]
-    structs_tversu: list[StructInfoTversu] = parse_structs_tversu_page(tversu_page)
-    structs_from_api: list[StructInfoAPI] = parser_structs_api(structs_small_page)
-    structs_from_groups: list[StructInfoGroups] = parse_all_groups(all_groups_page)
+SourceLoader = Callable[[], Awaitable[Any]]
+
+
+# Загрузка и парсинг каждого источника по отдельности; ключи – имена источников, как в `LAST_GOOD_MAX_AGE_SECONDS`.
+# HTML-страницы парсятся в `executor`, чтобы не блокировать цикл событий; JSON быстрый и парсится на месте
+def get_source_loaders(
+        client: StructsClient,
+        executor: Executor,
+        timings: PipelineTimings,
+        show_warnings: bool = False,
+        incremental: Optional[IncrementalState] = None
+) -> dict[str, SourceLoader]:
+    async def fetch_and_parse(
+            source: str,
+            fetch: SourceFetcher,
+            parse: Callable[[SourcePayload], T],
+            in_executor: bool
+    ) -> T:
+        payload: SourcePayload = await fetch_source(client, source, fetch, timings)
+
+        async def parse_payload() -> T:
+            if in_executor:
+                return await client.parse_payload_in_executor(payload, parse, executor, probe)
+            return client.parse_payload(payload, parse)
+
+        # В пуле процессорное время меряется внутри пула, а не по потоку цикла событий
+        with timings.measure(f"{source}: parse", cpu=not in_executor) as probe:
+            if incremental is None:
+                parsed: T = await parse_payload()
+            else:
+                parsed: T = await incremental.parse_payload_async(payload, parse_payload)
+
+            probe.records = count_records(parsed)
+
+        return parsed
+
+    async def stream_all_groups() -> list[StructInfoGroups]:
+        with timings.measure("all_groups: fetch + parse (stream)", cpu=False) as probe:
+            structs_from_groups: list[StructInfoGroups] = await parse_all_groups_stream(
+                count_bytes(client.stream(ALL_GROUPS_API_URL), probe)
+            )
+            probe.records = len(structs_from_groups)
+
+        return structs_from_groups
+
+    # Кэшу и `incremental` нужно тело ответа целиком, поэтому с ними группы загружаются обычным способом
+    if STREAM_ALL_GROUPS and client.cache is None and incremental is None:
+        load_all_groups: SourceLoader = stream_all_groups
+    else:
+        load_all_groups: SourceLoader = partial(
+            fetch_and_parse, "all_groups", get_all_groups, parse_all_groups_payload, in_executor=False
+        )
+
+    return {
+        "structs_page": partial(
+            fetch_and_parse,
+            "structs_page",
+            get_structs_page,
+            partial(parse_structs_page_payload, show_warnings=show_warnings),
+            in_executor=True
+        ),
+        "structs_tversu_page": partial(
+            fetch_and_parse,
+            "structs_tversu_page",
+            get_structs_tversu_page,
+            parse_structs_tversu_page_payload,
+            in_executor=True
+        ),
+        "structs_api": partial(
+            fetch_and_parse, "structs_api", get_structs_small_info, parse_structs_api_payload, in_executor=False
+        ),
+        "all_groups": load_all_groups,
+    }
+
+
+def parsed_sources_from(by_source: dict[str, Any]) -> ParsedSources:
+    return ParsedSources(
+        structs=by_source["structs_page"]["structs"],
+        departments=by_source["structs_page"]["departments"],
+        structs_tversu=by_source["structs_tversu_page"],
+        structs_from_api=by_source["structs_api"],
+        structs_from_groups=by_source["all_groups"],
+    )
+
+
+# Каждый источник парсится сразу, как только загружен, не дожидаясь остальных
+async def fetch_and_parse_all_sources(
+        client: StructsClient,
+        executor: Executor,
+        timings: PipelineTimings,
+        show_warnings: bool = False,
+        incremental: Optional[IncrementalState] = None
+) -> ParsedSources:
+    loaders: dict[str, SourceLoader] = get_source_loaders(client, executor, timings, show_warnings, incremental)
+
+    # Если один источник не загрузился или не разобрался, остальные загрузки отменяются сразу
+    results: list[Any] = await gather_or_cancel(*(load() for load in loaders.values()))
+
+    return parsed_sources_from(dict(zip(loaders, results)))
+
+
+# Устаревшее, пока обновляется: источник, который не успел за `fresh_wait` секунд или упал, берётся из `store`,
+# а его загрузка продолжается в фоне и обновит `store` для следующих прогонов.
+# Источники, загруженные недавно (`LastGoodStore.fresh_seconds`), не загружаются вовсе.
+# Падает, только если у источника нет ни свежих, ни достаточно новых сохранённых данных
+async def get_tvgu_structs_stale_ok(
+        client: StructsClient,
+        executor: Executor,
+        store: LastGoodStore,
+        show_warnings: bool = False,
+        timings: Optional[PipelineTimings] = None,
+        fresh_wait: float = STALE_FRESH_WAIT_SECONDS,
+        incremental: Optional[IncrementalState] = None
+) -> StaleOkStructs:
+    if timings is None:
+        timings = PipelineTimings()
+
+    by_source: dict[str, Any] = {}
+    loading: dict[str, asyncio.Task] = {}
+
+    for source, load in get_source_loaders(client, executor, timings, show_warnings, incremental).items():
+        stored: Optional[StoredSource] = store.get(source)
+
+        if stored is not None and store.is_fresh(stored):
+            by_source[source] = stored.parsed
+        else:
+            loading[source] = store.revalidate(source, load, show_warnings)
+
+    if loading:
+        await asyncio.wait(loading.values(), timeout=fresh_wait)
+
+    stale_sources: dict[str, float] = {}
+
+    for source, task in loading.items():
+        if task.done() and not task.cancelled() and task.exception() is None:
+            by_source[source] = task.result()
+            continue
+
+        stored: Optional[StoredSource] = store.get(source)
+
+        if stored is None:
+            # Подменить нечем: ждём загрузку (или её ошибку). Отмена прогона не отменяет фоновую загрузку
+            by_source[source] = await asyncio.shield(task)
+        else:
+            by_source[source] = stored.parsed
+            stale_sources[source] = stored.stored_at
+
+    parsed: ParsedSources = parsed_sources_from(by_source)
+
+    # Сохранённые данные могут расходиться со свежими по набору структур: остаются структуры, которые есть везде
+    if stale_sources:
+        parsed = restrict_to_common_structs(parsed, show_warnings)
+
+    return StaleOkStructs(structs=join_measured(parsed, timings, incremental), stale_sources=stale_sources)
+
+
+def restrict_to_common_structs(parsed: ParsedSources, show_warnings: bool = False) -> ParsedSources:
+    common_names: set[str] = set.intersection(
+        {struct.name for struct in parsed.structs},
+        {struct.name for struct in parsed.structs_tversu},
+        {struct.name for struct in parsed.structs_from_api},
+        {struct.name for struct in parsed.structs_from_groups},
+    )
+    all_names: set[str] = {struct.name for struct in parsed.structs} | {
+        struct.name for struct in (*parsed.structs_tversu, *parsed.structs_from_api, *parsed.structs_from_groups)
+    }
+
+    if all_names != common_names and show_warnings:
+        print(f"Структуры есть не во всех источниках и пропущены: {all_names - common_names}", file=sys.stderr)
+
+    return ParsedSources(
+        structs=[struct for struct in parsed.structs if struct.name in common_names],
+        departments=[department for department in parsed.departments if department.struct_name in common_names],
+        structs_tversu=[struct for struct in parsed.structs_tversu if struct.name in common_names],
+        structs_from_api=[struct for struct in parsed.structs_from_api if struct.name in common_names],
+        structs_from_groups=[struct for struct in parsed.structs_from_groups if struct.name in common_names],
+    )
+
+
+def join_measured(
+        parsed: ParsedSources,
+        timings: PipelineTimings,
+        incremental: Optional[IncrementalState] = None
+) -> list[TvGUStruct]:
+    with timings.measure("normalize") as probe:
+        structs: list[TvGUStruct] = join_parsed_sources(parsed, incremental)
+        probe.records = len(structs)
+
+    return structs
+
+
+def join_parsed_sources(parsed: ParsedSources, incremental: Optional[IncrementalState] = None) -> list[TvGUStruct]:
+    return list(iter_joined_structs(parsed, incremental))
+
+
+# Несовпадение множеств названий проверяется до первой структуры
+def iter_joined_structs(parsed: ParsedSources, incremental: Optional[IncrementalState] = None) -> Iterator[TvGUStruct]:
+    check_struct_names(parsed)
+
+    if incremental is not None:
+        yield from incremental.iter_join(parsed)
+        return
+
+    yield from iter_normalized_structs(
+        parsed.departments,
+        parsed.structs,
+        parsed.structs_tversu,
+        parsed.structs_from_api,
+        parsed.structs_from_groups,
+    )
+
+
+def check_struct_names(parsed: ParsedSources) -> None:
+    structs: list[StructInfo] = parsed.structs
+    departments: list[Department] = parsed.departments
+    structs_tversu: list[StructInfoTversu] = parsed.structs_tversu
+    structs_from_api: list[StructInfoAPI] = parsed.structs_from_api
+    structs_from_groups: list[StructInfoGroups] = parsed.structs_from_groups
 
     structs_names: set[str] = set(struct.name for struct in structs)
     departments_structs_names: set[str] = set(department.struct_name for department in departments)
@@ -47,14 +458,6 @@ async def get_all_tvgu_structs(show_warnings: bool = False) -> list[TvGUStruct]:
 
         for name, missing_names in missing.items():
             if missing_names:
-                print(f"У `{name}` нет следующих структур: {missing_names}")
+                print(f"У `{name}` нет следующих структур: {missing_names}", file=sys.stderr)
 
         raise ValueError("Несовпадение множества названий структур в расписаниях")
-
-    return normalize_structs(
-        departments,
-        structs,
-        structs_tversu,
-        structs_from_api,
-        structs_from_groups
-    )
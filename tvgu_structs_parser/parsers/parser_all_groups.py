@@ -1,29 +1,32 @@
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, AsyncIterable
 
 from ..config import ALL_GROUPS_API_URL
-from ..misc import is_struct_skipping
+from ..json_stream import JSONArrayStreamDecoder
+from ..misc import is_struct_skipping, intern_fields
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class StructInfoGroups:
     name: str
     code: str
-    groups: list[str]
+    groups: tuple[str, ...]
+
+    def __post_init__(self) -> None:
+        intern_fields(self, "code", "groups")
 
 
 def get_struct_code_from_group_name(group_name: str) -> str:
     return group_name.split("-")[0].strip()
 
 
-def parse_all_groups(all_groups_response: list[dict[str, str]]):
-    if "groups" not in all_groups_response:
-        raise ValueError(f"Неверный формат ответа от {ALL_GROUPS_API_URL}")
+# Раскладывает группы по структурам по одной: не нужно держать в памяти весь ответ
+class GroupsAccumulator:
+    def __init__(self) -> None:
+        self.structs_groups: defaultdict[str, dict] = defaultdict(lambda: {"groups": [], "code": None})
 
-    structs_groups: defaultdict[str, list[dict[str, str]]] = defaultdict(lambda: {"groups": [], "code": None})
-
-    for group in all_groups_response["groups"]:
+    def add(self, group: dict[str, str]) -> None:
         struct_name: Optional[str] = group.get("facultyName")
         group_name: Optional[str] = group.get("groupName")
 
@@ -31,18 +34,49 @@ def parse_all_groups(all_groups_response: list[dict[str, str]]):
             raise ValueError(f"Неверный формат группы: {group}")
 
         if is_struct_skipping(struct_name):
-            continue
+            return
+
+        if self.structs_groups[struct_name]["code"] is None:
+            self.structs_groups[struct_name]["code"] = get_struct_code_from_group_name(group_name)
+
+        self.structs_groups[struct_name]["groups"].append(group_name)
+
+    def result(self) -> list[StructInfoGroups]:
+        return [
+            StructInfoGroups(
+                name=struct_name,
+                code=self.structs_groups[struct_name]["code"],
+                groups=tuple(self.structs_groups[struct_name]["groups"]),
+            )
+            for struct_name in self.structs_groups
+        ]
+
+
+def parse_all_groups(all_groups_response: dict[str, list[dict[str, str]]]) -> list[StructInfoGroups]:
+    if "groups" not in all_groups_response:
+        raise ValueError(f"Неверный формат ответа от {ALL_GROUPS_API_URL}")
+
+    accumulator: GroupsAccumulator = GroupsAccumulator()
+
+    for group in all_groups_response["groups"]:
+        accumulator.add(group)
 
-        if structs_groups[struct_name]["code"] is None:
-            structs_groups[struct_name]["code"] = get_struct_code_from_group_name(group_name)
+    return accumulator.result()
 
-        structs_groups[struct_name]["groups"].append(group_name)
 
-    return [
-        StructInfoGroups(
-            name=struct_name,
-            code=structs_groups[struct_name]["code"],
-            groups=structs_groups[struct_name]["groups"],
-        )
-        for struct_name in structs_groups
-    ]
+# Группы разбираются по мере прихода кусков ответа, параллельно с загрузкой
+async def parse_all_groups_stream(all_groups_chunks: AsyncIterable[bytes]) -> list[StructInfoGroups]:
+    decoder: JSONArrayStreamDecoder = JSONArrayStreamDecoder("groups")
+    accumulator: GroupsAccumulator = GroupsAccumulator()
+
+    async for chunk in all_groups_chunks:
+        for group in decoder.feed(chunk):
+            accumulator.add(group)
+
+    for group in decoder.finish():
+        accumulator.add(group)
+
+    if not decoder.found_key:
+        raise ValueError(f"Неверный формат ответа от {ALL_GROUPS_API_URL}")
+
+    return accumulator.result()
@@ -1,19 +1,38 @@
+from __future__ import annotations
+
 import re
+import sys
 from dataclasses import dataclass
-from typing import Optional, Literal, TypeAlias, Final
+from functools import lru_cache
+from typing import Optional, Literal, TypeAlias, Final, TYPE_CHECKING
 
-from bs4 import Tag, BeautifulSoup
+from ..config import PARTIAL_STRUCTS_PAGE_PARSING
+from ..field_normalizer import FieldNormalizer, FIELD_NORMALIZER, PhonesNCodes
+from ..html_backend import make_soup
+from ..misc import intern_fields
 
-from ..config import USE_SHORTER_ADDRESSES
-from ..misc import is_struct_skipping, parse_phones_n_additional_codes, parse_address_n_postal_code, split_n_clean, \
-    parse_teacher_name
+# Датаклассы отсюда нужны и без парсинга (выгрузки, архив), поэтому bs4 импортируется только при разборе
+if TYPE_CHECKING:
+    from bs4 import Tag, BeautifulSoup, SoupStrainer
 
 StructType: TypeAlias = Literal["faculty", "institute"]
 INSTITUTE_TYPE: Final[str] = "institute"
 FACULTY_TYPE: Final[str] = "faculty"
 
+# Органы управления, факультеты и кафедры: остальные таблицы страницы не нужны
+STRUCTS_PAGE_TABLES_COUNT: Final[int] = 3
+TABLES_START_PATTERN: Final[re.Pattern] = re.compile(r"<(?:h4|thead|tbody)[\s>]", re.IGNORECASE)
+TBODY_END_PATTERN: Final[re.Pattern] = re.compile(r"</tbody\s*>", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def get_tables_strainer() -> SoupStrainer:
+    from bs4 import SoupStrainer
 
-@dataclass(frozen=True, kw_only=True)
+    return SoupStrainer(["h4", "thead", "tbody"])
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
 class StructInfo:
     name: str
     type: StructType
@@ -24,11 +43,14 @@ class StructInfo:
     postal_code: Optional[str]
     website: Optional[str]
     email: str
-    phones: Optional[list[str]]
-    phones_additional_codes: Optional[list[str]]
+    phones: Optional[tuple[str, ...]]
+    phones_additional_codes: Optional[tuple[str, ...]]
+
+    def __post_init__(self) -> None:
+        intern_fields(self, "type", "address", "postal_code")
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class DepartmentBase:
     name: str
     address: Optional[str]
@@ -36,8 +58,8 @@ class DepartmentBase:
     website: Optional[str]
     email: str
     division_clause_url: Optional[str]
-    phones: Optional[list[str]]
-    phones_additional_codes: Optional[list[str]]
+    phones: Optional[tuple[str, ...]]
+    phones_additional_codes: Optional[tuple[str, ...]]
 
     def _identify(self) -> tuple[str, str, str, str, str]:
         return (
@@ -56,57 +78,55 @@ class DepartmentBase:
         return NotImplemented
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class Department(DepartmentBase):
     struct_name: str
-    boss_jobs: Optional[list[str]]
+    boss_jobs: Optional[tuple[str, ...]]
     boss_name: Optional[str]
     boss_surname: Optional[str]
     boss_patronymic: Optional[str]
 
+    def __post_init__(self) -> None:
+        intern_fields(self, "struct_name", "boss_jobs", "address", "postal_code")
 
-def parse_structs(structs_table_body: Tag) -> list[StructInfo]:
-    all_structs: list[Tag] = structs_table_body.find_all(itemprop="structOrgUprav")
 
-    structs: list[StructInfo] = []
-    for struct in all_structs:
+def parse_structs(structs_table_body: Tag, normalizer: FieldNormalizer = FIELD_NORMALIZER) -> list[StructInfo]:
+    # Сначала из дерева вытаскиваются сырые тексты строк, затем нормализуются по столбцам
+    rows: list[dict[str, str]] = []
+
+    for struct in structs_table_body.find_all(itemprop="structOrgUprav"):
         struct_name_tag: Tag = struct.find(itemprop="name")
         struct_name: str = struct_name_tag.text.strip()
 
-        if is_struct_skipping(struct_name):
+        if normalizer.is_struct_skipping(struct_name):
             continue
 
-        struct_type: StructType = FACULTY_TYPE if "факультет" in struct_name.lower() else INSTITUTE_TYPE
+        division_clause_doc_link: Tag = struct.find(itemprop="divisionClauseDocLink")
 
-        boss_name_tag: Tag = struct.find(itemprop="fio")
-        boss_name: str = boss_name_tag.text.strip()
+        rows.append({
+            "name": struct_name,
+            "boss_name": struct.find(itemprop="fio").text.strip(),
+            "address": struct.find(itemprop="addressStr").text,
+            "website": struct.find(itemprop="site").text.strip(),
+            "email": struct.find(itemprop="email").text.strip(),
+            "phones": division_clause_doc_link.find_next("td").text,
+        })
 
-        if boss_name.lower() == "нет" or "отсутствует" in boss_name.lower():
-            boss_name_parts: dict[str, str] = {"name": None, "surname": None, "patronymic": None}
-        else:
-            boss_name_parts: dict[str, str] = parse_teacher_name(boss_name)
+    boss_names: list[dict[str, Optional[str]]] = normalizer.boss_names_column([row["boss_name"] for row in rows])
+    addresses: list[tuple[Optional[str], str]] = normalizer.addresses_column([row["address"] for row in rows])
+    phones_n_codes: list[PhonesNCodes] = normalizer.phones_column([row["phones"] for row in rows])
 
-        address_str_n_postal_code_tag: Tag = struct.find(itemprop="addressStr")
-        postal_code, address = parse_address_n_postal_code(address_str_n_postal_code_tag.text)
+    structs: list[StructInfo] = []
 
-        if USE_SHORTER_ADDRESSES and address is not None:
-            address = re.sub("Центральный федеральный округ, Тверская область,", "", address,
-                             flags=re.IGNORECASE).strip()
-            address = re.sub("Тверская область,", "", address, flags=re.IGNORECASE).strip()
+    for row, boss_name_parts, (postal_code, address), (phones, phones_additional_codes) in zip(
+            rows, boss_names, addresses, phones_n_codes
+    ):
+        struct_name: str = row["name"]
+        struct_type: StructType = FACULTY_TYPE if "факультет" in struct_name.lower() else INSTITUTE_TYPE
 
-        website_tag: Tag = struct.find(itemprop="site")
-        website_str: str = website_tag.text.strip()
+        website_str: str = row["website"]
         website: Optional[str] = None if "нет" in website_str or "отсутствует" in website_str else website_str
 
-        email_tag: Tag = struct.find(itemprop="email")
-        email: str = email_tag.text.strip()
-
-        division_clause_doc_link: Tag = struct.find(itemprop="divisionClauseDocLink")
-
-        phone_tag: Tag = division_clause_doc_link.find_next("td")
-        phone_text: str = phone_tag.text
-        phones, phones_additional_codes = parse_phones_n_additional_codes(phone_text)
-
         structs.append(
             StructInfo(
                 name=struct_name,
@@ -117,7 +137,7 @@ def parse_structs(structs_table_body: Tag) -> list[StructInfo]:
                 address=address,
                 postal_code=postal_code,
                 website=website,
-                email=email,
+                email=row["email"],
                 phones=phones,
                 phones_additional_codes=phones_additional_codes
             )
@@ -126,75 +146,72 @@ def parse_structs(structs_table_body: Tag) -> list[StructInfo]:
     return structs
 
 
-def parse_departments(departments_table_body: Tag) -> list[Department]:
-    all_departments: list[Tag] = departments_table_body.find_all("tr")
-    departments: list[Department] = []
+def parse_division_clause_url(division_clause_tag: Tag) -> Optional[str]:
+    if division_clause_tag.text.strip().lower() == "нет":
+        return None
+
+    division_clause_a_tag: Optional[Tag] = division_clause_tag.find("a")
+
+    if division_clause_a_tag is None:
+        return None
+
+    return f"https://tversu.ru{division_clause_a_tag.get('href')}"
+
+
+def parse_departments(departments_table_body: Tag, normalizer: FieldNormalizer = FIELD_NORMALIZER) -> list[Department]:
+    rows: list[dict[str, Optional[str]]] = []
     cur_struct: str = "unknown"
 
-    for department in all_departments:
+    for department in departments_table_body.find_all("tr"):
         if department.get("itemprop") is None:
             cur_struct = department.text.strip()
             continue
 
-        if is_struct_skipping(cur_struct):
+        if normalizer.is_struct_skipping(cur_struct):
             continue
 
-        department_name_tag: Tag = department.find(itemprop="name")
-        department_name: str = department_name_tag.text.strip()
+        division_clause_tag: Tag = department.find(itemprop="divisionClauseDocLink")
 
-        department_boss_tag: Tag = department.find(itemprop="fio")
-        department_boss: str = department_boss_tag.text.strip()
+        rows.append({
+            "name": department.find(itemprop="name").text.strip(),
+            "struct_name": cur_struct,
+            "boss_name": department.find(itemprop="fio").text.strip(),
+            "boss_jobs": department.find(itemprop="post").text.strip(),
+            "address": department.find(itemprop="addressStr").text,
+            "website": department.find(itemprop="site").text.strip().lower(),
+            "email": department.find(itemprop="email").text.strip(),
+            # Положение
+            "division_clause_url": parse_division_clause_url(division_clause_tag),
+            "phones": division_clause_tag.find_next("td").text,
+        })
+
+    boss_names: list[dict[str, Optional[str]]] = normalizer.boss_names_column([row["boss_name"] for row in rows])
+    addresses: list[tuple[Optional[str], str]] = normalizer.addresses_column([row["address"] for row in rows])
+    phones_n_codes: list[PhonesNCodes] = normalizer.phones_column([row["phones"] for row in rows])
 
-        if department_boss.lower() == "нет" or "отсутствует" in department_boss.lower():
-            boss_name_parts: dict[str, str] = {"name": None, "surname": None, "patronymic": None}
-        else:
-            boss_name_parts: dict[str, str] = parse_teacher_name(department_boss)
+    departments: list[Department] = []
 
-        boss_jobs_tag: Tag = department.find(itemprop="post")
-        boss_jobs_str: str = boss_jobs_tag.text.strip()
+    for row, boss_name_parts, (postal_code, address), (phones, additional_codes) in zip(
+            rows, boss_names, addresses, phones_n_codes
+    ):
+        boss_jobs_str: str = row["boss_jobs"]
 
-        if boss_jobs_str.lower() == "нет" or "отсутствует" in boss_jobs_str.lower():
-            boss_jobs: Optional[list[str]] = None
+        if normalizer.is_missing(boss_jobs_str):
+            boss_jobs: Optional[tuple[str, ...]] = None
         else:
-            boss_jobs: Optional[list[str]] = [job.replace("И. о.", "И.о.") for job in
-                                              split_n_clean(boss_jobs_str, ",", ";")]
-
-        address_tag: Tag = department.find(itemprop="addressStr")
-        postal_code, address = parse_address_n_postal_code(address_tag.text)
+            boss_jobs: Optional[tuple[str, ...]] = tuple(job.replace("И. о.", "И.о.") for job in
+                                                         normalizer.split_n_clean(boss_jobs_str, ",", ";"))
 
-        if USE_SHORTER_ADDRESSES:
-            address = re.sub("Центральный федеральный округ, Тверская область,", "", address,
-                             flags=re.IGNORECASE).strip()
-            address = re.sub("Тверская область,", "", address, flags=re.IGNORECASE).strip()
-
-        website_tag: Tag = department.find(itemprop="site")
-        website_str: Optional[str] = website_tag.text.strip().lower()
+        website_str: str = row["website"]
         website: Optional[str] = None if "нет" in website_str or "отсутствует" in website_str else website_str
 
-        email_tag: Tag = department.find(itemprop="email")
-        email: Optional[str] = email_tag.text.strip()
+        email: Optional[str] = row["email"]
         email = None if "нет" in email.lower() or "отсутствует" in email.lower() else email
 
-        division_clause_tag: Tag = department.find(itemprop="divisionClauseDocLink")
-
-        # Положение
-        if division_clause_tag.text.strip().lower() == "нет":
-            division_clause_url = None
-        else:
-            division_clause_a_tag: Optional[Tag] = division_clause_tag.find("a")
-
-            if division_clause_a_tag is None:
-                division_clause_url = None
-            else:
-                division_clause_url = f"https://tversu.ru{division_clause_a_tag.get('href')}"
-
-        phone_tag: Tag = division_clause_tag.find_next("td")
-        phones, additional_codes = parse_phones_n_additional_codes(phone_tag.text)
-
         departments.append(
             Department(
-                name=department_name,
-                struct_name=cur_struct,
+                name=row["name"],
+                struct_name=row["struct_name"],
                 boss_name=boss_name_parts["name"],
                 boss_surname=boss_name_parts["surname"],
                 boss_patronymic=boss_name_parts["patronymic"],
@@ -203,7 +220,7 @@ def parse_departments(departments_table_body: Tag) -> list[Department]:
                 postal_code=postal_code,
                 website=website,
                 email=email,
-                division_clause_url=division_clause_url,
+                division_clause_url=row["division_clause_url"],
                 phones=phones,
                 phones_additional_codes=additional_codes
             )
@@ -212,8 +229,39 @@ def parse_departments(departments_table_body: Tag) -> list[Department]:
     return departments
 
 
-def parse_structs_page(structs_page: str, show_warnings: bool = False) -> dict[str, str]:
-    soup: BeautifulSoup = BeautifulSoup(structs_page, "html.parser")
+# Кусок страницы от первой таблицы до конца таблицы кафедр: дальше токенизировать незачем
+def cut_needed_tables(structs_page: str) -> Optional[str]:
+    start_match: Optional[re.Match] = TABLES_START_PATTERN.search(structs_page)
+
+    if start_match is None:
+        return None
+
+    end: Optional[int] = None
+
+    for tables_count, end_match in enumerate(TBODY_END_PATTERN.finditer(structs_page, start_match.start()), 1):
+        if tables_count == STRUCTS_PAGE_TABLES_COUNT:
+            end = end_match.end()
+            break
+
+    if end is None:
+        return None
+
+    return structs_page[start_match.start():end]
+
+
+def parse_structs_page(
+        structs_page: str,
+        show_warnings: bool = False,
+        html_backend: Optional[str] = None,
+        partial: bool = PARTIAL_STRUCTS_PAGE_PARSING
+) -> dict[str, str]:
+    needed_tables: Optional[str] = cut_needed_tables(structs_page) if partial else None
+
+    if needed_tables is None:
+        soup: BeautifulSoup = make_soup(structs_page, html_backend)
+    else:
+        # Строим только заголовки и тела таблиц, без меню, подвала и прочей разметки
+        soup: BeautifulSoup = make_soup(needed_tables, html_backend, parse_only=get_tables_strainer())
 
     tbodies: list[Tag] = soup.find_all("tbody")
     theaders: list[Tag] = soup.find_all("thead")
@@ -236,7 +284,7 @@ def parse_structs_page(structs_page: str, show_warnings: bool = False) -> dict[s
 
     if "Органы управления".lower() not in cur_h4:
         if show_warnings:
-            print("Неожиданный заголовок таблицы органов управления:", cur_h4)
+            print("Неожиданный заголовок таблицы органов управления:", cur_h4, file=sys.stderr)
 
     cur_h4, cur_head, cur_body = get_next_table()
 
@@ -5,7 +5,7 @@ from ..config import STRUCTS_API_URL
 from ..misc import is_struct_skipping
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class StructInfoAPI:
     name: str
     shortname: str
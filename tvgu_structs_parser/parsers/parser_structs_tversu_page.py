@@ -1,13 +1,17 @@
-from dataclasses import dataclass
-from typing import Optional
+from __future__ import annotations
 
-from bs4 import BeautifulSoup, Tag
+from dataclasses import dataclass
+from typing import Optional, TYPE_CHECKING
 
+from ..html_backend import make_soup
 from ..misc import parse_name, parse_description, parse_address, parse_email, parse_website, parse_phone, \
-    is_struct_skipping
+    is_struct_skipping, intern_fields
 
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, Tag
 
-@dataclass(frozen=True, kw_only=True)
+
+@dataclass(frozen=True, kw_only=True, slots=True)
 class StructInfoTversu:
     name: str
     description: str
@@ -18,9 +22,12 @@ class StructInfoTversu:
     video_url: Optional[str]
     phone: str
 
+    def __post_init__(self) -> None:
+        intern_fields(self, "address", "postal_code")
+
 
-def parse_structs_tversu_page(structs_tversu_page: str) -> list[StructInfoTversu]:
-    soup: BeautifulSoup = BeautifulSoup(structs_tversu_page, "html.parser")
+def parse_structs_tversu_page(structs_tversu_page: str, html_backend: Optional[str] = None) -> list[StructInfoTversu]:
+    soup: BeautifulSoup = make_soup(structs_tversu_page, html_backend)
 
     structs_info_div: Tag = soup.find(class_="tvsu-ck-content")
     cur_struct_title: Tag = structs_info_div.find_next("h4")
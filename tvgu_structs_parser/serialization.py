@@ -0,0 +1,126 @@
+import json
+import os
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Union, Final, Iterator, Iterable, AsyncIterable, BinaryIO
+
+from .config import USE_ORJSON, SERIALIZER_BUFFER_SIZE
+from .normalizer import TvGUStruct
+from .parsers.parser_structs import Department
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Поля считаются один раз, а не через `__dict__` на каждый объект
+STRUCT_FIELDS: Final[tuple[str, ...]] = tuple(field.name for field in fields(TvGUStruct))
+DEPARTMENT_FIELDS: Final[tuple[str, ...]] = tuple(field.name for field in fields(Department))
+
+
+def department_to_dict(department: Department) -> dict[str, Any]:
+    return {field: getattr(department, field) for field in DEPARTMENT_FIELDS}
+
+
+def struct_to_dict(struct: TvGUStruct) -> dict[str, Any]:
+    record: dict[str, Any] = {field: getattr(struct, field) for field in STRUCT_FIELDS}
+    record["departments"] = [department_to_dict(department) for department in struct.departments]
+    return record
+
+
+# Запись выгрузки в наборе полей `struct_to_dict`: ключи полей, которых у `TvGUStruct` уже нет (например,
+# `stale_sources` из выгрузок прошлых версий), не попадают в хэши архива и разницы выгрузок
+def normalize_struct_record(record: dict[str, Any]) -> dict[str, Any]:
+    normalized: dict[str, Any] = {field: record[field] for field in STRUCT_FIELDS if field in record}
+    normalized["departments"] = [
+        {field: department[field] for field in DEPARTMENT_FIELDS if field in department}
+        for department in record["departments"]
+    ]
+    return normalized
+
+
+# Обратно из записи выгрузки: списки JSON снова становятся кортежами, лишние ключи (старые поля) пропускаются
+def _from_json_value(value: Any) -> Any:
+    return tuple(value) if isinstance(value, list) else value
+
+
+def department_from_dict(record: dict[str, Any]) -> Department:
+    return Department(**{field: _from_json_value(record[field]) for field in DEPARTMENT_FIELDS if field in record})
+
+
+def struct_from_dict(record: dict[str, Any]) -> TvGUStruct:
+    values: dict[str, Any] = {
+        field: _from_json_value(record[field]) for field in STRUCT_FIELDS if field in record and field != "departments"
+    }
+    values["departments"] = [department_from_dict(department) for department in record["departments"]]
+    return TvGUStruct(**values)
+
+
+def is_orjson_available() -> bool:
+    return USE_ORJSON and orjson is not None
+
+
+# Разделители как у orjson: без orjson байты выгрузки (и хэши от них) те же
+def _iter_json_chunks(structs: list[TvGUStruct], prettify: bool) -> Iterator[str]:
+    encoder: json.JSONEncoder = json.JSONEncoder(
+        ensure_ascii=False, indent=2 if prettify else None, separators=(",", ": ") if prettify else (",", ":")
+    )
+    return encoder.iterencode([struct_to_dict(struct) for struct in structs])
+
+
+def serialize_structs(structs: list[TvGUStruct], prettify: bool = False) -> bytes:
+    if is_orjson_available():
+        # orjson сам разбирает датаклассы, в том же порядке полей
+        return orjson.dumps(structs, option=orjson.OPT_INDENT_2 if prettify else 0)
+    return "".join(_iter_json_chunks(structs, prettify)).encode()
+
+
+# Пишется во временный файл рядом и переименовывается: читатель не увидит недописанный JSON
+def write_structs(structs: list[TvGUStruct], output_path: Union[str, Path], prettify: bool = False) -> None:
+    output_path = Path(output_path)
+    tmp_path: Path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+
+    try:
+        with open(tmp_path, "wb", buffering=SERIALIZER_BUFFER_SIZE) as file:
+            if is_orjson_available():
+                file.write(serialize_structs(structs, prettify))
+            else:
+                for chunk in _iter_json_chunks(structs, prettify):
+                    file.write(chunk.encode())
+
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+# NDJSON: одна структура на строку. Строки не зависят друг от друга, поэтому их можно писать и читать по одной
+def serialize_struct_line(struct: TvGUStruct) -> bytes:
+    if is_orjson_available():
+        return orjson.dumps(struct, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(struct_to_dict(struct), ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+
+# После каждой строки – flush, чтобы читатель на том конце канала получил её сразу
+def write_structs_ndjson(structs: Iterable[TvGUStruct], file: BinaryIO) -> int:
+    count: int = 0
+
+    for struct in structs:
+        file.write(serialize_struct_line(struct))
+        file.flush()
+        count += 1
+
+    return count
+
+
+async def write_structs_ndjson_async(structs: AsyncIterable[TvGUStruct], file: BinaryIO) -> int:
+    count: int = 0
+
+    async for struct in structs:
+        file.write(serialize_struct_line(struct))
+        file.flush()
+        count += 1
+
+    return count
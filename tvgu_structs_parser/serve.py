@@ -0,0 +1,203 @@
+import asyncio
+import gzip
+import random
+import sys
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+from aiohttp import web
+
+from .cache import get_payload_digest
+from .config import SERVE_HOST, SERVE_PORT, SERVE_REFRESH_INTERVAL_SECONDS, SERVE_REFRESH_JITTER_SECONDS, \
+    SERVE_RETRY_INTERVAL_SECONDS
+from .field_normalizer import FIELD_NORMALIZER
+from .incremental import IncrementalState
+from .last_good import LastGoodStore
+from .metrics import PipelineMetrics, OPENMETRICS_CONTENT_TYPE
+from .normalizer import TvGUStruct
+from .parser import StaleOkStructs, get_all_tvgu_structs, get_tvgu_structs_stale_ok, create_parse_executor
+from .serialization import serialize_structs
+from .structs_requests import StructsClient
+from .timings import PipelineTimings
+
+
+# Результат, сериализованный один раз при обновлении: запросы отдают готовые байты
+@dataclass(frozen=True, kw_only=True)
+class EncodedStructs:
+    structs: list[TvGUStruct]
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    refreshed_at: float
+    # Источник -> время последней удачной загрузки, данные которой взяты вместо свежих (в `body` не попадает)
+    stale_sources: dict[str, float]
+
+
+def encode_structs(structs: list[TvGUStruct], stale_sources: Optional[dict[str, float]] = None) -> EncodedStructs:
+    body: bytes = serialize_structs(structs)
+
+    return EncodedStructs(
+        structs=structs,
+        body=body,
+        gzip_body=gzip.compress(body),
+        etag=f'"{get_payload_digest(body)}"',
+        refreshed_at=time.time(),
+        stale_sources={} if stale_sources is None else stale_sources,
+    )
+
+
+# Держит в памяти последний удачный результат и обновляет его по расписанию.
+# С `last_good` медленный или упавший источник не задерживает обновление: его данные берутся из последней
+# удачной загрузки, а когда фоновая загрузка закончится, результат пересобирается
+class StructsService:
+    def __init__(
+            self,
+            client: StructsClient,
+            executor: Optional[Executor] = None,
+            refresh_interval: float = SERVE_REFRESH_INTERVAL_SECONDS,
+            refresh_jitter: float = SERVE_REFRESH_JITTER_SECONDS,
+            retry_interval: float = SERVE_RETRY_INTERVAL_SECONDS,
+            show_warnings: bool = False,
+            last_good: Optional[LastGoodStore] = None
+    ) -> None:
+        self.client: StructsClient = client
+        self.executor: Optional[Executor] = executor
+        self.last_good: Optional[LastGoodStore] = last_good
+        self.revalidation: Optional[asyncio.Task] = None
+        self.refresh_interval: float = refresh_interval
+        self.refresh_jitter: float = refresh_jitter
+        self.retry_interval: float = retry_interval
+        self.show_warnings: bool = show_warnings
+        self.current: Optional[EncodedStructs] = None
+        self.last_error: Optional[str] = None
+        self.last_attempt_at: Optional[float] = None
+        # Метрики этапов копятся по всем обновлениям
+        self.metrics: PipelineMetrics = PipelineMetrics()
+        # Между обновлениями: неизменившиеся источники не разбираются, неизменившиеся структуры не пересобираются
+        self.incremental: IncrementalState = IncrementalState()
+
+    async def load_structs(self) -> StaleOkStructs:
+        timings: PipelineTimings = PipelineTimings(observers=(self.metrics,))
+
+        # Фоновым загрузкам нужен пул, который переживёт прогон
+        if self.last_good is None or self.executor is None:
+            return StaleOkStructs(
+                structs=await get_all_tvgu_structs(
+                    self.show_warnings, self.client, self.executor, timings, self.incremental
+                ),
+                stale_sources={},
+            )
+        return await get_tvgu_structs_stale_ok(
+            self.client, self.executor, self.last_good, self.show_warnings, timings, incremental=self.incremental
+        )
+
+    async def revalidate(self) -> None:
+        refreshed: dict[str, bool] = await self.last_good.wait_pending()
+
+        if any(refreshed.values()):
+            await self.refresh()
+
+    async def refresh(self) -> bool:
+        self.last_attempt_at = time.time()
+
+        try:
+            loaded: StaleOkStructs = await self.load_structs()
+            self.current = await asyncio.to_thread(encode_structs, loaded.structs, loaded.stale_sources)
+        except Exception as error:
+            # Продолжаем отдавать последний удачный результат
+            self.last_error = f"{type(error).__name__}: {error}"
+            print(f"Не удалось обновить структуры: {self.last_error}", file=sys.stderr)
+            return False
+
+        self.last_error = None
+
+        if loaded.stale_sources and (self.revalidation is None or self.revalidation.done()):
+            self.revalidation = asyncio.create_task(self.revalidate())
+
+        return True
+
+    # Разброс, чтобы несколько экземпляров не ходили на tversu.ru одновременно
+    def next_delay(self, refreshed: bool) -> float:
+        base: float = self.refresh_interval if refreshed else self.retry_interval
+        return base + random.uniform(0, self.refresh_jitter)
+
+    async def run_refreshes(self) -> None:
+        while True:
+            refreshed: bool = await self.refresh()
+            await asyncio.sleep(self.next_delay(refreshed))
+
+    async def handle_structs(self, request: web.Request) -> web.Response:
+        current: Optional[EncodedStructs] = self.current
+
+        if current is None:
+            return web.json_response({"error": "Структуры ещё не загружены"}, status=503)
+
+        headers: dict[str, str] = {"ETag": current.etag, "Vary": "Accept-Encoding"}
+
+        if request.headers.get("If-None-Match") == current.etag:
+            return web.Response(status=304, headers=headers)
+
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            body: bytes = current.gzip_body
+        else:
+            body: bytes = current.body
+
+        return web.Response(body=body, headers=headers, content_type="application/json", charset="utf-8")
+
+    async def handle_health(self, _: web.Request) -> web.Response:
+        current: Optional[EncodedStructs] = self.current
+
+        return web.json_response({
+            "ready": current is not None,
+            "refreshed_at": None if current is None else current.refreshed_at,
+            "last_attempt_at": self.last_attempt_at,
+            "last_error": self.last_error,
+            "structs_count": None if current is None else len(current.structs),
+            "stale_sources": {} if current is None else current.stale_sources,
+            "field_memo": {name: asdict(stats) for name, stats in FIELD_NORMALIZER.memo_stats().items()},
+            "incremental": asdict(self.incremental.stats),
+        })
+
+    async def handle_metrics(self, _: web.Request) -> web.Response:
+        return web.Response(body=self.metrics.render().encode(), headers={"Content-Type": OPENMETRICS_CONTENT_TYPE})
+
+    def create_app(self) -> web.Application:
+        app: web.Application = web.Application()
+        app.router.add_get("/structs", self.handle_structs)
+        app.router.add_get("/health", self.handle_health)
+        app.router.add_get("/metrics", self.handle_metrics)
+        return app
+
+
+async def serve_tvgu_structs(
+        host: str = SERVE_HOST,
+        port: int = SERVE_PORT,
+        client: Optional[StructsClient] = None,
+        executor: Optional[Executor] = None,
+        show_warnings: bool = False,
+        last_good: Optional[LastGoodStore] = None
+) -> None:
+    if client is None:
+        async with StructsClient() as own_client:
+            return await serve_tvgu_structs(host, port, own_client, executor, show_warnings, last_good)
+
+    if executor is None:
+        with create_parse_executor() as own_executor:
+            return await serve_tvgu_structs(host, port, client, own_executor, show_warnings, last_good)
+
+    service: StructsService = StructsService(
+        client, executor, show_warnings=show_warnings, last_good=last_good or LastGoodStore()
+    )
+    runner: web.AppRunner = web.AppRunner(service.create_app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+
+    print(f"Структуры отдаются на http://{host}:{port}/structs", file=sys.stderr)
+
+    try:
+        await service.run_refreshes()
+    finally:
+        await runner.cleanup()
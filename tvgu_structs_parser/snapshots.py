@@ -0,0 +1,95 @@
+import json
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from typing import Union, Final
+
+from .cache import get_payload_digest
+from .structs_requests import SourcePayload, SourcesPayloads
+
+MANIFEST_FILENAME: Final[str] = "manifest.json"
+SNAPSHOT_NAME_FORMAT: Final[str] = "snapshot-%Y-%m-%dT%H-%M-%S"
+
+# Имя поля `SourcesPayloads` -> имя файла с сырым ответом источника
+SNAPSHOT_FILENAMES: Final[dict[str, str]] = {
+    "structs_page": "structs_page.html",
+    "structs_tversu_page": "structs_tversu_page.html",
+    "structs_api": "structs_api.json",
+    "all_groups": "all_groups.json",
+}
+
+
+# Снимки, записанные в одну секунду, получают суффикс "-1", "-2", ...: директория занимается атомарно `mkdir`,
+# поэтому одно имя не достанется двум записям, даже из разных процессов
+def create_snapshot_directory(snapshots_directory: Union[str, Path], recorded_at: datetime) -> Path:
+    snapshots_directory = Path(snapshots_directory)
+    snapshots_directory.mkdir(parents=True, exist_ok=True)
+    name: str = recorded_at.strftime(SNAPSHOT_NAME_FORMAT)
+    attempt: int = 0
+
+    while True:
+        snapshot_path: Path = snapshots_directory / (name if attempt == 0 else f"{name}-{attempt}")
+
+        try:
+            snapshot_path.mkdir()
+            return snapshot_path
+        except FileExistsError:
+            attempt += 1
+
+
+def save_snapshot(payloads: SourcesPayloads, snapshots_directory: Union[str, Path]) -> Path:
+    recorded_at: datetime = datetime.now()
+    snapshot_path: Path = create_snapshot_directory(snapshots_directory, recorded_at)
+
+    manifest: dict[str, dict] = {}
+
+    for field in fields(SourcesPayloads):
+        payload: SourcePayload = getattr(payloads, field.name)
+        filename: str = SNAPSHOT_FILENAMES[field.name]
+
+        (snapshot_path / filename).write_bytes(payload.body)
+        manifest[field.name] = {
+            "url": payload.url,
+            "file": filename,
+            "charset": payload.charset,
+            "digest": payload.digest,
+        }
+
+    (snapshot_path / MANIFEST_FILENAME).write_text(
+        json.dumps({"recorded_at": recorded_at.isoformat(), "sources": manifest}, ensure_ascii=False, indent=2),
+        encoding="UTF-8"
+    )
+
+    return snapshot_path
+
+
+def load_snapshot(snapshot_path: Union[str, Path]) -> SourcesPayloads:
+    snapshot_path = Path(snapshot_path)
+    manifest_path: Path = snapshot_path / MANIFEST_FILENAME
+
+    # Снимок без манифеста (например, собранный руками) тоже читаем: по стандартным именам файлов
+    if manifest_path.exists():
+        manifest: dict[str, dict] = json.loads(manifest_path.read_text(encoding="UTF-8"))["sources"]
+    else:
+        manifest: dict[str, dict] = {
+            name: {"url": filename, "file": filename, "charset": "UTF-8"}
+            for name, filename in SNAPSHOT_FILENAMES.items()
+        }
+
+    payloads: dict[str, SourcePayload] = {}
+
+    for field in fields(SourcesPayloads):
+        if field.name not in manifest:
+            raise ValueError(f"В снимке {snapshot_path} нет источника {field.name}")
+
+        source: dict = manifest[field.name]
+        body: bytes = (snapshot_path / source["file"]).read_bytes()
+
+        payloads[field.name] = SourcePayload(
+            url=source["url"],
+            body=body,
+            charset=source.get("charset"),
+            digest=get_payload_digest(body),
+        )
+
+    return SourcesPayloads(**payloads)
@@ -0,0 +1,213 @@
+import json
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Union, Final, Optional, Iterator
+
+from .diff import get_record_hash
+from .normalizer import TvGUStruct
+from .serialization import STRUCT_FIELDS, DEPARTMENT_FIELDS, struct_to_dict
+
+# Кафедры и группы лежат в своих таблицах, у структуры вместо них – хэш содержимого для обновления
+STRUCT_COLUMNS: Final[tuple[str, ...]] = tuple(
+    field for field in STRUCT_FIELDS if field not in ("departments", "groups")
+) + ("digest",)
+DEPARTMENT_COLUMNS: Final[tuple[str, ...]] = DEPARTMENT_FIELDS
+GROUP_COLUMNS: Final[tuple[str, ...]] = ("struct_name", "name")
+# Кортежи хранятся строкой JSON
+JSON_COLUMNS: Final[frozenset[str]] = frozenset({"phones", "phones_additional_codes", "boss_jobs"})
+
+TABLES: Final[dict[str, tuple[str, ...]]] = {
+    "structs": STRUCT_COLUMNS,
+    "departments": DEPARTMENT_COLUMNS,
+    "groups": GROUP_COLUMNS,
+}
+
+
+def column_definitions(columns: tuple[str, ...], skip: tuple[str, ...] = ()) -> str:
+    return ", ".join(f"{column} TEXT" for column in columns if column not in skip)
+
+
+# Кафедры и группы – WITHOUT ROWID: таблица и есть первичный ключ, без второй копии ключей в индексе.
+# По одной инструкции: `executescript` коммитит открытую транзакцию, поэтому схема создаётся через `execute`
+SCHEMA: Final[tuple[str, ...]] = (
+    f"""CREATE TABLE IF NOT EXISTS structs (
+    name TEXT PRIMARY KEY, {column_definitions(STRUCT_COLUMNS, skip=("name",))}
+)""",
+    f"""CREATE TABLE IF NOT EXISTS departments (
+    {column_definitions(DEPARTMENT_COLUMNS)},
+    PRIMARY KEY (struct_name, name),
+    FOREIGN KEY (struct_name) REFERENCES structs (name) ON DELETE CASCADE
+) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS groups (
+    struct_name TEXT NOT NULL REFERENCES structs (name) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    PRIMARY KEY (struct_name, name)
+) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS structs_code ON structs (code)",
+    "CREATE INDEX IF NOT EXISTS structs_shortname ON structs (shortname)",
+    "CREATE INDEX IF NOT EXISTS groups_name ON groups (name)",
+)
+DROP_TABLES: Final[tuple[str, ...]] = (
+    "DROP TABLE IF EXISTS groups", "DROP TABLE IF EXISTS departments", "DROP TABLE IF EXISTS structs",
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class SqliteExportStats:
+    added: int
+    changed: int
+    removed: int
+    unchanged: int
+    # Повторы кафедры или группы в одной структуре: в таблицу попадает последняя запись, как в `diff`
+    duplicates_dropped: int
+
+
+def to_column_value(column: str, value: Any) -> Any:
+    if column in JSON_COLUMNS and value is not None:
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def from_column_value(column: str, value: Any) -> Any:
+    if column in JSON_COLUMNS and value is not None:
+        return tuple(json.loads(value))
+    return value
+
+
+# Транзакции открываются явно (`BEGIN`): сам модуль sqlite3 не включает DDL в транзакцию
+def connect_structs_db(path: Union[str, Path]) -> sqlite3.Connection:
+    connection: sqlite3.Connection = sqlite3.connect(path, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA foreign_keys = ON")
+    return connection
+
+
+def existing_columns(connection: sqlite3.Connection, table: str) -> tuple[str, ...]:
+    return tuple(row["name"] for row in connection.execute(f"PRAGMA table_info({table})"))
+
+
+# Поля датаклассов поменялись: таблицы пересоздаются, и выгрузка идёт с нуля.
+# Вызывается внутри транзакции выгрузки: если она не удастся, старые таблицы останутся
+def ensure_schema(connection: sqlite3.Connection) -> None:
+    outdated: bool = any(
+        existing_columns(connection, table) not in ((), columns) for table, columns in TABLES.items()
+    )
+    statements: tuple[str, ...] = DROP_TABLES + SCHEMA if outdated else SCHEMA
+
+    for statement in statements:
+        connection.execute(statement)
+
+
+def struct_rows(records: list[dict[str, Any]]) -> Iterator[tuple]:
+    for record in records:
+        yield tuple(to_column_value(column, record[column]) for column in STRUCT_COLUMNS)
+
+
+def department_rows(records: list[dict[str, Any]]) -> Iterator[tuple]:
+    for record in records:
+        for department in record["departments"]:
+            yield tuple(to_column_value(column, department[column]) for column in DEPARTMENT_COLUMNS)
+
+
+def group_rows(records: list[dict[str, Any]]) -> Iterator[tuple]:
+    for record in records:
+        for group in record["groups"]:
+            yield record["name"], group
+
+
+# Ключ таблицы – (структура, название). Источник может повторить кафедру или группу внутри структуры:
+# это его данные, а не ошибка (см. `RecordsPatch.duplicates`), поэтому остаётся последняя строка
+def unique_rows(rows: Iterator[tuple], columns: tuple[str, ...]) -> tuple[list[tuple], int]:
+    key_indexes: tuple[int, ...] = (columns.index("struct_name"), columns.index("name"))
+    unique: dict[tuple, tuple] = {}
+    rows_count: int = 0
+
+    for row in rows:
+        unique[tuple(row[index] for index in key_indexes)] = row
+        rows_count += 1
+
+    return list(unique.values()), rows_count - len(unique)
+
+
+def placeholders(columns: tuple[str, ...]) -> str:
+    return ", ".join("?" * len(columns))
+
+
+# Новый снимок поверх существующей базы: неизменившиеся по хэшу структуры (вместе с кафедрами и группами)
+# не трогаются, изменившиеся переписываются, пропавшие удаляются. Всё, вместе с миграцией схемы, в одной транзакции
+def export_structs_sqlite(structs: list[TvGUStruct], path: Union[str, Path]) -> SqliteExportStats:
+    records: list[dict[str, Any]] = []
+
+    for struct in structs:
+        record: dict[str, Any] = struct_to_dict(struct)
+        record["digest"] = get_record_hash(record)
+        records.append(record)
+
+    connection: sqlite3.Connection = connect_structs_db(path)
+
+    try:
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            ensure_schema(connection)
+
+            stored: dict[str, str] = {
+                row["name"]: row["digest"] for row in connection.execute("SELECT name, digest FROM structs")
+            }
+            current_names: set[str] = {record["name"] for record in records}
+            removed: list[str] = [name for name in stored if name not in current_names]
+            changed: list[dict[str, Any]] = [record for record in records if record["name"] in stored
+                                             and stored[record["name"]] != record["digest"]]
+            added: list[dict[str, Any]] = [record for record in records if record["name"] not in stored]
+
+            # Кафедры и группы удаляются каскадом
+            connection.executemany("DELETE FROM structs WHERE name = ?", ((name,) for name in removed))
+            connection.executemany("DELETE FROM structs WHERE name = ?", ((record["name"],) for record in changed))
+
+            written: list[dict[str, Any]] = changed + added
+            departments, dropped_departments = unique_rows(department_rows(written), DEPARTMENT_COLUMNS)
+            groups, dropped_groups = unique_rows(group_rows(written), GROUP_COLUMNS)
+
+            connection.executemany(
+                f"INSERT INTO structs ({', '.join(STRUCT_COLUMNS)}) VALUES ({placeholders(STRUCT_COLUMNS)})",
+                struct_rows(written),
+            )
+            connection.executemany(
+                f"INSERT INTO departments ({', '.join(DEPARTMENT_COLUMNS)}) "
+                f"VALUES ({placeholders(DEPARTMENT_COLUMNS)})",
+                departments,
+            )
+            connection.executemany(
+                f"INSERT INTO groups ({', '.join(GROUP_COLUMNS)}) VALUES ({placeholders(GROUP_COLUMNS)})",
+                groups,
+            )
+    finally:
+        connection.close()
+
+    return SqliteExportStats(
+        added=len(added),
+        changed=len(changed),
+        removed=len(removed),
+        unchanged=len(records) - len(added) - len(changed),
+        duplicates_dropped=dropped_departments + dropped_groups,
+    )
+
+
+def row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
+    return {column: from_column_value(column, row[column]) for column in row.keys()}
+
+
+def select_departments(connection: sqlite3.Connection, struct_name: str) -> list[dict[str, Any]]:
+    return [
+        row_to_dict(row)
+        for row in connection.execute("SELECT * FROM departments WHERE struct_name = ? ORDER BY name", (struct_name,))
+    ]
+
+
+def select_struct_by_group(connection: sqlite3.Connection, group: str) -> Optional[dict[str, Any]]:
+    row: Optional[sqlite3.Row] = connection.execute(
+        "SELECT structs.* FROM groups JOIN structs ON structs.name = groups.struct_name WHERE groups.name = ?",
+        (group,)
+    ).fetchone()
+
+    return None if row is None else row_to_dict(row)
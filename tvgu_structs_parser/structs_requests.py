@@ -1,27 +1,355 @@
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Optional, Any, Callable, TypeVar, AsyncIterator, Awaitable, Mapping
+
 import aiohttp
 
-from .config import STRUCTS_PAGE_URL, STRUCTS_TVERSU_PAGE_URL, STRUCTS_API_URL, ALL_GROUPS_API_URL
+from .cache import SourceCache, CacheEntry, get_payload_digest
+from .config import STRUCTS_PAGE_URL, STRUCTS_TVERSU_PAGE_URL, STRUCTS_API_URL, ALL_GROUPS_API_URL, \
+    CONNECTOR_LIMIT, CONNECTOR_LIMIT_PER_HOST, CONNECTOR_DNS_CACHE_TTL, CONNECTOR_KEEPALIVE_TIMEOUT, \
+    STREAM_CHUNK_SIZE, FETCH_CONNECT_TIMEOUT_SECONDS, FETCH_READ_TIMEOUT_SECONDS, FETCH_READ_TIMEOUTS_SECONDS, \
+    FETCH_RETRIES, FETCH_BACKOFF_BASE_SECONDS, FETCH_BACKOFF_MAX_SECONDS, FETCH_HEDGE_PERCENTILE, \
+    FETCH_HEDGE_MIN_SAMPLES, FETCH_LATENCY_WINDOW
+from .timings import PipelineTimings, StageProbe, run_measuring_cpu
+
+T = TypeVar("T")
+
+RETRY_STATUSES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass(frozen=True, kw_only=True)
+class ConnectorConfig:
+    limit: int = CONNECTOR_LIMIT
+    limit_per_host: int = CONNECTOR_LIMIT_PER_HOST
+    ttl_dns_cache: Optional[int] = CONNECTOR_DNS_CACHE_TTL
+    keepalive_timeout: float = CONNECTOR_KEEPALIVE_TIMEOUT
+
+    def create_connector(self) -> aiohttp.TCPConnector:
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.ttl_dns_cache,
+            use_dns_cache=self.ttl_dns_cache is not None,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class FetchPolicy:
+    connect_timeout: float = FETCH_CONNECT_TIMEOUT_SECONDS
+    read_timeout: float = FETCH_READ_TIMEOUT_SECONDS
+    # Таймауты чтения по URL источника, для остальных – `read_timeout`
+    read_timeouts: Mapping[str, float] = field(default_factory=lambda: dict(FETCH_READ_TIMEOUTS_SECONDS))
+    retries: int = FETCH_RETRIES
+    backoff_base: float = FETCH_BACKOFF_BASE_SECONDS
+    backoff_max: float = FETCH_BACKOFF_MAX_SECONDS
+    hedge_percentile: Optional[float] = FETCH_HEDGE_PERCENTILE
+    hedge_min_samples: int = FETCH_HEDGE_MIN_SAMPLES
+    latency_window: int = FETCH_LATENCY_WINDOW
+
+    def timeout_for(self, url: str) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=self.connect_timeout,
+            sock_read=self.read_timeouts.get(url, self.read_timeout),
+        )
+
+    # Полный разброс: несколько клиентов после общего сбоя не приходят повторять запросы одновременно
+    def backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+
+# Отменённые задачи дожидаются: иначе их соединения остаются занятыми, пока вызывающий идёт дальше,
+# а asyncio предупреждает о задачах и исключениях, которые никто не забрал
+async def cancel_and_wait(tasks: list[asyncio.Future]) -> None:
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Как `asyncio.gather`, но при первой ошибке остальные задачи сразу отменяются: прогон всё равно не удался
+async def gather_or_cancel(*awaitables: Awaitable[Any]) -> list[Any]:
+    tasks: list[asyncio.Future] = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    error: Optional[BaseException] = None
+
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        # Задача, отменённая снаружи, тоже среди завершённых: `exception()` у неё бросил бы `CancelledError`
+        # и скрыл настоящую ошибку
+        error = next((
+            task.exception() for task in tasks
+            if task in done and not task.cancelled() and task.exception() is not None
+        ), None)
+    finally:
+        # В том числе при отмене самого `gather_or_cancel`
+        await cancel_and_wait(tasks)
+
+    if error is not None:
+        raise error
+
+    return [task.result() for task in tasks]
+
+
+@dataclass(frozen=True, kw_only=True)
+class SourcePayload:
+    url: str
+    body: bytes
+    charset: Optional[str]
+    digest: str
+    # Источник ответил 304 и тело взято из кэша
+    not_modified: bool = False
+
+    def text(self) -> str:
+        return self.body.decode(self.charset or "UTF-8")
+
+    def json(self) -> Any:
+        return json.loads(self.text())
+
+
+# Один пул соединений на все источники: соединения с tversu.ru переиспользуются между запросами и запусками
+class StructsClient:
+    def __init__(
+            self,
+            connector_config: Optional[ConnectorConfig] = None,
+            session: Optional[aiohttp.ClientSession] = None,
+            cache: Optional[SourceCache] = None,
+            fetch_policy: Optional[FetchPolicy] = None
+    ) -> None:
+        self.connector_config: ConnectorConfig = connector_config or ConnectorConfig()
+        self.cache: Optional[SourceCache] = cache
+        self.fetch_policy: FetchPolicy = fetch_policy or FetchPolicy()
+        # Длительность последних удачных загрузок по URL – для дублирующих запросов
+        self.latencies: dict[str, deque[float]] = {}
+        self._session: Optional[aiohttp.ClientSession] = session
+        # Чужую сессию не закрываем: ей владеет тот, кто её передал
+        self._owns_session: bool = session is None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=self.connector_config.create_connector())
+            self._owns_session = True
+        return self._session
+
+    async def fetch(self, url: str) -> SourcePayload:
+        attempt: int = 0
+
+        while True:
+            try:
+                return await self._fetch_hedged(url)
+            except Exception as error:
+                if attempt >= self.fetch_policy.retries or not is_retryable(error):
+                    raise
+
+            await asyncio.sleep(self.fetch_policy.backoff_delay(attempt))
+            attempt += 1
+
+    def latency_percentile(self, url: str) -> Optional[float]:
+        latencies: Optional[deque[float]] = self.latencies.get(url)
+        policy: FetchPolicy = self.fetch_policy
+
+        if policy.hedge_percentile is None or latencies is None or len(latencies) < policy.hedge_min_samples:
+            return None
+
+        ordered: list[float] = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(policy.hedge_percentile * len(ordered)))]
+
+    # Если ответ задерживается дольше обычного, параллельно уходит второй запрос; берётся первый удачный
+    async def _fetch_hedged(self, url: str) -> SourcePayload:
+        hedge_after: Optional[float] = self.latency_percentile(url)
+
+        if hedge_after is None:
+            return await self._fetch_timed(url)
+
+        tasks: list[asyncio.Task] = [asyncio.create_task(self._fetch_timed(url))]
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+
+            if not done:
+                tasks.append(asyncio.create_task(self._fetch_timed(url)))
+
+            # Ошибка одного из запросов не страшна, пока ждём второй
+            while True:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    tasks.remove(task)
+
+                    # Отменённый снаружи запрос – такая же неудача: ждём второй
+                    failed: bool = task.cancelled() or task.exception() is not None
+
+                    if not failed or not tasks:
+                        return task.result()
+        finally:
+            # Второй запрос, который не успел первым, отменяется
+            await cancel_and_wait(tasks)
+
+    async def _fetch_timed(self, url: str) -> SourcePayload:
+        started: float = time.perf_counter()
+        payload: SourcePayload = await self._fetch_once(url)
+        self.latencies.setdefault(url, deque(maxlen=self.fetch_policy.latency_window)).append(
+            time.perf_counter() - started
+        )
+        return payload
+
+    async def _fetch_once(self, url: str) -> SourcePayload:
+        headers: dict[str, str] = {} if self.cache is None else self.cache.request_headers(url)
+        timeout: aiohttp.ClientTimeout = self.fetch_policy.timeout_for(url)
+
+        async with self.session.get(url, headers=headers, timeout=timeout) as response:
+            if response.status == 304 and self.cache is not None:
+                cached: Optional[tuple[CacheEntry, bytes]] = self.cache.mark_not_modified(url)
+
+                if cached is not None:
+                    entry, body = cached
+                    return SourcePayload(url=url, body=body, charset=entry.charset, digest=entry.digest,
+                                         not_modified=True)
+
+                # Запись пропала между запросом и ответом: перезапрашиваем без валидаторов
+                async with self.session.get(url, timeout=timeout) as full_response:
+                    return await self._read_payload(url, full_response)
+
+            return await self._read_payload(url, response)
+
+    async def _read_payload(self, url: str, response: aiohttp.ClientResponse) -> SourcePayload:
+        response.raise_for_status()
+        body: bytes = await response.read()
+
+        if self.cache is not None:
+            entry: CacheEntry = self.cache.put(
+                url,
+                body,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                charset=response.charset,
+            )
+            return SourcePayload(url=url, body=body, charset=response.charset, digest=entry.digest)
+
+        return SourcePayload(url=url, body=body, charset=response.charset, digest=get_payload_digest(body))
+
+    # Без повторов: куски уже отданы разборщику, и начать заново незаметно для него нельзя
+    async def stream(self, url: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        async with self.session.get(url, timeout=self.fetch_policy.timeout_for(url)) as response:
+            response.raise_for_status()
+
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+
+    def parse_payload(self, payload: SourcePayload, parse: Callable[[SourcePayload], T]) -> T:
+        if self.cache is None:
+            return parse(payload)
+        return self.cache.get_or_parse(payload.url, payload.digest, lambda: parse(payload))
+
+    # `parse` уходит в `executor`, поэтому для пула процессов должна сериализоваться pickle (функция модуля, partial).
+    # В `probe` записывается процессорное время разбора внутри пула
+    async def parse_payload_in_executor(
+            self,
+            payload: SourcePayload,
+            parse: Callable[[SourcePayload], T],
+            executor: Executor,
+            probe: Optional[StageProbe] = None
+    ) -> T:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+
+        async def run_parse() -> T:
+            result, cpu_time = await loop.run_in_executor(executor, partial(run_measuring_cpu, parse), payload)
+
+            if probe is not None:
+                probe.cpu_time = cpu_time
+
+            return result
+
+        if self.cache is None:
+            return await run_parse()
+        return await self.cache.get_or_parse_async(payload.url, payload.digest, run_parse)
+
+    async def get_text(self, url: str) -> str:
+        return (await self.fetch(url)).text()
+
+    async def get_json(self, url: str) -> Any:
+        return (await self.fetch(url)).json()
+
+    async def close(self) -> None:
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "StructsClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+SourceFetcher = Callable[[StructsClient], Awaitable[SourcePayload]]
+
+
+async def fetch_source(
+        client: StructsClient,
+        source: str,
+        fetch: SourceFetcher,
+        timings: Optional[PipelineTimings] = None
+) -> SourcePayload:
+    if timings is None:
+        return await fetch(client)
+
+    with timings.measure(f"{source}: fetch", cpu=False) as probe:
+        payload: SourcePayload = await fetch(client)
+        probe.bytes_received = 0 if payload.not_modified else len(payload.body)
+
+    return payload
+
+
+async def get_structs_page(client: StructsClient) -> SourcePayload:
+    return await client.fetch(STRUCTS_PAGE_URL)
+
+
+async def get_structs_small_info(client: StructsClient) -> SourcePayload:
+    return await client.fetch(STRUCTS_API_URL)
+
 
+async def get_structs_tversu_page(client: StructsClient) -> SourcePayload:
+    return await client.fetch(STRUCTS_TVERSU_PAGE_URL)
 
-async def get_structs_page() -> str:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(STRUCTS_PAGE_URL) as response:
-            return await response.text()
 
+async def get_all_groups(client: StructsClient) -> SourcePayload:
+    return await client.fetch(ALL_GROUPS_API_URL)
 
-async def get_structs_small_info() -> dict[str, list[dict[str, str]]]:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(STRUCTS_API_URL) as response:
-            return await response.json()
 
+@dataclass(frozen=True, kw_only=True)
+class SourcesPayloads:
+    structs_page: SourcePayload
+    structs_tversu_page: SourcePayload
+    structs_api: SourcePayload
+    all_groups: SourcePayload
 
-async def get_structs_tversu_page() -> str:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(STRUCTS_TVERSU_PAGE_URL) as response:
-            return await response.text()
 
+async def fetch_all_sources(client: StructsClient, timings: Optional[PipelineTimings] = None) -> SourcesPayloads:
+    tversu_page, structs_page, structs_small_page, all_groups_page = await gather_or_cancel(
+        fetch_source(client, "structs_tversu_page", get_structs_tversu_page, timings),
+        fetch_source(client, "structs_page", get_structs_page, timings),
+        fetch_source(client, "structs_api", get_structs_small_info, timings),
+        fetch_source(client, "all_groups", get_all_groups, timings),
+    )
 
-async def get_all_groups() -> dict[str, list[dict[str, str]]]:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(ALL_GROUPS_API_URL) as response:
-            return await response.json()
+    return SourcesPayloads(
+        structs_page=structs_page,
+        structs_tversu_page=tversu_page,
+        structs_api=structs_small_page,
+        all_groups=all_groups_page,
+    )
@@ -0,0 +1,152 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+TIMELINE_WIDTH: int = 40
+
+
+@dataclass(frozen=True, kw_only=True)
+class StageTiming:
+    stage: str
+    # Секунды от начала прогона
+    started: float
+    finished: float
+    # Процессорное время самого этапа: для парсинга в пуле – время потока или процесса пула
+    cpu_time: Optional[float] = None
+    # Байт получено по сети: ответ 304 с телом из кэша – 0
+    bytes_received: Optional[int] = None
+    records: Optional[int] = None
+    # Пик выделенной памяти сверх уровня на начало этапа, только при включённом `tracemalloc`.
+    # Учитываются все потоки процесса, поэтому у параллельных этапов пики пересекаются
+    peak_bytes: Optional[int] = None
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+StageObserver = Callable[[StageTiming], None]
+
+
+# То, что этап сообщает о себе сам, пока выполняется
+@dataclass(kw_only=True)
+class StageProbe:
+    cpu_time: Optional[float] = None
+    bytes_received: Optional[int] = None
+    records: Optional[int] = None
+    start_memory: int = 0
+    peak_memory: int = 0
+
+
+# Выполняется в пуле: так процессорное время меряется там, где идёт парсинг
+def run_measuring_cpu(function: Callable[[T], object], argument: T) -> tuple[object, float]:
+    started: float = time.thread_time()
+    result: object = function(argument)
+    return result, time.thread_time() - started
+
+
+# Метрики этапов одного прогона: по началу и концу этапов видно, какие из них шли параллельно.
+# Каждый завершённый этап передаётся в `observers` – так метрики забирает долгоживущий процесс
+class PipelineTimings:
+    def __init__(self, observers: Iterable[StageObserver] = ()) -> None:
+        self.origin: float = time.perf_counter()
+        self.stages: list[StageTiming] = []
+        self.observers: tuple[StageObserver, ...] = tuple(observers)
+        self._active: list[StageProbe] = []
+
+    # Пик `tracemalloc` общий на процесс, поэтому он снимается и сбрасывается на каждой границе этапа
+    # и засчитывается всем этапам, которые в этот момент выполняются
+    def _sample_memory(self) -> Optional[int]:
+        if not tracemalloc.is_tracing():
+            return None
+
+        current, peak = tracemalloc.get_traced_memory()
+
+        for probe in self._active:
+            probe.peak_memory = max(probe.peak_memory, peak)
+
+        tracemalloc.reset_peak()
+        return current
+
+    # `cpu=False` для этапов с `await`: время потока цикла событий включало бы чужие корутины
+    @contextmanager
+    def measure(self, stage: str, cpu: bool = True) -> Iterator[StageProbe]:
+        probe: StageProbe = StageProbe()
+        start_memory: Optional[int] = self._sample_memory()
+        probe.start_memory = probe.peak_memory = start_memory or 0
+        self._active.append(probe)
+
+        started: float = time.perf_counter() - self.origin
+        cpu_started: float = time.thread_time()
+
+        try:
+            yield probe
+        finally:
+            if cpu and probe.cpu_time is None:
+                probe.cpu_time = time.thread_time() - cpu_started
+
+            finished: float = time.perf_counter() - self.origin
+            traced: bool = self._sample_memory() is not None
+            self._active.remove(probe)
+
+            timing: StageTiming = StageTiming(
+                stage=stage,
+                started=started,
+                finished=finished,
+                cpu_time=probe.cpu_time,
+                bytes_received=probe.bytes_received,
+                records=probe.records,
+                peak_bytes=probe.peak_memory - probe.start_memory if traced and start_memory is not None else None,
+            )
+            self.stages.append(timing)
+
+            for observer in self.observers:
+                observer(timing)
+
+    @property
+    def total(self) -> float:
+        return max((timing.finished for timing in self.stages), default=0.0)
+
+    def format(self) -> str:
+        total: float = self.total or 1.0
+        name_width: int = max((len(timing.stage) for timing in self.stages), default=0)
+        lines: list[str] = []
+
+        for timing in sorted(self.stages, key=lambda stage_timing: stage_timing.started):
+            start_column: int = round(timing.started / total * TIMELINE_WIDTH)
+            end_column: int = max(round(timing.finished / total * TIMELINE_WIDTH), start_column + 1)
+            timeline: str = " " * start_column + "█" * (end_column - start_column)
+
+            lines.append(
+                f"{timing.stage:<{name_width}} {timing.started * 1000:>8.1f} – {timing.finished * 1000:>8.1f} мс "
+                f"({timing.duration * 1000:>7.1f} мс) |{timeline:<{TIMELINE_WIDTH}}|"
+            )
+
+        return "\n".join(lines)
+
+    # Таблица для `--profile`; отсутствующие значения – прочерк
+    def format_report(self) -> str:
+        def column(value: Optional[float], scale: float, width: int, precision: int) -> str:
+            return f"{'–':>{width}}" if value is None else f"{value * scale:>{width}.{precision}f}"
+
+        name_width: int = max((len(timing.stage) for timing in self.stages), default=0)
+        lines: list[str] = [
+            f"{'этап':<{name_width}} {'время, мс':>10} {'CPU, мс':>10} {'получено, КиБ':>14} "
+            f"{'записей':>8} {'пик, КиБ':>10}"
+        ]
+
+        for timing in sorted(self.stages, key=lambda stage_timing: stage_timing.started):
+            lines.append(
+                f"{timing.stage:<{name_width}} "
+                f"{column(timing.duration, 1000, 10, 1)} "
+                f"{column(timing.cpu_time, 1000, 10, 1)} "
+                f"{column(timing.bytes_received, 1 / 1024, 14, 1)} "
+                f"{column(timing.records, 1, 8, 0)} "
+                f"{column(timing.peak_bytes, 1 / 1024, 10, 1)}"
+            )
+
+        return "\n".join(lines)